@@ -1,39 +1,77 @@
 import logging
-from flask import Flask, render_template, request, jsonify, send_file, abort
+from flask import Flask, render_template, request, jsonify, g
 from flask_caching import Cache
 import pandas as pd
 import os
-import asyncio
-import aiohttp
-from io import StringIO
+import json
+import functools
+import hashlib
+from concurrent.futures import as_completed
 import threading
 import time
 import datetime
 import math
-from indicators import (
-    calculate_ma, calculate_macd, calculate_rsi, calculate_stoch,
-    calculate_stochrsi, calculate_williams, calculate_cci, calculate_atr,
-    calculate_roc, calculate_uo, calculate_adx, calculate_bollinger,
-    calculate_tradingvalue, calculate_envelope, calculate_ichimoku,
-    calculate_psar, prepare_df
-    )
+from indicators import prepare_df
+from indicator_engine import compute_indicator_block, warmup_for, FAMILIES as INDICATOR_FAMILIES
+from indicator_stream import extend_indicator_tail
+from compact_frame import CompactFrame
+from columnar import pack_columns, CONTENT_TYPE as COLUMNAR_CONTENT_TYPE
 from finance import get_financial_indicators, make_retry_session
 from wordclouds import get_word_frequencies
 from hasuindex import get_sentiment_index
 from gosuindex import get_gosu_index
 from cashflow import get_cashflow_data
 from factor import process_factor_data
-from candle import find_patterns, get_kospi_marketcap_top
+from candle import get_kospi_marketcap_top
 from metrics import get_series_bundle, start_metrics_snapshot_daemon
 from theme import get_theme_calendar, get_current_week_top_themes, get_future_forecast, start_theme_snapshot_daemon
+from bulk_ingest import start_bulk_ingest_daemon
+from screener import get_screen_table, build_screen_table, start_screen_table_builder, run_screen, SCREEN_MAX_RESULTS
+from ohlc_store import (
+    FIELDS as OHLC_FIELDS, load_ohlc, append_ohlc, empty_ohlc, combine_pages, merge_ohlc,
+    date_str_to_int, date_int_to_str, is_valid_code
+    )
+from cache_utils import SingleFlight, ByteLRUCache, StaleWhileRevalidate
+import telemetry
+import profiling
+from naver_crawler import submit as crawler_submit, fetch_text, parse_sise_day
+import itertools
 import requests
-import lxml 
 
 # ------------------ 설정 및 로깅 ------------------
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 app = Flask(__name__)
-cache = Cache(app, config={'CACHE_TYPE': 'simple'})
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", 1000))
+cache = Cache(app, config={'CACHE_TYPE': 'simple', 'CACHE_THRESHOLD': RESPONSE_CACHE_MAX_ENTRIES})
 shared_session = make_retry_session()
+telemetry.instrument_requests()   # 모든 requests 호출을 호스트별로 계측(/metrics)
+
+def _route_label():
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+@app.before_request
+def _telemetry_start():
+    g.telemetry_started = (time.perf_counter(), time.thread_time())
+
+@app.after_request
+def _telemetry_record(response):
+    started = g.pop('telemetry_started', None)
+    if started is not None:
+        telemetry.observe_request(_route_label(), request.method, response.status_code,
+                                  time.perf_counter() - started[0], time.thread_time() - started[1])
+    return response
+
+# 느린 요청/표본 요청 프로파일링(PROFILE_SLOW_MS, PROFILE_SAMPLE_EVERY로 켤 때만)
+@app.before_request
+def _profiling_start():
+    if profiling.ENABLED:
+        params = {"method": request.method, "args": request.values.to_dict(flat=False),
+                  "json": request.get_json(silent=True)}
+        g.profile_token = profiling.start("request", _route_label(), params)
+
+@app.teardown_request
+def _profiling_finish(exc):
+    profiling.finish(g.pop('profile_token', None))
 
 # ------------------ 전역 상수 및 경로 ------------------
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -41,56 +79,71 @@ DATA_FOLDER = os.path.join(BASE_DIR, "data")
 os.makedirs(DATA_FOLDER, exist_ok=True)
 STOCK_CACHE_FILE = os.path.join(DATA_FOLDER, "stock_list.csv")
 STOCK_LIST_URL = 'http://kind.krx.co.kr/corpgeneral/corpList.do?method=download'
-BUFFER_DAYS = 120
 MIN_DAYS_LIMIT = 1
 MAX_DAYS_LIMIT = 365
 MAX_PAGES = 37
-PRECOMPUTE_DAYS = 370
 ROWS_PER_PAGE = 10
-INDICATOR_WARMUP_MAX = 120  # MA120 때문에 기본 워밍업
-MAX_RAW_DAYS = 370          # 기존 PRECOMPUTE_DAYS와 같은 의미(최대 확보치)
-raw_ohlc_cache = {}         # code -> {"pages_fetched": int, "ohlc_map": dict}
+MAX_RAW_DAYS = 370          # 종목별 일봉 최대 확보치(bulk_ingest.TARGET_DAYS와 동일)
+# 캐시 메모리 예산(바이트). 환경변수로 워커 크기에 맞게 조정한다.
+PRECOMPUTED_CACHE_MAX_BYTES = int(os.environ.get("PRECOMPUTED_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+RAW_OHLC_CACHE_MAX_BYTES = int(os.environ.get("RAW_OHLC_CACHE_MAX_BYTES", 128 * 1024 * 1024))
+# code -> {"pages_fetched", "ohlc"(배열 dict), "page1_checked_at", "version"}
+# 내보내진 종목은 다음 요청 때 디스크 저장소(ohlc_store)에서 다시 채워진다.
+raw_ohlc_cache = ByteLRUCache(RAW_OHLC_CACHE_MAX_BYTES, name="raw_ohlc_cache")
+_ohlc_versions = itertools.count(1)  # 엔트리가 재생성돼도 겹치지 않는 전역 버전 번호
 raw_ohlc_cache_lock = threading.Lock()
+# 같은 종목에 대한 동시 크롤링/지표 계산을 하나로 합치는 in-flight 레지스트리
+ohlc_fetch_flight = SingleFlight()     # key: ("page1", code) / ("pages", code)
+precompute_flight = SingleFlight()     # key: code
 
-# ------------------ 일일 캐시 리셋(KST 기준) 설정 ------------------
+# ------------------ 최신 페이지(1페이지) 신선도 설정(KST 기준) ------------------
+# 과거 페이지는 바뀌지 않으므로 불변으로 보고, 새 봉이 생기는 1페이지만 TTL로 다시 확인한다.
 KST = datetime.timezone(datetime.timedelta(hours=9))
-DAILY_RESET_HOUR_KST = 4  # 새벽 4시
-last_cache_reset_date_kst = None
-cache_reset_lock = threading.Lock()
+KRX_OPEN_HM = (9, 0)
+KRX_CLOSE_HM = (15, 40)      # 15:30 장 마감 + 종가 확정 여유
+PAGE1_TTL_INTRADAY = 60      # 장중 1페이지 재확인 주기(초)
 
 
-def ensure_daily_cache_reset_kst():
-    """
-    한국 시간(KST) 기준으로 하루에 한 번, 새벽 4시 이후 처음 호출 시
-    OHLC 관련 전역 캐시를 초기화한다.
-    - precomputed_stock_data: 종목별 미리 계산된 지표 포함 데이터프레임
-    - raw_ohlc_cache: 네이버에서 크롤링한 원시 OHLC 캐시
-    """
-    global last_cache_reset_date_kst
+def _now_kst():
+    return datetime.datetime.now(tz=KST)
 
-    # UTC 기준 현재 시각 → KST로 변환
-    now_utc = datetime.datetime.utcnow().replace(tzinfo=datetime.timezone.utc)
-    now_kst = now_utc.astimezone(KST)
 
-    # 아직 리셋 시간이 안 됐으면 그대로 사용
-    if now_kst.hour < DAILY_RESET_HOUR_KST:
-        return
+def _is_krx_session(now_kst):
+    """평일 09:00 ~ 15:40(KST)이면 장중으로 본다."""
+    if now_kst.weekday() >= 5:
+        return False
+    hm = (now_kst.hour, now_kst.minute)
+    return KRX_OPEN_HM <= hm < KRX_CLOSE_HM
 
-    with cache_reset_lock:
-        # 다른 스레드가 먼저 갱신했는지 다시 검사
-        if last_cache_reset_date_kst is not None and last_cache_reset_date_kst == now_kst.date():
-            return
 
-        # 전역 캐시 비우기
-        precomputed_stock_data.clear()
-        raw_ohlc_cache.clear()
+def _last_krx_close(now_kst):
+    """now_kst 이전(또는 같은) 가장 최근 평일 장 마감 시각"""
+    close = now_kst.replace(hour=KRX_CLOSE_HM[0], minute=KRX_CLOSE_HM[1], second=0, microsecond=0)
+    if now_kst < close:
+        close -= datetime.timedelta(days=1)
+    while close.weekday() >= 5:
+        close -= datetime.timedelta(days=1)
+    return close
 
-        last_cache_reset_date_kst = now_kst.date()
-        logging.info("일일 캐시 리셋 완료 (KST 기준 날짜: %s)", last_cache_reset_date_kst)
+
+def is_page1_fresh(checked_at, now_kst=None):
+    """
+    1페이지 확인 시각(checked_at)이 아직 유효한지 판단한다.
+    - 장중: PAGE1_TTL_INTRADAY 초 이내면 유효
+    - 장외: 가장 최근 장 마감 이후에 한 번이라도 확인했으면 다음 개장까지 유효
+    """
+    if checked_at is None:
+        return False
+    now_kst = now_kst or _now_kst()
+    if _is_krx_session(now_kst):
+        return (now_kst - checked_at).total_seconds() < PAGE1_TTL_INTRADAY
+    return checked_at >= _last_krx_close(now_kst)
 
 # ------------------ 백그라운드 데몬 시작 ------------------
 start_metrics_snapshot_daemon(days=100)
 start_theme_snapshot_daemon()  # 테마 갱신 활성화
+start_bulk_ingest_daemon(on_done=build_screen_table)  # 장외 시간 전 종목 일봉 적재 → 조건 검색 표 갱신
+start_screen_table_builder()   # 저장소에 있는 일봉으로 조건 검색 표 준비
 
 # ------------------ 종목 리스트 로드 (캐싱 및 다운로드) ------------------
 def load_stock_list():
@@ -141,7 +194,101 @@ all_stocks = load_stock_list()
 stock_name_by_code = {s["종목코드"]: s["회사명"] for s in all_stocks}
 
 # ------------------ 전역 데이터 캐시 (종목별 미리 계산된 전체 데이터) ------------------
-precomputed_stock_data = {}
+# 가격 컬럼 + 지금까지 요청된 지표 계열 컬럼만 CompactFrame(가격 단위 지표는 float64, 나머지 지표는 float32 블록)으로 담는다(attrs['families']).
+# 프레임은 교체만 하고 제자리 수정하지 않는다.
+precomputed_stock_data = ByteLRUCache(PRECOMPUTED_CACHE_MAX_BYTES, name="precomputed_stock_data")
+# code -> {"date": 상태에 반영된 마지막 봉 날짜, "states": {계열: 스트리밍 상태}} (재귀형 지표의 봉 단위 갱신용)
+INDICATOR_STREAM_CACHE_MAX_BYTES = int(os.environ.get("INDICATOR_STREAM_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+indicator_stream_cache = ByteLRUCache(INDICATOR_STREAM_CACHE_MAX_BYTES, name="indicator_stream_cache")
+FRAME_LOCK_STRIPES = 64
+_frame_locks = [threading.Lock() for _ in range(FRAME_LOCK_STRIPES)]  # 종목별 프레임 교체 직렬화(줄무늬 락)
+
+def _frame_lock(code):
+    return _frame_locks[hash(code) % FRAME_LOCK_STRIPES]
+
+# ------------------ 응답 캐시 ------------------
+# flask_caching의 cache.cached 데코레이터는 @app.route 위에 붙으면 캐시 안 된 함수가 등록되고,
+# POST 폼 본문도 키에 넣지 못한다. 라우트마다 키 함수를 명시하는 아래 데코레이터를 @app.route 아래에 붙인다.
+# 저장하는 응답에는 본문 해시로 강한 ETag를 붙이고, GET의 If-None-Match가 맞으면 본문 없이 304로 답한다.
+# (키 + 데이터 버전 확인만으로 캐시 항목을 찾으므로 재방문/탭 복원 시 pandas 계산을 거치지 않는다)
+RESPONSE_CACHE_TIMEOUT = 3600
+
+# 데이터 버전(_ohlc_versions)은 프로세스마다 1부터 다시 세므로, 재시작 전에 받은 검증자와 겹치지 않게 섞는다
+_VALIDATOR_SALT = os.urandom(8).hex()
+
+def _body_etag(body):
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+def _validator_etag(key, tag):
+    """응답 캐시 키(라우트 + 정규화된 파라미터) + 데이터 버전으로 만든 ETag(본문을 만들지 않고 계산)"""
+    raw = f"{_VALIDATOR_SALT}|{key}|{tag}".encode('utf-8')
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+def _client_has(etag):
+    return request.method in ('GET', 'HEAD') and request.if_none_match.contains_weak(etag)
+
+def _conditional_response(body, status, mimetype, etag):
+    """ETag를 붙인 응답. 조건부 GET/HEAD이고 ETag가 맞으면 304(본문 없음)"""
+    if _client_has(etag):
+        resp = app.response_class(status=304)
+    else:
+        resp = app.response_class(body, status=status, mimetype=mimetype)
+    resp.set_etag(etag)
+    resp.cache_control.no_cache = True   # 브라우저가 매번 ETag로 재검증하도록
+    return resp
+
+def cached_response(key_fn, timeout=RESPONSE_CACHE_TIMEOUT, tag_fn=None, vary=()):
+    """
+    라우트 응답(200만)을 cache에 (본문, 상태, mimetype, 태그, ETag)로 저장해 재사용한다.
+    - key_fn(): 현재 요청의 캐시 키 문자열. None이면 캐시하지 않는다(잘못된 요청 등).
+    - tag_fn(): 현재 데이터 버전(예: 종목의 OHLC 버전). 저장된 응답의 태그와 다르면 다시 만든다.
+      라우트가 g.response_tag에 실제로 응답에 쓴 데이터 버전을 넣으면 그 값으로 저장한다.
+      tag_fn이 있으면 ETag는 키 + 버전으로 만든 검증자라서, If-None-Match가 맞으면
+      응답 캐시를 보거나 본문을 만들기 전에 바로 304로 답한다. 없으면 본문 해시를 쓴다.
+    - vary: 응답 형식을 고르는 데 쓰는 요청 헤더(예: Accept). 304/오류를 포함한 모든 응답에 Vary로 붙인다.
+    """
+    def deco(fn):
+        def respond(*args, **kwargs):
+            key = key_fn()
+            tag = tag_fn() if (tag_fn is not None and key is not None) else None
+            if key is None or (tag_fn is not None and tag is None):
+                return fn(*args, **kwargs)
+            key = f"resp:{fn.__name__}:{key}"
+            if tag_fn is not None:
+                etag = _validator_etag(key, tag)
+                if _client_has(etag):
+                    return _conditional_response(None, 304, None, etag)
+            hit = cache.get(key)
+            if hit is not None and hit[3] == tag:
+                telemetry.record_cache("flask_response_cache", True)
+                body, status, mimetype, _, etag = hit
+                return _conditional_response(body, status, mimetype, etag)
+            telemetry.record_cache("flask_response_cache", False)
+            resp = app.make_response(fn(*args, **kwargs))
+            if resp.status_code == 200 and not resp.direct_passthrough:
+                tag = g.pop('response_tag', tag)
+                body = resp.get_data()
+                if tag_fn is not None:
+                    etag = _validator_etag(key, tag)
+                else:
+                    etag = _body_etag(body)
+                cache.set(key, (body, resp.status_code, resp.mimetype, tag, etag), timeout=timeout)
+                return _conditional_response(body, resp.status_code, resp.mimetype, etag)
+            return resp
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            resp = app.make_response(respond(*args, **kwargs))
+            for header in vary:
+                resp.vary.add(header)
+            return resp
+        return wrapper
+    return deco
+
+def json_body_key():
+    """JSON 본문(키 정렬)으로 만든 키. 본문이 JSON이 아니면 캐시하지 않는다."""
+    body = request.get_json(silent=True)
+    return None if body is None else json.dumps(body, sort_keys=True, ensure_ascii=False)
 
 # ------------------ 기본 페이지 라우트 ------------------
 @app.route('/')
@@ -173,459 +320,496 @@ def theme_page():
     return render_template('theme.html')
 
 # ------------------ 종목 리스트 API ------------------
-@cache.cached(timeout=3600, query_string=True)
 @app.route('/get_stock_list', methods=['GET'])
+@cached_response(lambda: "")
 def get_stock_list():
     logging.info("종목 리스트 API 호출.")
     return jsonify(all_stocks)
 
 # ------------------ 헬퍼 함수: 네이버 금융 페이지 데이터 가져오기 (비동기) ------------------
-async def fetch_page_data_async(session, page, code, retries=3):
-    url = f'https://finance.naver.com/item/sise_day.nhn?code={code}&page={page}'
-    headers = {'User-Agent': 'Mozilla/5.0'}
-    for attempt in range(retries):
+# 요청마다 이벤트 루프/세션을 새로 만들지 않고, naver_crawler의 상주 루프와
+# 커넥션 풀(keep-alive)을 재사용한다.
+def _sise_day_url(code, page):
+    return f'https://finance.naver.com/item/sise_day.nhn?code={code}&page={page}'
+
+def fetch_ohlc_pages(code, pages):
+    """
+    pages의 일별 시세 페이지를 크롤러 루프에서 동시에 받고,
+    응답이 오는 순서대로 (이 스레드에서) 배열로 파싱한다. 반환 순서는 pages 순서.
+    """
+    futures = {crawler_submit(fetch_text(_sise_day_url(code, p))): p for p in pages}
+    parsed = {}
+    for fut in as_completed(futures):
+        page = futures[fut]
         try:
-            async with session.get(url, headers=headers, timeout=10) as resp:
-                if resp.status == 200:
-                    text = await resp.text(encoding='cp949')
-                    dfs = pd.read_html(StringIO(text), encoding='cp949')
-                    if dfs and not dfs[0].dropna().empty:
-                        return dfs[0].dropna()
-                else:
-                    logging.warning("페이지 %d, 코드 %s: HTTP 상태 코드 %d", page, code, resp.status)
+            parsed[page] = parse_sise_day(fut.result())
         except Exception as e:
-            logging.warning("페이지 %d, 코드 %s: 요청 중 오류 발생: %s", page, code, e)
-    return None
+            logging.warning("페이지 %d, 코드 %s: 파싱 중 오류 발생: %s", page, code, e)
+            parsed[page] = None
+    return [parsed[p] for p in pages]
 
-async def fetch_ohlc_pages_async(code, pages):
-    async with aiohttp.ClientSession() as session:
-        tasks = [fetch_page_data_async(session, p, code) for p in pages]
-        return await asyncio.gather(*tasks)
+def _new_raw_entry(code):
+    """
+    raw_ohlc_cache 엔트리를 만든다. 디스크 저장소에 기록이 있으면 그걸로 채워
+    이미 본 종목은 재시작 후에도 전체 페이지를 다시 긁지 않는다.
+    entry["ohlc"]는 날짜 오름차순 배열 dict(ohlc_store 형식)이다.
+    """
+    entry = {"pages_fetched": 0, "ohlc": empty_ohlc(), "page1_checked_at": None, "version": 0}
+    stored = load_ohlc(code)
+    if stored is not None and stored["dates"].size:
+        entry["ohlc"] = stored
+        entry["version"] = next(_ohlc_versions)
+    return entry
+
+def _sync_entry_with_latest_pages(code, entry, pages_needed):
+    """
+    1페이지부터 차례로 받아 보유한 마지막 거래일과 겹칠 때까지(=공백이 없을 때까지)만
+    크롤링한다. 보통은 1페이지 한 번으로 끝나며, 새 봉/장중 갱신이 있으면 version을 올린다.
+    """
+    with raw_ohlc_cache_lock:
+        before = entry["ohlc"]
+        known_last = before["dates"][-1]
+
+    parts = []
+    reached = False   # 보유 구간과 맞닿을 때까지(공백 없이) 받았는지
+    for page in range(1, MAX_PAGES + 1):
+        part = fetch_ohlc_pages(code, [page])[0]
+        if part is None:
+            break
+        parts.append(part)
+        if part["dates"].min() <= known_last:
+            reached = True
+            break
+    if not reached:
+        # 중간 페이지 실패 등으로 보유 구간까지 잇지 못했으면 공백이 생기므로 반영하지 않는다(TTL 뒤 재시도)
+        if parts:
+            logging.warning("%s: 최신 페이지 동기화 미완료(%d페이지까지 수신), 이번에는 반영하지 않음", code, len(parts))
+        with raw_ohlc_cache_lock:
+            entry["page1_checked_at"] = _now_kst()
+        return
 
-def fetch_ohlc_pages(code, pages):
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        return loop.run_until_complete(fetch_ohlc_pages_async(code, pages))
-    finally:
-        loop.close()
-
-def _merge_results_into_ohlc_map(ohlc_map, results):
-    for df_day in results:
-        if df_day is None:
-            continue
-        for _, row in df_day.iterrows():
-            date_str = str(row['날짜']).strip()
-            try:
-                close_val = float(str(row['종가']).replace(',', '').strip())
-                open_val  = float(str(row['시가']).replace(',', '').strip())
-                high_val  = float(str(row['고가']).replace(',', '').strip())
-                low_val   = float(str(row['저가']).replace(',', '').strip())
-                volume_val= float(str(row['거래량']).replace(',', '').strip())
-            except Exception:
-                continue
-
-            # 날짜 중복은 무시(이미 들어있으면 유지)
-            if date_str not in ohlc_map:
-                ohlc_map[date_str] = {
-                    "open": open_val, "close": close_val,
-                    "high": high_val, "low": low_val,
-                    "volume": volume_val
-                }
+    new = combine_pages(parts)
+    if new["dates"].size:
+        append_ohlc(code, new)
 
-def ensure_latest_ohlc_data(code, needed_days):
+    with raw_ohlc_cache_lock:
+        merged = merge_ohlc(entry["ohlc"], new)
+        entry["ohlc"] = merged
+        # 최신부터 연속으로 확보된 행 수 기준으로 '이미 가진 페이지 수'를 역산
+        entry["pages_fetched"] = max(min(len(parts), pages_needed), merged["dates"].size // ROWS_PER_PAGE)
+        entry["page1_checked_at"] = _now_kst()
+        changed = merged["dates"].size != before["dates"].size or any(
+            merged[f][-1] != before[f][-1] for f in OHLC_FIELDS
+        )
+        if changed:
+            entry["version"] = next(_ohlc_versions)
+    raw_ohlc_cache.resize(code)
+
+def refresh_latest_page(code, pages_needed=1):
     """
-    needed_days 만큼의 '최신 거래일' OHLC를 만들기 위해
-    필요한 페이지만(=ceil(needed_days/10)) 가져오고,
-    기존에 가져온 페이지가 있으면 추가 페이지만 더 가져온다.
+    code의 원시 OHLC 엔트리를 확보하고, 1페이지 TTL이 지났으면 최신 페이지만 다시 받는다.
+    엔트리를 반환한다(entry["version"]은 새 봉/장중 갱신 시 증가).
     """
-    pages_needed = max(1, min(MAX_PAGES, math.ceil(needed_days / ROWS_PER_PAGE)))
-
     with raw_ohlc_cache_lock:
         entry = raw_ohlc_cache.get(code)
         if entry is None:
-            entry = {"pages_fetched": 0, "ohlc_map": {}}
+            entry = _new_raw_entry(code)
             raw_ohlc_cache[code] = entry
+        need_sync = entry["ohlc"]["dates"].size > 0 and not is_page1_fresh(entry["page1_checked_at"])
 
+    if need_sync:
+        ohlc_fetch_flight.do(("page1", code), _sync_entry_with_latest_pages, code, entry, pages_needed)
+    return entry
+
+def _fetch_missing_pages(code, entry, pages_needed):
+    """
+    pages_fetched 다음 페이지부터 pages_needed까지 수집해 엔트리와 저장소에 반영한다.
+    실패한 페이지가 있으면 그 앞까지 연속으로 받은 페이지만 반영·기록하고(공백 방지),
+    나머지는 pages_fetched를 올리지 않아 다음 요청에서 다시 받는다.
+    """
+    with raw_ohlc_cache_lock:
         already = entry["pages_fetched"]
         missing_pages = list(range(already + 1, pages_needed + 1))
+    if not missing_pages:
+        return
+
+    received = []
+    for part in fetch_ohlc_pages(code, missing_pages):
+        if part is None:
+            break
+        received.append(part)
+    if len(received) < len(missing_pages):
+        logging.warning("%s: %d페이지 수집 실패, %d페이지까지만 반영",
+                        code, missing_pages[len(received)], already + len(received))
+    if not received:
+        return
+
+    new = combine_pages(received)
+    with raw_ohlc_cache_lock:
+        entry["ohlc"] = merge_ohlc(entry["ohlc"], new)
+        entry["pages_fetched"] = max(entry["pages_fetched"], already + len(received))
+        if 1 in missing_pages:
+            entry["page1_checked_at"] = _now_kst()
+        if new["dates"].size:
+            entry["version"] = next(_ohlc_versions)
+    raw_ohlc_cache.resize(code)
+    if new["dates"].size:
+        append_ohlc(code, new)
+
+def _pages_for(needed_days):
+    return max(1, min(MAX_PAGES, math.ceil(needed_days / ROWS_PER_PAGE)))
+
+def _pages_complete(code, needed_days):
+    """needed_days에 필요한 페이지를 모두 받았는지"""
+    entry = raw_ohlc_cache.get(code)
+    return entry is None or entry["pages_fetched"] >= _pages_for(needed_days)
+
+def ensure_latest_ohlc_data(code, needed_days):
+    """
+    needed_days 만큼의 '최신 거래일' OHLC를 만들기 위해
+    필요한 페이지만(=ceil(needed_days/10)) 가져오고,
+    기존에 가져온 페이지가 있으면 추가 페이지만 더 가져온다.
+    디스크 저장소(ohlc_store)에 있는 과거 구간은 다시 크롤링하지 않으며,
+    최신 1페이지는 is_page1_fresh 기준으로만 재확인한다.
+    반환: 최신 needed_days개 행의 배열 dict(날짜 오름차순)와 그 데이터 버전
+    """
+    pages_needed = _pages_for(needed_days)
+
+    entry = refresh_latest_page(code, pages_needed)
 
-    # 필요한 추가 페이지가 있으면 그 페이지만 수집
-    if missing_pages:
-        results = fetch_ohlc_pages(code, missing_pages)
+    # 필요한 추가 페이지가 있으면 그 페이지만 수집.
+    # 같은 종목을 이미 다른 요청이 수집 중이면 그 결과를 기다린 뒤 부족분만 다시 확인한다.
+    # 수집이 더 나아가지 못하면(페이지 실패) 가진 만큼만 쓰고, 다음 요청에서 다시 시도한다.
+    while True:
+        with raw_ohlc_cache_lock:
+            fetched = entry["pages_fetched"]
+            if fetched >= pages_needed:
+                break
+        ohlc_fetch_flight.do(("pages", code), _fetch_missing_pages, code, entry, pages_needed)
         with raw_ohlc_cache_lock:
-            _merge_results_into_ohlc_map(entry["ohlc_map"], results)
-            entry["pages_fetched"] = pages_needed
+            if entry["pages_fetched"] == fetched:
+                break
 
     with raw_ohlc_cache_lock:
-        ohlc_map = raw_ohlc_cache[code]["ohlc_map"]
+        ohlc, version = entry["ohlc"], entry["version"]
 
-    # 날짜 정렬 후 최신 needed_days만
-    all_dates = sorted(ohlc_map.keys())  # 'YYYY.MM.DD' 형태면 문자열 정렬 OK
-    if not all_dates:
+    if ohlc["dates"].size == 0:
         raise ValueError("데이터가 없습니다.")
 
-    latest_dates = all_dates[-needed_days:]
-    final_dates, final_opens, final_closes, final_highs, final_lows, final_volumes = [], [], [], [], [], []
-    for d in latest_dates:
-        data = ohlc_map[d]
-        final_dates.append(d)
-        final_opens.append(str(data['open']))
-        final_closes.append(str(data['close']))
-        final_highs.append(str(data['high']))
-        final_lows.append(str(data['low']))
-        final_volumes.append(str(data['volume']))
-
-    return final_dates, final_opens, final_closes, final_highs, final_lows, final_volumes
+    # 배열은 교체만 되고 제자리 수정되지 않으므로 슬라이스(뷰)를 그대로 넘긴다
+    return {k: v[-needed_days:] for k, v in ohlc.items()}, version
 
 # (기존 get_latest_ohlc_data는 최신 거래일 API에서 쓰니까 유지하되,
 #  이제는 "필요한 만큼만" 가져오게 ensure_latest_ohlc_data를 사용)
 def get_latest_ohlc_data(code, num_days):
-    return ensure_latest_ohlc_data(code, num_days)
+    return ensure_latest_ohlc_data(code, num_days)[0]
 
 
 # ------------------ 새로운 함수: 전체 OHLC 데이터 및 지표 미리 계산 ------------------
-from concurrent.futures import ThreadPoolExecutor  # 파일 상단에 추가
+def _ohlc_to_frame(ohlc):
+    """배열 dict → 지표 계산용 가격 프레임(문자열 변환 없이 float 컬럼 그대로)"""
+    return pd.DataFrame({
+        '날짜': [date_int_to_str(d) for d in ohlc["dates"]],
+        '시가': ohlc["open"],
+        '종가': ohlc["close"],
+        '고가': ohlc["high"],
+        '저가': ohlc["low"],
+        '거래량': ohlc["volume"]
+    })
 
 def prepare_full_ohlc_data(code, needed_raw_days):
-    dates, opens, closes, highs, lows, volumes = ensure_latest_ohlc_data(code, needed_raw_days)
-
-    df = pd.DataFrame({
-        '날짜': dates,
-        '시가': list(map(float, opens)),
-        '종가': list(map(float, closes)),
-        '고가': list(map(float, highs)),
-        '저가': list(map(float, lows)),
-        '거래량': list(map(float, volumes))
-    })
+    ohlc, version = ensure_latest_ohlc_data(code, needed_raw_days)
 
-    
-    df = prepare_df(df)
-    try:
-        # [변경된 부분] 여러 지표 계산을 병렬로 실행하여 처리 속도를 단축합니다.
-        with ThreadPoolExecutor(max_workers=7) as executor:
-            future_ma          = executor.submit(calculate_ma, df.copy(), prepared=True)
-            future_macd        = executor.submit(calculate_macd, df.copy(), prepared=True)
-            future_rsi         = executor.submit(calculate_rsi, df.copy(), prepared=True)
-            future_stoch       = executor.submit(calculate_stoch, df.copy(), prepared=True)
-            future_stochrsi    = executor.submit(calculate_stochrsi, df.copy(), prepared=True)
-            future_williams    = executor.submit(calculate_williams, df.copy(), prepared=True)
-            future_cci         = executor.submit(calculate_cci, df.copy(), prepared=True)
-            future_atr         = executor.submit(calculate_atr, df.copy(), prepared=True)
-            future_roc         = executor.submit(calculate_roc, df.copy(), prepared=True)
-            future_uo          = executor.submit(calculate_uo, df.copy(), prepared=True)
-            future_adx         = executor.submit(calculate_adx, df.copy(), prepared=True)
-            future_bollinger   = executor.submit(calculate_bollinger, df.copy(), prepared=True)
-            future_tradingvalue= executor.submit(calculate_tradingvalue, df.copy(), prepared=True)
-            future_envelope    = executor.submit(calculate_envelope, df.copy(), prepared=True)
-            future_ichimoku    = executor.submit(calculate_ichimoku, df.copy(), prepared=True)
-            future_psar        = executor.submit(calculate_psar, df.copy(), prepared=True)
-            
-            # 각 지표 계산 결과를 받습니다.
-            df_ma          = future_ma.result()
-            df_macd        = future_macd.result()
-            df_rsi         = future_rsi.result()
-            df_stoch       = future_stoch.result()
-            df_stochrsi    = future_stochrsi.result()
-            df_williams    = future_williams.result()
-            df_cci         = future_cci.result()
-            df_atr         = future_atr.result()
-            df_roc         = future_roc.result()
-            df_uo          = future_uo.result()
-            df_adx         = future_adx.result()
-            df_bollinger   = future_bollinger.result()
-            df_tradingvalue= future_tradingvalue.result()
-            df_envelope    = future_envelope.result()
-            df_ichimoku    = future_ichimoku.result()
-            df_psar        = future_psar.result()
-        
-        # 반환 변수 명칭은 그대로 유지하여, JS와 연동에 문제가 없도록 합니다.
-        df['ma5']         = df_ma['ma5']
-        df['ma20']        = df_ma['ma20']
-        df['ma60']        = df_ma['ma60']
-        df['ma120']       = df_ma['ma120']
-        df['macd']        = df_macd['macd']
-        df['signal']      = df_macd['signal']
-        df['oscillator']  = df_macd['oscillator']
-        df['rsi']         = df_rsi['rsi']
-        df['stoch_K']     = df_stoch['%K']
-        df['stoch_D']     = df_stoch['%D']
-        df['stochrsi_K']  = df_stochrsi['%K']
-        df['stochrsi_D']  = df_stochrsi['%D']
-        df['williams']    = df_williams['%R']
-        df['CCI']         = df_cci['CCI']
-        df['ATR']         = df_atr['ATR']
-        df['ROC']         = df_roc['ROC']
-        df['UO']          = df_uo['UO']
-        df['DI']          = df_adx['+DI']
-        df['DIM']         = df_adx['-DI']
-        df['ADX']         = df_adx['ADX']
-        df['BB_upper']    = df_bollinger['BU']
-        df['BB_lower']    = df_bollinger['BL']
-        df['tradingvalue']= df_tradingvalue['tradingvalue']
-        df['E_upper']     = df_envelope['EU']
-        df['E_lower']     = df_envelope['EL']
-        df['ichimoku1']   = df_ichimoku['기준선']
-        df['ichimoku2']   = df_ichimoku['전환선']
-        df['ichimoku3']   = df_ichimoku['선행스팬1']
-        df['ichimoku4']   = df_ichimoku['선행스팬2']
-        df['ichimoku5']   = df_ichimoku['후행스팬']
-        df['psar']        = df_psar['psar']
-    except Exception as e:
-        logging.error("전체 보조지표 계산 중 오류: %s", e)
+    df = prepare_df(_ohlc_to_frame(ohlc))
+    df.attrs['ohlc_version'] = version
+    # 상장 기간이 짧아 더 받을 데이터가 없음(페이지 수집이 실패해 짧은 경우는 제외 → 다음 요청에서 재수집)
+    df.attrs['all_history'] = len(df) < needed_raw_days and _pages_complete(code, needed_raw_days)
+    df.attrs['families'] = frozenset()  # 지표는 요청된 계열만 나중에 계산
+    return df
+
+def _served_columns(families):
+    return [col for fam, cols in INDICATOR_FAMILIES.items() if fam in families for col in cols]
+
+def append_new_bars(code, cached):
+    """
+    캐시된 프레임에 새 봉(또는 장중 갱신된 마지막 봉)만 반영한 새 CompactFrame을 반환한다.
+    원시 캐시에서 바로 가져오므로 재크롤링이 없고, 프레임 길이는 그대로 유지한다.
+    메모된 지표 계열은 새 봉 구간만 채운다(재귀형은 스트리밍 상태로 봉마다 O(1), 나머지는 꼬리 구간만 재계산).
+    """
+    df_full = cached.to_frame()
+    entry = refresh_latest_page(code)
+    with raw_ohlc_cache_lock:
+        ohlc, version = entry["ohlc"], entry["version"]
+
+    last_date = date_str_to_int(df_full['날짜'].iloc[-1])
+    tail = ohlc["dates"] >= last_date
+    new_rows = _ohlc_to_frame({k: v[tail] for k, v in ohlc.items()})
+    base = df_full.loc[df_full['날짜'] < date_int_to_str(last_date)]
+    df = prepare_df(pd.concat([base, new_rows], ignore_index=True))
+
+    families = df_full.attrs['families']
+    if families:
+        df, streams = extend_indicator_tail(df, len(base), families, indicator_stream_cache.get(code))
+        if streams is not None:
+            indicator_stream_cache[code] = streams
+    df = df.tail(len(df_full)).reset_index(drop=True)
+    df.attrs['ohlc_version'] = version
+    df.attrs['all_history'] = df_full.attrs.get('all_history', False)
+    df.attrs['families'] = families
+    return CompactFrame.from_frame(df, _served_columns(families))
+
+def _frame_covers(df_full, raw_needed):
+    return df_full is not None and (len(df_full) >= raw_needed or df_full.attrs.get('all_history', False))
+
+def _build_precomputed_frame(code, raw_needed):
+    """
+    precomputed_stock_data[code]가 raw_needed 행 이상의 최신 상태가 되도록
+    필요할 때만 재구성(또는 새 봉 덧붙이기)하고 그 프레임을 반환한다.
+    """
+    # 1페이지 TTL이 지났으면 최신 페이지만 확인(과거 페이지는 불변)
+    version = refresh_latest_page(code)["version"]
+
+    df_full = precomputed_stock_data.get(code)
+    if not _frame_covers(df_full, raw_needed):
+        df_full = CompactFrame.from_frame(prepare_full_ohlc_data(code, raw_needed))
+        # 시작일/길이가 달라진 새 프레임: 이전 프레임 기준으로 누적된 스트리밍 상태는 더 이상 맞지 않는다
+        indicator_stream_cache.pop(code, None)
+    elif df_full.attrs.get('ohlc_version') != version:
+        # 새 봉이 생겼으면 재크롤링 없이 캐시된 프레임에 덧붙인다
+        df_full = append_new_bars(code, df_full)
+    else:
+        return df_full
+    with _frame_lock(code):
+        precomputed_stock_data[code] = df_full
+    return df_full
+
+def ensure_indicator_families(code, df_full, raw_needed, families):
+    """
+    df_full에 families 계열 지표가 없으면 빠진 계열만 계산해 붙인 새 프레임을 반환한다.
+    결과는 캐시 프레임을 교체하는 방식으로 메모되며, 새 봉이 붙어 프레임이 바뀌면 다시 계산된다.
+    """
+    families = frozenset(families)
+    if families <= df_full.attrs['families']:
+        return df_full
+    with _frame_lock(code):
+        # 같은 종목의 다른 요청이 먼저 다른 계열을 붙여 두었으면 그 프레임 위에 얹는다
+        cur = precomputed_stock_data.get(code)
+        base = cur if (_frame_covers(cur, raw_needed) and
+                       cur.attrs['ohlc_version'] == df_full.attrs['ohlc_version']) else df_full
+        missing = families - base.attrs['families']
+        if not missing:
+            return base
+        columns = _served_columns(missing)
+        df = base.with_columns(columns, compute_indicator_block(*base.price_inputs(), columns=columns))
+        df.attrs['families'] = base.attrs['families'] | missing
+        if cur is base or cur is None:
+            precomputed_stock_data[code] = df
     return df
 
+def get_precomputed_frame(code, raw_needed, families=()):
+    """
+    종목별 가격 프레임에 families 지표를 붙여 반환한다. 같은 종목의 동시 요청(page1.js는 차트를 열 때
+    ~17개를 한꺼번에 보냄)은 하나의 재구성 작업을 함께 기다리고, 지표는 요청된 계열만 계산한다.
+    """
+    df_full = precompute_flight.do(code, _build_precomputed_frame, code, raw_needed)
+    if not _frame_covers(df_full, raw_needed):
+        # 먼저 진행 중이던 작업이 더 짧은 구간용이었으면 한 번 더 확인
+        df_full = precompute_flight.do(code, _build_precomputed_frame, code, raw_needed)
+    return ensure_indicator_families(code, df_full, raw_needed, families)
+
 # ------------------ 주가 데이터 및 보조지표 API ------------------
-@cache.cached(timeout=3600, query_string=True)
-@app.route('/get_ohlc_history', methods=['POST'])
-def get_ohlc_history():
-    # 매일 KST 새벽 4시 이후 첫 호출에서 전역 캐시 초기화
-    ensure_daily_cache_reset_kst()
+INDICATOR_FLAG_NAMES = (
+    'ma', 'macd', 'rsi', 'stoch', 'stochrsi', 'williams', 'cci', 'atr', 'roc', 'uo', 'adx',
+    'bollinger', 'tradingvalue', 'envelope', 'ichimoku', 'psar'
+)
 
-    # 파라미터 파싱 및 검증
+def _ohlc_history_key():
+    """/get_ohlc_history 캐시 키: 종목코드, 일수, 켜진 지표 플래그"""
     code = request.form.get('code', '').strip()
-    days_str = request.form.get('days', '242').strip()
-    indicators_flags = {
-        'ma': request.form.get('ma', 'false').strip().lower() == 'true',
-        'macd': request.form.get('macd', 'false').strip().lower() == 'true',
-        'rsi': request.form.get('rsi', 'false').strip().lower() == 'true',
-        'stoch': request.form.get('stoch', 'false').strip().lower() == 'true',
-        'stochrsi': request.form.get('stochrsi', 'false').strip().lower() == 'true',
-        'williams': request.form.get('williams', 'false').strip().lower() == 'true',
-        'cci': request.form.get('cci', 'false').strip().lower() == 'true',
-        'atr': request.form.get('atr', 'false').strip().lower() == 'true',
-        'roc': request.form.get('roc', 'false').strip().lower() == 'true',
-        'uo': request.form.get('uo', 'false').strip().lower() == 'true',
-        'adx': request.form.get('adx', 'false').strip().lower() == 'true',
-        'bollinger': request.form.get('bollinger', 'false').strip().lower() == 'true',
-        'tradingvalue': request.form.get('tradingvalue', 'false').strip().lower() == 'true',
-        'envelope': request.form.get('envelope', 'false').strip().lower() == 'true',
-        'ichimoku': request.form.get('ichimoku', 'false').strip().lower() == 'true',
-        'psar': request.form.get('psar', 'false').strip().lower() == 'true'        
-    }
-    if not code:
-        return jsonify({'error': '종목코드가 없습니다.'}), 400
+    days = request.form.get('days', '242').strip()
+    if not is_valid_code(code) or not days.isdigit():
+        return None
+    flags = ",".join(f for f in INDICATOR_FLAG_NAMES
+                     if request.form.get(f, 'false').strip().lower() == 'true')
+    return f"{code}|{int(days)}|{flags}|{_response_format()}"
+
+def _ohlc_history_tag():
+    """
+    종목의 현재 OHLC 버전(1페이지 TTL이 지났으면 확인 후).
+    새 봉이 생겨 버전이 바뀌면 저장된 응답은 쓰이지 않는다.
+    """
+    try:
+        return refresh_latest_page(request.form.get('code', '').strip())["version"]
+    except Exception:
+        return None
+
+# 지표 계열 → (응답 키, 프레임 컬럼). 응답 키는 page1.js와 연동되는 이름 그대로
+RESPONSE_SERIES = {
+    'ma': (('ma5', 'ma5'), ('ma20', 'ma20'), ('ma60', 'ma60'), ('ma120', 'ma120')),
+    'macd': (('macd', 'macd'), ('signal', 'signal'), ('oscillator', 'oscillator')),
+    'rsi': (('rsi', 'rsi'),),
+    'stoch': (('K', 'stoch_K'), ('D', 'stoch_D')),
+    'stochrsi': (('KK', 'stochrsi_K'), ('DD', 'stochrsi_D')),
+    'williams': (('R', 'williams'),),
+    'cci': (('CCI', 'CCI'),),
+    'atr': (('ATR', 'ATR'),),
+    'roc': (('ROC', 'ROC'),),
+    'uo': (('UO', 'UO'),),
+    'adx': (('DI', 'DI'), ('DIM', 'DIM'), ('ADX', 'ADX')),
+    'bollinger': (('BB_upper', 'BB_upper'), ('BB_lower', 'BB_lower')),
+    'tradingvalue': (('tradingvalue', 'tradingvalue'),),
+    'envelope': (('E_upper', 'E_upper'), ('E_lower', 'E_lower')),
+    'ichimoku': tuple((f'ichimoku{i}', f'ichimoku{i}') for i in range(1, 6)),
+    'psar': (('psar', 'psar'),),
+}
+
+def _parse_code(code_str):
+    """(종목코드, None) 또는 (None, 오류 응답). 숫자 6자리만 받는다(저장소 경로·캐시 키로 쓰임)."""
+    code = code_str.strip() if isinstance(code_str, str) else code_str
+    if code is None or code == '':
+        return None, (jsonify({'error': '종목코드가 없습니다.'}), 400)
+    if not is_valid_code(code):
+        return None, (jsonify({'error': '종목코드는 숫자 6자리여야 합니다.'}), 400)
+    return code, None
+
+def _parse_days(days_str):
+    """(일수, None) 또는 (None, 오류 응답)"""
     try:
         days = int(days_str)
-        if days < MIN_DAYS_LIMIT or days > MAX_DAYS_LIMIT:
-            return jsonify({'error': f'일수는 {MIN_DAYS_LIMIT}~{MAX_DAYS_LIMIT} 사이여야 합니다.'}), 400
     except ValueError:
-        return jsonify({'error': '유효한 숫자를 입력하세요.'}), 400
-    
-    # warmup 계산(최소 구현: MA120 기준으로만 잡아도 네 목표엔 충분)
-    warmup = INDICATOR_WARMUP_MAX if indicators_flags.get('ma', False) else 0
+        return None, (jsonify({'error': '유효한 숫자를 입력하세요.'}), 400)
+    if days < MIN_DAYS_LIMIT or days > MAX_DAYS_LIMIT:
+        return None, (jsonify({'error': f'일수는 {MIN_DAYS_LIMIT}~{MAX_DAYS_LIMIT} 사이여야 합니다.'}), 400)
+    return days, None
 
-    # (조금 더 정교하게 하고 싶으면: ichimoku면 52, macd면 35, bollinger/cci/envelope면 20, 나머지 14… 이런 식으로 max 잡으면 됨)
+def _load_chart_slice(code, days, families):
+    """
+    families 지표가 붙은 마지막 days행 프레임(CompactFrame 보기).
+    요청된 지표들의 워밍업 중 최댓값만큼만 과거 봉을 더 확보한다(indicator_engine의 DAG에서 계산).
+    """
+    raw_needed = min(MAX_RAW_DAYS, days + warmup_for(families))
+    df_full = get_precomputed_frame(code, raw_needed, families)
+    g.response_tag = df_full.attrs['ohlc_version']
+    return df_full.tail(days)
 
-    raw_needed = min(MAX_RAW_DAYS, days + warmup)
+def _response_format():
+    """
+    'columnar'(열 단위 이진, columnar.py) 또는 'json'.
+    format=columnar 파라미터나 Accept 헤더에서 columnar 형식을 JSON보다 선호한 요청만 이진으로 응답한다.
+    (q=0으로 거부했거나 */* 같은 와일드카드로만 받는 요청은 JSON)
+    """
+    if (request.values.get('format') or '').strip().lower() == 'columnar':
+        return 'columnar'
+    if request.accept_mimetypes.best_match(['application/json', COLUMNAR_CONTENT_TYPE]) == COLUMNAR_CONTENT_TYPE:
+        return 'columnar'
+    return 'json'
 
-    need_rebuild = False
-    if code not in precomputed_stock_data:
-        need_rebuild = True
-    else:
-        df_full = precomputed_stock_data[code]
-        if len(df_full) < raw_needed:
-            need_rebuild = True
+def _chart_columnar(df_slice, families, meta=None):
+    """
+    _chart_payload와 같은 이름의 OHLC + families 시리즈를 columnar 형식으로.
+    배열을 그대로 바이트로 옮기므로 원소별 파이썬 변환이 없다(꺼진 계열은 채우지 않는다).
+    """
+    columns = [('opens', df_slice['시가']), ('closes', df_slice['종가']), ('highs', df_slice['고가']),
+               ('lows', df_slice['저가']), ('volumes', df_slice['거래량'])]
+    for fam, series in RESPONSE_SERIES.items():
+        if fam in families:
+            columns.extend((key, df_slice[col]) for key, col in series)
+    body = pack_columns(df_slice['날짜'], columns, dict(meta or {}, families=list(families)))
+    return app.response_class(body, mimetype=COLUMNAR_CONTENT_TYPE)
+
+def _chart_payload(df_slice, families, pad_days=None):
+    """
+    OHLC + families 계열 시리즈 응답 dict.
+    pad_days를 주면 꺼진 계열도 [None]*pad_days로 채운다(/get_ohlc_history 기존 형식).
+    """
+    data = {
+        'dates': df_slice.tolist('날짜'),
+        'opens': df_slice.tolist('시가'),
+        'closes': df_slice.tolist('종가'),
+        'highs': df_slice.tolist('고가'),
+        'lows': df_slice.tolist('저가'),
+        'volumes': df_slice.tolist('거래량')
+    }
+    for fam, series in RESPONSE_SERIES.items():
+        if fam in families:
+            data.update((key, df_slice.tolist(col)) for key, col in series)
+        elif pad_days is not None:
+            data.update((key, [None] * pad_days) for key, _ in series)
+    return data
 
-    if need_rebuild:
-        try:
-            df_full = prepare_full_ohlc_data(code, raw_needed)
-            precomputed_stock_data[code] = df_full
-        except Exception as e:
-            logging.error("전체 데이터 준비 중 오류: %s", e)
-            return jsonify({'error': '데이터 준비 중 오류가 발생했습니다.'}), 500
-    else:
-        df_full = precomputed_stock_data[code]
+@app.route('/get_ohlc_history', methods=['POST'])
+@cached_response(_ohlc_history_key, tag_fn=_ohlc_history_tag, vary=('Accept',))
+def get_ohlc_history():
+    # 파라미터 파싱 및 검증
+    code, error = _parse_code(request.form.get('code'))
+    if error:
+        return error
+    days_str = request.form.get('days', '242').strip()
+    indicators_flags = {
+        name: request.form.get(name, 'false').strip().lower() == 'true' for name in INDICATOR_FLAG_NAMES
+    }
+    days, error = _parse_days(days_str)
+    if error:
+        return error
 
-    df_slice = df_full.tail(days)
+    requested = [name for name, on in indicators_flags.items() if on]
+    try:
+        df_slice = _load_chart_slice(code, days, requested)
+    except Exception as e:
+        logging.error("전체 데이터 준비 중 오류: %s", e)
+        return jsonify({'error': '데이터 준비 중 오류가 발생했습니다.'}), 500
+
+    if _response_format() == 'columnar':
+        return _chart_columnar(df_slice, requested)
+    return jsonify(_chart_payload(df_slice, requested, pad_days=days))
+
+# ------------------ 차트 일괄 API ------------------
+def _chart_families():
+    """families(또는 series) 파라미터(쉼표 구분 또는 반복) → 알려진 계열만, 정해진 순서로"""
+    raw = ",".join(request.values.getlist('families') + request.values.getlist('series')).lower()
+    wanted = {f.strip() for f in raw.split(',') if f.strip()}
+    return [f for f in INDICATOR_FLAG_NAMES if f in wanted]
+
+def _chart_key():
+    code = (request.values.get('code') or '').strip()
+    days = (request.values.get('days') or '242').strip()
+    if not is_valid_code(code) or not days.isdigit():
+        return None
+    return f"{code}|{int(days)}|{','.join(_chart_families())}|{_response_format()}"
+
+def _chart_tag():
+    try:
+        return refresh_latest_page((request.values.get('code') or '').strip())["version"]
+    except Exception:
+        return None
 
-    
-    response_data = {
-        'dates': list(df_slice['날짜']),
-        'opens': list(df_slice['시가']),
-        'closes': list(df_slice['종가']),
-        'highs': list(df_slice['고가']),
-        'lows': list(df_slice['저가']),
-        'volumes': list(df_slice['거래량'])
-    }
-    
-    if indicators_flags['ma']:
-        response_data.update({
-            'ma5': list(df_slice['ma5']),
-            'ma20': list(df_slice['ma20']),
-            'ma60': list(df_slice['ma60']),
-            'ma120': list(df_slice['ma120'])
-        })
-    else:
-        response_data.update({
-            'ma5': [None]*days,
-            'ma20': [None]*days,
-            'ma60': [None]*days,
-            'ma120': [None]*days
-        })
-    
-    if indicators_flags['macd']:
-        response_data.update({
-            'macd': list(df_slice['macd']),
-            'signal': list(df_slice['signal']),
-            'oscillator': list(df_slice['oscillator'])
-        })
-    else:
-        response_data.update({
-            'macd': [None]*days,
-            'signal': [None]*days,
-            'oscillator': [None]*days
-        })
-    
-    if indicators_flags['rsi']:
-        response_data.update({
-            'rsi': list(df_slice['rsi'])
-        })
-    else:
-        response_data.update({
-            'rsi': [None]*days
-        })
-    
-    if indicators_flags['stoch']:
-        response_data.update({
-            'K': list(df_slice['stoch_K']),
-            'D': list(df_slice['stoch_D'])
-        })
-    else:
-        response_data.update({
-            'K': [None]*days,
-            'D': [None]*days
-        })
-    
-    if indicators_flags['stochrsi']:
-        response_data.update({
-            'KK': list(df_slice['stochrsi_K']),
-            'DD': list(df_slice['stochrsi_D'])
-        })
-    else:
-        response_data.update({
-            'KK': [None]*days,
-            'DD': [None]*days
-        })
-    
-    if indicators_flags['williams']:
-        response_data.update({
-            'R': list(df_slice['williams'])
-        })
-    else:
-        response_data.update({
-            'R': [None]*days
-        })
-    
-    if indicators_flags['cci']:
-        response_data.update({
-            'CCI': list(df_slice['CCI'])
-        })
-    else:
-        response_data.update({
-            'CCI': [None]*days
-        })
-    
-    if indicators_flags['atr']:
-        response_data.update({
-            'ATR': list(df_slice['ATR'])
-        })
-    else:
-        response_data.update({
-            'ATR': [None]*days
-        })
-    
-    if indicators_flags['roc']:
-        response_data.update({
-            'ROC': list(df_slice['ROC'])
-        })
-    else:
-        response_data.update({
-            'ROC': [None]*days
-        })
-    
-    if indicators_flags['uo']:
-        response_data.update({
-            'UO': list(df_slice['UO'])
-        })
-    else:
-        response_data.update({
-            'UO': [None]*days
-        })
-    
-    if indicators_flags['adx']:
-        response_data.update({
-            'DI': list(df_slice['DI']),
-            'DIM': list(df_slice['DIM']),
-            'ADX': list(df_slice['ADX'])
-            # 필요시 DI, DIM 등 추가 가능
-        })
-    else:
-        response_data.update({
-            'DI': [None]*days,
-            'DIM': [None]*days,
-            'ADX': [None]*days
-        })
-    
-    if indicators_flags['bollinger']:
-        response_data.update({
-            'BB_upper': list(df_slice['BB_upper']),
-            'BB_lower': list(df_slice['BB_lower'])
-        })
-    else:
-        response_data.update({
-            'BB_upper': [None]*days,
-            'BB_lower': [None]*days
-        })
-    
-    if indicators_flags['tradingvalue']:
-        response_data.update({
-            'tradingvalue': list(df_slice['tradingvalue'])
-        })
-    else:
-        response_data.update({
-            'tradingvalue': [None]*days
-        })
-        
-    if indicators_flags['envelope']:
-        response_data.update({
-            'E_upper': list(df_slice['E_upper']),
-            'E_lower': list(df_slice['E_lower'])
-        })
-    else:
-        response_data.update({
-            'E_upper': [None]*days,
-            'E_lower': [None]*days
-        })    
-        
-    if indicators_flags['ichimoku']:
-        response_data.update({
-            'ichimoku1': list(df_slice['ichimoku1']),
-            'ichimoku2': list(df_slice['ichimoku2']),
-            'ichimoku3': list(df_slice['ichimoku3']),
-            'ichimoku4': list(df_slice['ichimoku4']),            
-            'ichimoku5': list(df_slice['ichimoku5'])            
-        })
-    else:
-        response_data.update({
-            'ichimoku1': [None]*days,
-            'ichimoku2': [None]*days,
-            'ichimoku3': [None]*days,
-            'ichimoku4': [None]*days,
-            'ichimoku5': [None]*days
-        })
-    
-    if indicators_flags['psar']:
-        response_data.update({
-            'psar': list(df_slice['psar'])          
-        })
-    else:
-        response_data.update({
-            'psar': [None]*days,
-        })
-       
-        
-    return jsonify(response_data)
+@app.route('/api/chart', methods=['GET', 'POST'])
+@cached_response(_chart_key, tag_fn=_chart_tag, vary=('Accept',))
+def api_chart():
+    """
+    종목 차트 한 화면 분량을 한 번에: OHLC 한 벌 + 요청된 계열 시리즈만(꺼진 지표의 None 채움 없음).
+    파라미터: code, days, families 또는 series (예: families=ma,psar,rsi,macd, series=rsi),
+    format=columnar(또는 Accept: application/vnd.newcandle.columnar)이면 열 단위 이진 응답
+    """
+    code, error = _parse_code(request.values.get('code'))
+    if error:
+        return error
+    days, error = _parse_days((request.values.get('days') or '242').strip())
+    if error:
+        return error
+
+    families = _chart_families()
+    try:
+        df_slice = _load_chart_slice(code, days, families)
+    except Exception as e:
+        logging.error("차트 데이터 준비 중 오류: %s", e)
+        return jsonify({'error': '데이터 준비 중 오류가 발생했습니다.'}), 500
+
+    if _response_format() == 'columnar':
+        return _chart_columnar(df_slice, families)
+    data = _chart_payload(df_slice, families)
+    data['families'] = families
+    return jsonify(data)
 
 # ------------------ 최신 거래일 API ------------------
 @app.route('/get_latest_trading_date', methods=['GET'])
@@ -634,74 +818,122 @@ def get_latest_trading_date():
         if not all_stocks:
             return jsonify({"error": "종목 리스트가 로드되지 않았습니다."}), 500
         code = all_stocks[0]["종목코드"]
-        dates, _, _, _, _, _ = get_latest_ohlc_data(code, num_days=1)
-        latest_date = dates[-1] if dates else "데이터 없음"
+        ohlc = get_latest_ohlc_data(code, num_days=1)
+        latest_date = date_int_to_str(ohlc["dates"][-1]) if ohlc["dates"].size else "데이터 없음"
         return jsonify({"latest_date": latest_date})
     except Exception as e:
         logging.exception("최신 개장일 조회 중 오류:")
         return jsonify({"error": f"최신 개장일을 가져오는 중 오류가 발생했습니다: {str(e)}"}), 500
 
+# ------------------ 크롤링 패널 캐시(stale-while-revalidate) ------------------
+# fnguide/네이버를 긁는 패널은 마지막 값을 즉시 응답하고(Age 헤더에 데이터 나이),
+# 종류별 신선도 TTL이 지나면 백그라운드에서 다시 긁어 교체한다.
+PANEL_TTLS = {
+    'financial': 12 * 3600,   # 분기 재무지표
+    'cashflow': 24 * 3600,    # 연간 현금흐름
+    'gosu': 3600,             # 기관/외인 수급
+    'sentiment': 600,         # 토론실 글
+    'wordcloud': 1800,        # 토론실 단어 빈도
+}
+PANEL_CACHE_MAX_BYTES = int(os.environ.get("PANEL_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+panel_cache = StaleWhileRevalidate(PANEL_CACHE_MAX_BYTES, name="panel_cache", workers=4)
+
+def _is_error_panel(data):
+    """
+    크롤러가 예외 대신 돌려주는 실패 모양인지:
+    빈 값, {'error': ...}(감성 지수), 모든 항목이 None뿐인 자리표시 dict(현금흐름/재무 요청 실패)
+    """
+    if not data:
+        return True
+    if isinstance(data, dict):
+        if 'error' in data:
+            return True
+        return all(isinstance(v, list) and all(x is None for x in v) for v in data.values())
+    return False
+
+def _checked_loader(kind, code, loader):
+    """실패 모양 결과를 예외로 바꿔, 마지막 정상 값을 덮어쓰지 않고 갱신 실패로 처리되게 한다."""
+    def load():
+        data = loader()
+        if _is_error_panel(data):
+            detail = data.get('error') if isinstance(data, dict) else None
+            raise ValueError(f"{kind} 패널 데이터 없음({code}){': ' + detail if detail else ''}")
+        return data
+    return load
+
+def panel_data(kind, code, loader):
+    """(데이터, 나이 초). 처음 불러오기가 실패하면(실패 모양 결과 포함) 예외를 그대로 올린다."""
+    data, age = panel_cache.get((kind, code), PANEL_TTLS[kind], _checked_loader(kind, code, loader))
+    g.panel_age = age
+    return data
+
+def panel_response(data):
+    """패널 JSON 응답: ETag/304 + Age(캐시된 데이터의 나이, 초)"""
+    body = jsonify(data).get_data()
+    resp = _conditional_response(body, 200, 'application/json', _body_etag(body))
+    resp.age = int(g.get('panel_age', 0))
+    return resp
+
 # ------------------ 재무 데이터 ------------------
-@cache.cached(timeout=3600, query_string=True)
 @app.route('/get_financial_data', methods=['GET'])
 def get_financial_data():
-    code = request.args.get('code', '').strip()
-    if not code:
-        return jsonify({'error': '종목코드가 없습니다.'}), 400
+    code, error = _parse_code(request.args.get('code'))
+    if error:
+        return error
     try:
-        data = get_financial_indicators(code, session=shared_session)
-        return jsonify(data)
+        data = panel_data('financial', code, lambda: get_financial_indicators(code, session=shared_session))
+        return panel_response(data)
     except Exception as e:
         logging.error("재무 데이터 로드 중 오류: %s", e)
         return jsonify({'error': '재무 데이터 로드 중 오류가 발생했습니다.'}), 500
 
 # ------------------ 워드 클라우드 API ------------------
-@cache.cached(timeout=3600, query_string=True)  
 @app.route('/get_wordcloud_data', methods=['GET'])
 def get_wordcloud_data():
-    code = request.args.get('code', '').strip()
-    if not code:
-        return jsonify({'error': '종목코드가 필요합니다.'}), 400
+    code, error = _parse_code(request.args.get('code'))
+    if error:
+        return error
     try:
         stock_name = stock_name_by_code.get(code)  # 없으면 None
-        frequencies = get_word_frequencies(code, num_pages=10, stock_name=stock_name)
-        return jsonify(frequencies)
+        frequencies = panel_data('wordcloud', code,
+                                 lambda: get_word_frequencies(code, num_pages=10, stock_name=stock_name))
+        return panel_response(frequencies)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     
 # ------------------ 종목 토론실 점수 API ------------------
-@cache.cached(timeout=3600, query_string=True)
 @app.route('/get_sentiment_data', methods=['GET'])
 def sentiment_data_route():
-    code = request.args.get('code', '').strip()
-    if not code:
-        return jsonify({'error': '종목코드가 필요합니다.'}), 400
-    sentiment = get_sentiment_index(code)
-    return jsonify(sentiment)
+    code, error = _parse_code(request.args.get('code'))
+    if error:
+        return error
+    try:
+        sentiment = panel_data('sentiment', code, lambda: get_sentiment_index(code))
+        return panel_response(sentiment)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 # ------------------ 기관 및 외인 점수 API ------------------
-@cache.cached(timeout=3600, query_string=True)
 @app.route('/get_gosu_index', methods=['GET'])
 def api_get_gosu_index():
-    stock_code = request.args.get('code', type=str)
-    if not stock_code:
-        return jsonify({"error": "종목 코드를 입력해주세요."}), 400
+    stock_code, error = _parse_code(request.args.get('code'))
+    if error:
+        return error
     try:
-        data = get_gosu_index(stock_code)
-        return jsonify(data)
+        data = panel_data('gosu', stock_code, lambda: get_gosu_index(stock_code))
+        return panel_response(data)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
 # ------------------ 현금흐름 API ------------------    
-@cache.cached(timeout=3600, query_string=True)
 @app.route('/get_cashflow', methods=['GET'])
 def get_cashflow():
-    code = request.args.get('code')
-    if not code:
-        return jsonify(error="code 파라미터가 필요합니다."), 400
-    # 호출 중 예외가 터져도 빈 데이터로 방어
+    code, error = _parse_code(request.args.get('code'))
+    if error:
+        return error
+    # 호출 중 예외가 터져도 빈 데이터로 방어(빈 데이터는 캐시하지 않아 다음 요청에서 다시 시도)
     try:
-        data = get_cashflow_data(code, session=shared_session)
+        data = panel_data('cashflow', code, lambda: get_cashflow_data(code, session=shared_session))
     except Exception as e:
         app.logger.error(f"get_cashflow 실패: {code} → {e}")
         data = {}  # 빈 dict로 두면 아래 .get()이 default로 동작
@@ -713,11 +945,11 @@ def get_cashflow():
         "financing": data.get('재무활동으로인한현금흐름', [None]*4)[:4]
     }
 
-    return jsonify(result)
+    return panel_response(result)
 
 # ------------------ 팩터 연구 ------------------
-@cache.cached(timeout=3600, query_string=True)
 @app.route('/factor_result', methods=['POST'])
+@cached_response(json_body_key)
 def factor_result():
 
     data = request.get_json()
@@ -750,8 +982,8 @@ def factor_result():
     })
     
 # ------------------ 캔들 연구 ------------------
-@cache.cached(timeout=3600, query_string=True)
 @app.route('/get_kospi50', methods=['GET'])
+@cached_response(lambda: "")
 def get_kospi50():
     try:
         df = get_kospi_marketcap_top(50)
@@ -763,51 +995,122 @@ def get_kospi50():
         # 안전망: 기존 전체 리스트 일부라도 반환 (원하면 변경)
         return jsonify([]), 500
 
+# (code, days, 켜진 패턴 묶음) -> (OHLC 버전, matches). 같은 봉 데이터면 탐지를 다시 돌리지 않는다.
+PATTERN_CACHE_MAX_BYTES = int(os.environ.get("PATTERN_CACHE_MAX_BYTES", 8 * 1024 * 1024))
+pattern_cache = ByteLRUCache(PATTERN_CACHE_MAX_BYTES, name="pattern_cache")
+PATTERN_GROUPS = ("bullish_reversal", "bullish_trend", "bearish_reversal", "bearish_trend")   # candle.find_patterns
+
+def _pattern_base_frame(code, base_days):
+    """가격 캐시(CompactFrame)의 마지막 base_days봉 → find_patterns 입력 DataFrame과 그 OHLC 버전"""
+    frame = get_precomputed_frame(code, base_days, [])
+    base = frame.tail(base_days)
+    df_base = pd.DataFrame({
+        "date":   base.tolist('날짜'),
+        "open":   base['시가'],
+        "high":   base['고가'],
+        "low":    base['저가'],
+        "close":  base['종가'],
+        "volume": base['거래량'],
+    })
+    return df_base, frame.attrs['ohlc_version']
+
 @app.route('/detect_patterns', methods=['POST'])
 def detect_patterns_api():
-    data = request.get_json(force=True)
-    code = data.get("code")
-    days = int(data.get("days", 30))
-    enabled = data.get("patterns", ["bullish_reversal","bullish_trend","bearish_reversal","bearish_trend"])
-
-    # 1) 충분한 베이스 확보(워밍업 여유 +60일)
-    base_days = max(days, 30) + 60
-    ohlc = request_ohlc_like_get_history(code, base_days)
+    data = request.get_json(force=True, silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'JSON 본문이 필요합니다.'}), 400
+    code, error = _parse_code(data.get("code"))
+    if error:
+        return error
+    days, error = _parse_days(str(data.get("days", 30)).strip())
+    if error:
+        return error
+    patterns = data.get("patterns", list(PATTERN_GROUPS))
+    if not isinstance(patterns, list):
+        return jsonify({'error': 'patterns는 목록이어야 합니다.'}), 400
+    enabled = [p for p in PATTERN_GROUPS if p in patterns]   # 알려진 그룹만, 정해진 순서로
+
+    key = (code, days, tuple(enabled))
+    try:
+        version = refresh_latest_page(code)["version"]
+        hit = pattern_cache.get(key)
+        if hit is not None and hit[0] == version:
+            return jsonify({ "matches": hit[1] })
+
+        # 1) 충분한 베이스 확보(워밍업 여유 +60일, 가격 캐시가 담는 최대치까지)
+        base_days = min(max(days, 30) + 60, MAX_RAW_DAYS)
+        df_base, version = _pattern_base_frame(code, base_days)
+    except Exception as e:
+        logging.error("패턴 탐지용 데이터 준비 중 오류: %s", e)
+        return jsonify({'error': '데이터 준비 중 오류가 발생했습니다.'}), 500
 
-    # 2) 베이스 DF 구성
-    df_base = pd.DataFrame({
-        "date":   ohlc["dates"],
-        "open":   ohlc["opens"],
-        "high":   ohlc["highs"],
-        "low":    ohlc["lows"],
-        "close":  ohlc["closes"],
-        "volume": ohlc["volumes"],
-    }).reset_index(drop=True)
-
-    # 3) 전체에서 탐지 → 마지막 days로만 필터/재매핑 (candle.py로 위임)
+    # 2) 전체에서 탐지 → 마지막 days로만 필터/재매핑 (candle.py로 위임)
     from candle import detect_on_base_and_remap
     matches = detect_on_base_and_remap(df_base, enabled, days)
+    pattern_cache[key] = (version, matches)
 
     return jsonify({ "matches": matches })
 
-def request_ohlc_like_get_history(code: str, days: int):
-    from flask import current_app
-    with current_app.test_request_context('/get_ohlc_history', method='POST', data={"code": code, "days": days, "ma":"false", "bollinger":"false", "psar":"false"}):
-        resp = current_app.full_dispatch_request()
-        return resp.get_json()
-
 @app.route('/get_metrics', methods=['GET'])
 def get_metrics_api():
     code = (request.args.get('code') or '').strip()
     days = int(request.args.get('days', '30'))
     minp = int(request.args.get('minp', '5'))
     latest = (request.args.get('latest') or '').strip().replace('.', '-')
-    if not code:
+    if not is_valid_code(code):
         return jsonify({"series": {}})
     return jsonify({"series": get_series_bundle(code, days=days, minp=minp, latest=latest)})
 
 
 
+# ------------------ 조건 검색 API ------------------
+@app.route('/api/screen', methods=['GET', 'POST'])
+def api_screen():
+    """
+    전 종목 조건 검색. rule 예: "rsi < 30 and close > ma120", "psar_flip_up"
+    (필드 앞에 prev_를 붙이면 직전 봉 값, screener.PRESETS의 이름도 사용 가능)
+    """
+    params = request.values
+    rule = (params.get('rule') or '').strip()
+    try:
+        limit = min(int(params.get('limit', SCREEN_MAX_RESULTS)), SCREEN_MAX_RESULTS)
+    except ValueError:
+        return jsonify({'error': '유효한 숫자를 입력하세요.'}), 400
+    if limit < 1:
+        return jsonify({'error': f'limit은 1~{SCREEN_MAX_RESULTS} 사이여야 합니다.'}), 400
+
+    table = get_screen_table()
+    if table is None:
+        return jsonify({'error': '데이터 준비 중입니다. 잠시 후 다시 시도해주세요.'}), 202
+    started = time.perf_counter()
+    try:
+        result = run_screen(table, rule, limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return jsonify(result)
+
+# ------------------ 캐시 상태 API ------------------
+@app.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    """종목 캐시별 사용량/적중/축출 카운터(워커 메모리 예산 산정용)"""
+    return jsonify({
+        "precomputed_stock_data": precomputed_stock_data.stats(),
+        "raw_ohlc_cache": raw_ohlc_cache.stats(),
+        "indicator_stream_cache": indicator_stream_cache.stats(),
+        "pattern_cache": pattern_cache.stats(),
+        "panel_cache": panel_cache.stats(),
+    })
+
+# ------------------ 계측(/metrics) ------------------
+for _stats_cache in (precomputed_stock_data, raw_ohlc_cache, indicator_stream_cache, pattern_cache, panel_cache):
+    telemetry.register_cache(_stats_cache.name, _stats_cache.stats)
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """라우트별 요청 수/지연/오류, 캐시 적중률, 외부 호출 수(Prometheus 텍스트 형식)"""
+    return app.response_class(telemetry.render(), content_type=telemetry.CONTENT_TYPE)
+
 # ------------------ 서버 실행 ------------------
 @app.route('/ping')
 def ping():
@@ -0,0 +1,246 @@
+# bench_indicators.py
+# 보조지표 성능 측정 + 정합성(골든) 비교
+#  - 합성 OHLCV(기본 250 / 2,500 / 25,000봉)로 indicators.py의 calculate_* 각각과
+#    prepare_full_ohlc_data(+ 전체 지표 계산)의 소요 시간·최대 메모리(tracemalloc)를 잰다
+#  - pandas 구현(calculate_*)을 기준값으로 삼아 numpy 엔진(indicator_engine),
+#    봉 단위 스트리밍 갱신(indicator_stream), 종목 행렬 일괄 계산 결과가 같은지 비교한다
+#    (CCI/psar는 calculate_*도 numpy 커널을 쓰므로 원래 구현 - rolling.apply MAD, ta PSARIndicator - 을 기준으로)
+#  - ta는 여기(psar 기준값)에서만 쓴다. 서비스 모듈은 ta를 import하지 않는다
+#  - 불일치가 있으면 종료 코드 1
+#
+# 사용: python bench_indicators.py [--sizes 250,2500,25000] [--repeat 5] [--out bench_output.txt] [--no-app]
+
+import sys
+import time
+import argparse
+import logging
+import tracemalloc
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import indicators as I
+import indicator_engine as E
+import indicator_stream as S
+
+DEFAULT_SIZES = (250, 2500, 25000)
+RTOL = 1e-9   # 롤링 합산 순서 차이로 생기는 반올림 오차 허용치
+ATOL = 1e-9
+
+# 엔진 출력 컬럼 → (기준 pandas 함수, 그 함수가 만드는 컬럼)
+GOLDEN = {
+    'ma5': (I.calculate_ma, 'ma5'), 'ma20': (I.calculate_ma, 'ma20'),
+    'ma60': (I.calculate_ma, 'ma60'), 'ma120': (I.calculate_ma, 'ma120'),
+    'macd': (I.calculate_macd, 'macd'), 'signal': (I.calculate_macd, 'signal'),
+    'oscillator': (I.calculate_macd, 'oscillator'),
+    'rsi': (I.calculate_rsi, 'rsi'),
+    'stoch_K': (I.calculate_stoch, '%K'), 'stoch_D': (I.calculate_stoch, '%D'),
+    'stochrsi_K': (I.calculate_stochrsi, '%K'), 'stochrsi_D': (I.calculate_stochrsi, '%D'),
+    'williams': (I.calculate_williams, '%R'),
+    'CCI': (I.calculate_cci, 'CCI'),
+    'ATR': (I.calculate_atr, 'ATR'),
+    'ROC': (I.calculate_roc, 'ROC'),
+    'UO': (I.calculate_uo, 'UO'),
+    'DI': (I.calculate_adx, '+DI'), 'DIM': (I.calculate_adx, '-DI'), 'ADX': (I.calculate_adx, 'ADX'),
+    'BB_upper': (I.calculate_bollinger, 'BU'), 'BB_lower': (I.calculate_bollinger, 'BL'),
+    'tradingvalue': (I.calculate_tradingvalue, 'tradingvalue'),
+    'E_upper': (I.calculate_envelope, 'EU'), 'E_lower': (I.calculate_envelope, 'EL'),
+    'ichimoku1': (I.calculate_ichimoku, '기준선'), 'ichimoku2': (I.calculate_ichimoku, '전환선'),
+    'ichimoku3': (I.calculate_ichimoku, '선행스팬1'), 'ichimoku4': (I.calculate_ichimoku, '선행스팬2'),
+    'ichimoku5': (I.calculate_ichimoku, '후행스팬'),
+    'psar': (I.calculate_psar, 'psar'),
+}
+CALCULATORS = list(dict.fromkeys(fn for fn, _ in GOLDEN.values()))
+
+
+# ------------------ 독립 기준값 ------------------
+# calculate_cci/calculate_psar는 엔진과 같은 numpy 커널(rolling_mad, parabolic_sar)을 쓰므로
+# 그대로 비교하면 자기 자신과 비교하는 셈이다. 커널 도입 전의 원래 구현으로 기준값을 만든다.
+def _reference_cci(df, p1=20):
+    m = (df['고가'] + df['저가'] + df['종가']) / 3
+    n = m.rolling(window=p1, min_periods=p1).mean()
+    d = m.rolling(window=p1, min_periods=p1).apply(lambda x: np.abs(x - x.mean()).mean(), raw=True)
+    return ((m - n) / (d * 0.015).replace(0, np.nan)).fillna(0)
+
+
+def _reference_psar(df, step=0.02, max_step=0.2):
+    from ta.trend import PSARIndicator
+    psar = PSARIndicator(high=df['고가'], low=df['저가'], close=df['종가'], step=step, max_step=max_step).psar()
+    return psar.fillna(0)
+
+
+INDEPENDENT_REFERENCES = {'CCI': _reference_cci, 'psar': _reference_psar}
+
+
+# ------------------ 합성 데이터 ------------------
+def make_ohlcv(n, seed=0):
+    """
+    날짜 오름차순 합성 일봉(prepare_df 전 원본 형태).
+    보합 구간(고가=저가), 거래량 0, 시가/고가/저가 0(결측) 같은 경계 상황을 일부러 섞는다.
+    """
+    rng = np.random.default_rng(seed)
+    close = np.round(10000 * np.exp(np.cumsum(rng.normal(0, 0.015, n))))
+    open_ = np.round(close * (1 + rng.normal(0, 0.01, n)))
+    high = np.maximum(open_, close) + np.round(rng.uniform(0, 200, n))
+    low = np.minimum(open_, close) - np.round(rng.uniform(0, 200, n))
+    volume = np.round(rng.uniform(1e5, 1e6, n))
+    if n >= 120:
+        flat = slice(n // 3, n // 3 + 30)
+        close[flat] = open_[flat] = high[flat] = low[flat] = close[n // 3]
+        volume[n // 3: n // 3 + 5] = 0
+        open_[n // 2] = high[n // 2 + 1] = low[n // 2 + 2] = 0
+    dates = pd.bdate_range('1950-01-02', periods=n).strftime('%Y.%m.%d')
+    return pd.DataFrame({'날짜': dates, '시가': open_, '종가': close, '고가': high, '저가': low, '거래량': volume})
+
+
+def _ohlc_arrays(df):
+    """원본 프레임 → ohlc_store 형식 배열 dict"""
+    return {
+        "dates": df['날짜'].str.replace('.', '', regex=False).astype(np.int64).to_numpy(),
+        "open": df['시가'].to_numpy(np.float64), "high": df['고가'].to_numpy(np.float64),
+        "low": df['저가'].to_numpy(np.float64), "close": df['종가'].to_numpy(np.float64),
+        "volume": df['거래량'].to_numpy(np.float64),
+    }
+
+
+# ------------------ 측정 ------------------
+def measure(fn, repeat):
+    """(최소 소요 시간 ms, 최대 추가 메모리 MiB). 시간은 tracemalloc 없이 따로 잰다."""
+    best = float('inf')
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best * 1e3, peak / (1 << 20)
+
+
+def _app_pipeline(raw):
+    """
+    app.prepare_full_ohlc_data + 전체 지표 계산을 재는 함수.
+    저장소/네트워크 조회(ensure_latest_ohlc_data)만 합성 배열로 바꿔 계산 비용만 본다.
+    """
+    import app
+    ohlc = _ohlc_arrays(raw)
+    app.ensure_latest_ohlc_data = lambda code, needed: (ohlc, 0)
+    n = len(raw)
+
+    def run():
+        df = app.prepare_full_ohlc_data('000000', n)
+        return E.attach_indicators(df)
+    return run
+
+
+def bench(sizes, repeat, with_app):
+    rows = []
+    for n in sizes:
+        raw = make_ohlcv(n)
+        prepared = I.prepare_df(raw)
+        for fn in CALCULATORS:
+            ms, mib = measure(lambda: fn(prepared.copy(), prepared=True), repeat)
+            rows.append((n, fn.__name__, ms, mib))
+        ms, mib = measure(lambda: [fn(prepared.copy(), prepared=True) for fn in CALCULATORS], repeat)
+        rows.append((n, 'calculate_* 전체(pandas)', ms, mib))
+        ms, mib = measure(lambda: E.attach_indicators(prepared), repeat)
+        rows.append((n, 'indicator_engine 전체', ms, mib))
+        if with_app:
+            ms, mib = measure(_app_pipeline(raw), repeat)
+            rows.append((n, 'prepare_full_ohlc_data + 지표', ms, mib))
+    return rows
+
+
+# ------------------ 정합성 비교 ------------------
+def golden_reference(prepared):
+    """pandas 구현으로 계산한 엔진 컬럼별 기준값"""
+    frames, out = {}, {}
+    for col, (fn, src) in GOLDEN.items():
+        if col in INDEPENDENT_REFERENCES:
+            out[col] = INDEPENDENT_REFERENCES[col](prepared).to_numpy()
+            continue
+        if fn not in frames:
+            frames[fn] = fn(prepared.copy(), prepared=True)
+        out[col] = frames[fn][src].to_numpy()
+    return out
+
+
+def _compare(label, n, expected, actual, failures):
+    for col in E.INDICATOR_COLUMNS:
+        a, b = expected[col], actual[col]
+        ok = np.isclose(a, b, rtol=RTOL, atol=ATOL, equal_nan=True)
+        if not ok.all():
+            i = int(np.flatnonzero(~ok)[0])
+            failures.append(f"{label} n={n} {col}: idx {i} 기준 {a[i]!r} / 결과 {b[i]!r} ({int((~ok).sum())}개 불일치)")
+
+
+def check_parity(sizes):
+    """불일치 목록(비어 있으면 통과)"""
+    failures = []
+    for n in sorted(set(sizes) | {10, 40, 130}):   # 워밍업보다 짧은 길이도 포함
+        prepared = I.prepare_df(make_ohlcv(n, seed=n))
+        expected = golden_reference(prepared)
+
+        # 1) numpy 엔진 전체 계산
+        full = E.attach_indicators(prepared)
+        _compare("engine", n, expected, {c: full[c].to_numpy() for c in E.INDICATOR_COLUMNS}, failures)
+
+        # 2) 마지막 몇 봉을 하나씩(장중 정정 포함) 스트리밍 갱신
+        k = min(5, n - 1)
+        cur = E.attach_indicators(prepared.iloc[:n - k].reset_index(drop=True))
+        cached = None
+        for i in range(n - k, n):
+            bar = prepared.iloc[[i]]
+            for row in (bar.assign(종가=bar['종가'] * 1.01), bar):
+                base = cur.iloc[:i]
+                df = I.prepare_df(pd.concat([base, row], ignore_index=True))
+                cur, cached = S.extend_indicator_tail(df, i, list(E.FAMILIES), cached)
+        _compare("stream", n, expected, {c: cur[c].to_numpy() for c in E.INDICATOR_COLUMNS}, failures)
+
+        # 3) 상장일이 다른 여러 종목을 행렬로 한 번에(앞쪽 NaN 구간) → 종목별 계산과 비교
+        lens = [n, max(1, n // 2), max(1, n // 5)]
+        series = [I.prepare_df(make_ohlcv(m, seed=n + m)) for m in lens]
+        cols = ('시가', '고가', '저가', '종가', '거래량')
+        mats = [E.stack_right_aligned([s[c].to_numpy() for s in series], n) for c in cols]
+        batch = E.compute_indicator_block(*mats)
+        for s, m, j in zip(series, lens, range(len(lens))):
+            single = E.compute_indicator_block(*(s[c].to_numpy() for c in cols))
+            got = {c: batch[i, j, n - m:] for i, c in enumerate(E.INDICATOR_COLUMNS)}
+            _compare(f"batch[{m}]", n, dict(zip(E.INDICATOR_COLUMNS, single)), got, failures)
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="보조지표 성능 측정 + 정합성 비교")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--out', default=None, help="결과를 이 파일에도 기록")
+    parser.add_argument('--no-app', action='store_true', help="app 임포트(데몬 시작) 없이 측정")
+    args = parser.parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+
+    warnings.filterwarnings('ignore')
+    logging.disable(logging.CRITICAL)
+
+    lines = [f"{'bars':>7}  {'대상':<32} {'time(ms)':>10} {'peak(MiB)':>10}"]
+    for n, name, ms, mib in bench(sizes, args.repeat, not args.no_app):
+        lines.append(f"{n:>7}  {name:<32} {ms:>10.2f} {mib:>10.2f}")
+    failures = check_parity(sizes)
+    lines.append("")
+    lines.append(f"정합성: {'통과' if not failures else f'불일치 {len(failures)}건'} (rtol={RTOL}, atol={ATOL})")
+    lines.extend(failures[:50])
+
+    report = "\n".join(lines)
+    print(report)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(report + "\n")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
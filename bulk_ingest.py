@@ -0,0 +1,275 @@
+# bulk_ingest.py
+# 상장 전 종목 일봉 일괄 수집 → ohlc_store(디스크) 적재
+#  - data/stock_list.csv의 모든 종목을 전역 동시성/초당 요청 수 한도 안에서 수집
+#  - 이미 저장된 구간은 건너뛰고 최신 페이지(겹칠 때까지) + 부족한 과거 페이지만 받음
+#  - 진행 상황(완료/실패 종목)을 체크포인트 파일에 남겨 중단 후 재실행 시 이어서 수행
+#  - 실패한 종목은 같은 실행 안에서 잠시 뒤 한 번 더 시도하고, 그래도 남으면 기록해 두었다가
+#    데몬이 (같은 날) 다시 시작할 때 이어서 수집한다
+#  - 저장소/체크포인트 파일 입출력은 공용 크롤러 루프를 막지 않도록 실행기 스레드에서 수행
+#  - 장외 시간(KST 05:00, 평일)에 데몬으로 돌거나 `python bulk_ingest.py`로 1회 실행
+
+import os
+import json
+import math
+import time
+import asyncio
+import logging
+import datetime
+import threading
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+from naver_crawler import submit, fetch_text, parse_sise_day
+from ohlc_store import load_ohlc, append_ohlc, combine_pages, merge_ohlc, empty_ohlc
+from profiling import profile_scope
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STOCK_LIST_FILE = os.path.join(BASE_DIR, "data", "stock_list.csv")
+STATE_FILE = os.path.join(BASE_DIR, "data", "ohlc_ingest_state.json")
+KST = ZoneInfo("Asia/Seoul")
+
+TARGET_DAYS = 370          # 종목별 확보 목표(app.MAX_RAW_DAYS와 동일)
+ROWS_PER_PAGE = 10
+MAX_PAGES = 37
+INGEST_CONCURRENCY = 8     # 동시에 처리할 종목 수
+INGEST_RATE_PER_SEC = 20   # 전체 초당 요청 수 한도
+CHECKPOINT_EVERY = 20      # N종목마다 체크포인트 저장
+PROGRESS_LOG_EVERY = 100   # N종목마다 처리량 로그
+INGEST_RETRY_DELAY_SEC = 60  # 실패 종목 재시도 전 대기
+INGEST_HOUR_KST = 5
+
+_state_lock = threading.Lock()   # 체크포인트 임시 파일을 동시에 쓰지 않도록
+
+
+class _RateLimiter:
+    """초당 rate회로 요청 간격을 고르게 벌리는 간단한 비동기 리미터"""
+
+    def __init__(self, rate):
+        self._interval = 1.0 / rate
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self._interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def load_codes():
+    """stock_list.csv의 숫자 6자리 종목코드 목록"""
+    df = pd.read_csv(STOCK_LIST_FILE, dtype={'종목코드': str})
+    codes = df['종목코드'].astype(str).str.zfill(6)
+    return [c for c in codes if c.isdigit()]
+
+
+def _load_state(run_date):
+    """같은 날짜의 실행 기록이 있으면 완료 종목 집합을 돌려준다."""
+    try:
+        with open(STATE_FILE, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get("run_date") == run_date:
+            return set(state.get("done", []))
+    except (OSError, ValueError):
+        pass
+    return set()
+
+
+def _save_state(run_date, done, failed=(), finished=False):
+    tmp = STATE_FILE + ".tmp"
+    state = {"run_date": run_date, "done": sorted(done), "failed": sorted(failed), "finished": finished}
+    with _state_lock:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp, STATE_FILE)
+
+
+def _resumable_run_date(today=None):
+    """
+    오늘 실행 중 이어서 할 것이 있으면 그 run_date, 없으면 None.
+    끝나지 못한 실행(프로세스 재시작 등)이나, 끝났지만 실패 종목이 남은 실행.
+    """
+    today = today or datetime.datetime.now(tz=KST).date().isoformat()
+    try:
+        with open(STATE_FILE, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if state.get("run_date") == today and (not state.get("finished") or state.get("failed")):
+        return today
+    return None
+
+
+async def _save_state_async(run_date, done, failed=(), finished=False):
+    """체크포인트 저장을 실행기 스레드에서(done/failed는 루프에서 계속 바뀌므로 사본을 넘긴다)"""
+    await asyncio.get_running_loop().run_in_executor(
+        None, _save_state, run_date, set(done), set(failed), finished)
+
+
+async def _fetch_page(code, page, limiter):
+    await limiter.wait()
+    url = f'https://finance.naver.com/item/sise_day.nhn?code={code}&page={page}'
+    return parse_sise_day(await fetch_text(url))
+
+
+async def _ingest_code(code, limiter):
+    """
+    한 종목을 저장소에 반영한다.
+    1) 1페이지부터 저장된 마지막 거래일과 겹칠 때까지 최신 페이지 수집
+    2) 합친 행 수가 TARGET_DAYS에 못 미치면 부족한 과거 페이지를 한꺼번에 수집
+    실패한 페이지가 있으면 저장소에 공백이 생기지 않도록 그 앞까지 연속된 구간만 저장하고
+    예외를 올려 완료로 기록하지 않는다(재개 때 다시 수집).
+    반환: 요청한 페이지 수
+    """
+    loop = asyncio.get_running_loop()
+    cur = (await loop.run_in_executor(None, load_ohlc, code)) or empty_ohlc()
+    known_last = cur["dates"][-1] if cur["dates"].size else None
+
+    parts, page, failed_page = [], 1, None
+    while page <= MAX_PAGES:
+        part = await _fetch_page(code, page, limiter)
+        if part is None:
+            failed_page = page
+            break
+        parts.append(part)
+        if known_last is not None and part["dates"].min() <= known_last:
+            break
+        page += 1
+    if not parts:
+        raise RuntimeError("1페이지 수집 실패")
+    if failed_page is not None and known_last is not None:
+        raise RuntimeError(f"{failed_page}페이지 수집 실패: 저장된 구간까지 잇지 못함")
+    requested = min(page, MAX_PAGES)
+
+    if failed_page is None:
+        merged = merge_ohlc(cur, combine_pages(parts))
+        have_pages = merged["dates"].size // ROWS_PER_PAGE
+        target_pages = min(MAX_PAGES, math.ceil(TARGET_DAYS / ROWS_PER_PAGE))
+        if have_pages < target_pages:
+            older = range(max(have_pages, page) + 1, target_pages + 1)
+            older_parts = await asyncio.gather(*(_fetch_page(code, p, limiter) for p in older))
+            requested += len(older)
+            for p, part in zip(older, older_parts):
+                if part is None:
+                    failed_page = p
+                    break
+                parts.append(part)
+
+    new = combine_pages(parts)
+    if new["dates"].size:
+        await loop.run_in_executor(None, append_ohlc, code, new)
+    if failed_page is not None:
+        raise RuntimeError(f"{failed_page}페이지 수집 실패: 그 앞까지만 저장")
+    return requested
+
+
+async def _run(codes, run_date, done):
+    limiter = _RateLimiter(INGEST_RATE_PER_SEC)
+    sem = asyncio.Semaphore(INGEST_CONCURRENCY)
+    todo = [c for c in codes if c not in done]
+    failed = set()
+    started = time.monotonic()
+    stats = {"codes": 0, "pages": 0, "retried": 0}
+    await _save_state_async(run_date, done)   # 시작 기록: 첫 체크포인트 전에 중단돼도 재개 대상이 되도록
+
+    async def one(code):
+        async with sem:
+            try:
+                pages = await _ingest_code(code, limiter)
+                stats["pages"] += pages
+                done.add(code)
+                failed.discard(code)
+            except Exception as e:
+                failed.add(code)
+                logging.warning("일괄 수집 실패 (%s): %s", code, e)
+            stats["codes"] += 1
+            n = stats["codes"]
+            if n % CHECKPOINT_EVERY == 0:
+                await _save_state_async(run_date, done, failed)
+            if n % PROGRESS_LOG_EVERY == 0:
+                elapsed = max(1e-9, time.monotonic() - started)
+                logging.info("일괄 수집 진행 %d/%d (%.1f codes/min, %d pages)",
+                             n, len(todo), n / elapsed * 60, stats["pages"])
+
+    await asyncio.gather(*(one(c) for c in todo))
+    if failed:
+        # 일시적인 차단/타임아웃이 대부분이라 잠시 쉬었다가 실패 종목만 한 번 더
+        retry = sorted(failed)
+        stats["retried"] = len(retry)
+        logging.info("일괄 수집 실패 %d종목 %d초 뒤 재시도", len(retry), INGEST_RETRY_DELAY_SEC)
+        await _save_state_async(run_date, done, failed)
+        await asyncio.sleep(INGEST_RETRY_DELAY_SEC)
+        await asyncio.gather(*(one(c) for c in retry))
+    await _save_state_async(run_date, done, failed, finished=True)
+
+    elapsed = max(1e-9, time.monotonic() - started)
+    stats.update({
+        "failed": len(failed),
+        "skipped": len(codes) - len(todo),
+        "elapsed_sec": round(elapsed, 1),
+        "codes_per_min": round(stats["codes"] / elapsed * 60, 1),
+    })
+    return stats
+
+
+def run_bulk_ingest(codes=None, run_date=None):
+    """
+    전 종목 일괄 수집을 실행하고 통계 dict를 반환한다.
+    같은 run_date로 다시 부르면 이미 끝낸 종목은 건너뛴다(중단 후 재개).
+    """
+    codes = codes if codes is not None else load_codes()
+    run_date = run_date or datetime.datetime.now(tz=KST).date().isoformat()
+    done = _load_state(run_date)
+    logging.info("=== 일괄 수집 시작 (%s, 대상 %d / 완료 %d) ===", run_date, len(codes), len(done))
+    stats = submit(_run(codes, run_date, done)).result()
+    logging.info("=== 일괄 수집 완료: %s ===", stats)
+    return stats
+
+
+def _next_kst_ingest_time(now=None):
+    """다음 평일 KST INGEST_HOUR_KST시"""
+    now = now or datetime.datetime.now(tz=KST)
+    target = now.replace(hour=INGEST_HOUR_KST, minute=0, second=0, microsecond=0)
+    if now >= target:
+        target += datetime.timedelta(days=1)
+    while target.weekday() >= 5:
+        target += datetime.timedelta(days=1)
+    return target
+
+
+def start_bulk_ingest_daemon(on_done=None):
+    """
+    평일 KST 05:00마다 전 종목 일봉을 저장소에 적재. on_done은 매 실행 후 호출(예: 조건 검색 표 갱신).
+    시작할 때 오늘 실행이 끝나지 못했거나 실패 종목이 남아 있으면 기다리지 않고 바로 이어서 수행한다.
+    실행이 예외로 끝나면 한 시간 뒤 같은 방식으로 이어서 한다.
+    """
+    def _job():
+        run_date = _resumable_run_date()
+        while True:
+            try:
+                if run_date is None:
+                    target = _next_kst_ingest_time()
+                    time.sleep(max(1, (target - datetime.datetime.now(tz=KST)).total_seconds()))
+                else:
+                    logging.info("오늘 일괄 수집 이어서 수행 (%s)", run_date)
+                with profile_scope("daemon", "bulk_ingest"):
+                    run_bulk_ingest(run_date=run_date)
+                run_date = None
+                if on_done is not None:
+                    on_done()
+            except Exception as e:
+                logging.error(f"일괄 수집 데몬 에러: {e}")
+                time.sleep(3600)
+                run_date = _resumable_run_date()
+
+    t = threading.Thread(target=_job, daemon=True)
+    t.start()
+    logging.info("일괄 수집 데몬 시작 (평일 KST %02d:00)", INGEST_HOUR_KST)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    print(run_bulk_ingest())
@@ -0,0 +1,243 @@
+# cache_utils.py
+# 캐시/동시성 보조 도구 모음
+
+import sys
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+class SingleFlight:
+    """
+    같은 키로 동시에 들어온 작업을 하나로 합친다.
+    첫 호출자(leader)가 fn을 실행하고, 그동안 들어온 호출자들은 같은 Future를 기다려
+    결과(또는 예외)를 그대로 공유한다. 작업이 끝나면 키는 즉시 비워진다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> Future
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = Future()
+                self._inflight[key] = fut
+
+        if not leader:
+            return fut.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+
+def estimate_nbytes(obj) -> int:
+    """캐시 항목의 대략적인 메모리 사용량(바이트)"""
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(estimate_nbytes(k) + estimate_nbytes(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set)):
+        return sys.getsizeof(obj) + sum(estimate_nbytes(v) for v in obj)
+    if hasattr(obj, 'nbytes'):  # CompactFrame처럼 자기 크기를 아는 객체
+        return int(obj.nbytes)
+    return sys.getsizeof(obj)
+
+
+class ByteLRUCache:
+    """
+    바이트 예산(max_bytes)이 있는 LRU 캐시. dict처럼 get/[]/in/pop/clear를 지원한다.
+    - 항목마다 estimate_nbytes로 크기를 재서 합계가 예산을 넘으면 가장 오래 안 쓴 것부터 내보낸다.
+    - 값이 제자리에서 커졌으면 resize(key)로 다시 재야 한다.
+    - stats()로 hit/miss/eviction 카운터와 현재 사용량을 확인할 수 있다.
+    """
+
+    def __init__(self, max_bytes, name="", sizeof=estimate_nbytes):
+        self.max_bytes = int(max_bytes)
+        self.name = name
+        self._sizeof = sizeof
+        self._lock = threading.Lock()
+        self._data = OrderedDict()   # key -> (value, nbytes)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def __getitem__(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                raise KeyError(key)
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def __setitem__(self, key, value):
+        nbytes = self._sizeof(value)
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (value, nbytes)
+            self._bytes += nbytes
+            self._evict_locked(keep=key)
+
+    def resize(self, key):
+        """값이 제자리에서 바뀐 항목의 크기를 다시 잰다."""
+        with self._lock:
+            item = self._data.get(key)
+        if item is None:
+            return
+        nbytes = self._sizeof(item[0])
+        with self._lock:
+            cur = self._data.get(key)
+            if cur is None or cur[0] is not item[0]:
+                return
+            self._data[key] = (cur[0], nbytes)
+            self._bytes += nbytes - cur[1]
+            self._evict_locked(keep=key)
+
+    def _evict_locked(self, keep=None):
+        # 방금 넣은 항목 하나만 남았다면 예산을 넘어도 유지(단일 항목이 예산보다 큰 경우)
+        while self._bytes > self.max_bytes and len(self._data) > 1:
+            key, (_, nbytes) = next(iter(self._data.items()))
+            if key == keep:
+                self._data.move_to_end(key)
+                key, (_, nbytes) = next(iter(self._data.items()))
+            del self._data[key]
+            self._bytes -= nbytes
+            self.evictions += 1
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, None)
+            if item is None:
+                return default
+            self._bytes -= item[1]
+            return item[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+class StaleWhileRevalidate:
+    """
+    느린 외부 조회(크롤링) 결과용 캐시. 값이 있으면 나이와 상관없이 바로 돌려주고,
+    ttl이 지났으면 백그라운드 작업자에서 키마다 한 번만 다시 불러와 교체한다.
+    - 처음 보는 키만 호출자 스레드에서 불러온다(동시 호출은 SingleFlight로 합침). 이 실패는 호출자에게 전파된다.
+    - 백그라운드 갱신이 실패하면 기존 값을 그대로 두고 retry_after초 뒤에 다시 시도한다.
+    - 저장은 ByteLRUCache(바이트 예산)에 (값, 불러온 시각)으로 한다.
+    """
+
+    def __init__(self, max_bytes, name="", workers=4, retry_after=60):
+        self.name = name
+        self.retry_after = retry_after
+        self._store = ByteLRUCache(max_bytes, name=name)
+        self._flight = SingleFlight()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"swr-{name}")
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._retry_at = {}   # key -> 다음 갱신 시도 가능 시각(monotonic)
+        self.refreshes = 0
+        self.refresh_failures = 0
+
+    def get(self, key, ttl, loader):
+        """(값, 나이 초). 값이 없으면 loader()로 불러오고, ttl이 지났으면 백그라운드 갱신을 예약한다."""
+        item = self._store.get(key)
+        if item is None:
+            return self._flight.do(key, self._load, key, loader), 0.0
+        value, loaded_at = item
+        age = time.monotonic() - loaded_at
+        if age >= ttl:
+            self._schedule(key, loader)
+        return value, age
+
+    def _load(self, key, loader):
+        value = loader()
+        self._store[key] = (value, time.monotonic())
+        return value
+
+    def _schedule(self, key, loader):
+        with self._lock:
+            if key in self._refreshing or self._retry_at.get(key, 0) > time.monotonic():
+                return
+            self._refreshing.add(key)
+        self._executor.submit(self._refresh, key, loader)
+
+    def _refresh(self, key, loader):
+        try:
+            self._load(key, loader)
+            with self._lock:
+                self.refreshes += 1
+                self._retry_at.pop(key, None)
+        except Exception as e:
+            logging.warning("%s 백그라운드 갱신 실패(%s): %s", self.name, key, e)
+            with self._lock:
+                self.refresh_failures += 1
+                self._retry_at[key] = time.monotonic() + self.retry_after
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def clear(self):
+        self._store.clear()
+
+    def stats(self):
+        out = self._store.stats()
+        with self._lock:
+            out.update(refreshes=self.refreshes, refresh_failures=self.refresh_failures,
+                       refreshing=len(self._refreshing))
+        return out
@@ -0,0 +1,108 @@
+# columnar.py
+# 차트 시리즈용 열 단위 이진 응답 형식(opt-in, ?format=columnar 또는 Accept 헤더)
+#  - 원소마다 파이썬 float/JSON 변환 없이 numpy 배열 바이트를 그대로 이어 붙인다
+#  - 배치: b'NCC1' | uint32 헤더 길이 | 헤더 JSON(UTF-8) | 0 패딩(8바이트 정렬) | 열 배열들(각 8바이트 정렬)
+#  - 헤더: {"n": 행 수, "base_date": "YYYY.MM.DD",
+#           "columns": [{"name", "dtype": "i4"|"f4"|"f8", "offset": 본문 기준 바이트, ["sig": 유효 자릿수]}],
+#           "meta": {...}}
+#  - 본문은 헤더 뒤 첫 8바이트 경계에서 시작한다. 모든 값은 little-endian. 날짜는 base_date로부터 지난 달력 일수(i4)
+#  - float64 열은 float32로 정확히 담기면 f4, 아니면(큰 거래량 등) f8로 보낸다
+#  - 원래 float32인 열은 "sig": FLOAT32_SIGNIFICANT를 붙인다 → 읽는 쪽은 그 자릿수로 반올림해 쓴다
+#    (JSON 응답의 CompactFrame.tolist와 같은 값. float64에서 좁힌 f4 열은 값이 정확하므로 반올림하지 않는다)
+
+import json
+import struct
+
+import numpy as np
+
+CONTENT_TYPE = 'application/vnd.newcandle.columnar'
+MAGIC = b'NCC1'
+_ALIGN = 8
+FLOAT32_SIGNIFICANT = 7   # float32가 정확히 담는 십진 유효 자릿수
+
+
+def _pad(n):
+    return -n % _ALIGN
+
+
+def _body_start(head_len):
+    start = len(MAGIC) + 4 + head_len
+    return start + _pad(start)
+
+
+def _dates_to_days(dates):
+    """int64 YYYYMMDD 배열 → datetime64[D] 배열"""
+    dates = np.asarray(dates, dtype=np.int64)
+    years = (dates // 10000 - 1970).astype('timedelta64[Y]')
+    months = (dates // 100 % 100 - 1).astype('timedelta64[M]')
+    days = (dates % 100 - 1).astype('timedelta64[D]')
+    return (np.datetime64('1970', 'Y') + years).astype('datetime64[M]') + months + days
+
+
+def _wire_array(arr):
+    """(보낼 배열, dtype, 유효 자릿수 또는 None)"""
+    arr = np.asarray(arr)
+    if arr.dtype == np.float32:
+        return arr.astype('<f4', copy=False), 'f4', FLOAT32_SIGNIFICANT
+    arr = arr.astype(np.float64, copy=False)
+    narrow = arr.astype('<f4')
+    if np.array_equal(narrow, arr, equal_nan=True):
+        return narrow, 'f4', None
+    return arr.astype('<f8', copy=False), 'f8', None
+
+
+def pack_columns(dates, columns, meta=None):
+    """
+    dates: int64 YYYYMMDD 배열, columns: [(이름, 배열)] (길이는 모두 len(dates)).
+    반환: 위 배치의 bytes
+    """
+    n = len(dates)
+    base = None
+    parts, specs, offset = [], [], 0
+
+    def add(name, arr, dtype, sig=None):
+        nonlocal offset
+        raw = np.ascontiguousarray(arr).tobytes()
+        spec = {"name": name, "dtype": dtype, "offset": offset}
+        if sig is not None:
+            spec["sig"] = sig
+        specs.append(spec)
+        parts.append(raw + b'\0' * _pad(len(raw)))
+        offset += len(raw) + _pad(len(raw))
+
+    if n:
+        days = _dates_to_days(dates)
+        base = days[0]
+        add('dates', (days - base).astype('<i4'), 'i4')
+    else:
+        add('dates', np.empty(0, dtype='<i4'), 'i4')
+    for name, arr in columns:
+        add(name, *_wire_array(arr))
+
+    header = {
+        "n": n,
+        "base_date": str(base).replace('-', '.') if base is not None else None,
+        "columns": specs,
+        "meta": meta or {},
+    }
+    head = json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    prefix = MAGIC + struct.pack('<I', len(head)) + head
+    prefix += b'\0' * (_body_start(len(head)) - len(prefix))
+    return prefix + b''.join(parts)
+
+
+def unpack_columns(buf):
+    """pack_columns의 역(검증/테스트용). 반환: (헤더 dict, {이름: 배열}); dates는 datetime64[D]"""
+    if buf[:4] != MAGIC:
+        raise ValueError("columnar 형식이 아닙니다.")
+    (head_len,) = struct.unpack_from('<I', buf, 4)
+    header = json.loads(buf[8:8 + head_len].decode('utf-8'))
+    body = _body_start(head_len)
+    out = {}
+    for spec in header["columns"]:
+        arr = np.frombuffer(buf, dtype='<' + spec["dtype"], count=header["n"],
+                            offset=body + spec["offset"])
+        out[spec["name"]] = arr
+    if header["base_date"] is not None:
+        out['dates'] = np.datetime64(header["base_date"].replace('.', '-')) + out['dates'].astype('timedelta64[D]')
+    return header, out
@@ -0,0 +1,129 @@
+# compact_frame.py
+# 종목별 미리 계산된 프레임의 캐시 보관 형태
+#  - 날짜(int64 YYYYMMDD) + 가격 블록(float64, 시가/종가/고가/저가/거래량) + 지표 블록(응답에 쓰는 컬럼만)
+#  - 지표 블록은 둘: 가격 단위(원) 지표·거래대금은 float64(wide), 나머지(오실레이터 등)는 float32
+#    → 가격 단위 값은 float32(유효 7자리)로 담으면 차트에 보이는 값이 바뀐다(MA 112522.8 → 112522.7969 등)
+#  - float32 지표는 float32 유효 자릿수(FLOAT32_SIGNIFICANT)로 반올림해 응답한다(columnar 해석기와 같은 규칙)
+#  - tail(days)는 배열 보기(view)만 잘라 복사하지 않는다
+#  - 새 봉 덧붙이기 등 pandas가 필요한 갱신은 to_frame() → 계산 → from_frame()으로 교체한다
+
+import numpy as np
+import pandas as pd
+
+from ohlc_store import date_int_to_str
+from columnar import FLOAT32_SIGNIFICANT
+
+PRICE_COLUMNS = ('시가', '종가', '고가', '저가', '거래량')
+_ENGINE_PRICE_ORDER = ('시가', '고가', '저가', '종가', '거래량')   # indicator_engine.PRICE_INPUTS 순서
+# float64로 담는 지표: 가격 단위(이동평균/볼린저/엔벨로프/일목/PSAR)와 거래대금
+WIDE_COLUMNS = frozenset((
+    'ma5', 'ma20', 'ma60', 'ma120', 'BB_upper', 'BB_lower', 'E_upper', 'E_lower',
+    'ichimoku1', 'ichimoku2', 'ichimoku3', 'ichimoku4', 'ichimoku5', 'psar', 'tradingvalue',
+))
+
+
+def round_significant(arr, digits=FLOAT32_SIGNIFICANT):
+    """유효 digits자리로 반올림한 float64 배열(NaN/inf는 그대로)"""
+    a = np.asarray(arr, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mag = np.floor(np.log10(np.abs(a)))
+    mag = np.where(np.isfinite(mag), mag, 0)
+    up = 10.0 ** np.maximum(digits - 1 - mag, 0)     # 소수 자리: round(a*10^k)/10^k (가장 짧은 repr)
+    down = 10.0 ** np.maximum(mag - digits + 1, 0)   # 큰 값: round(a/10^k)*10^k
+    with np.errstate(invalid='ignore'):
+        return np.round(a * up / down) * down / up
+
+
+class CompactFrame:
+    """
+    precomputed_stock_data에 넣는 읽기 전용 프레임. 만든 뒤에는 제자리에서 바꾸지 않는다.
+    attrs는 DataFrame.attrs와 같은 용도(ohlc_version, all_history, families).
+    """
+    __slots__ = ('dates', 'prices', 'block', 'wide', 'index', 'attrs')
+
+    def __init__(self, dates, prices, columns, values, attrs=None):
+        """values: (len(columns), n) 지표 값. WIDE_COLUMNS는 wide(float64), 나머지는 block(float32)에 담는다."""
+        self.dates = dates                      # int64 (YYYYMMDD)
+        self.prices = prices                    # (len(PRICE_COLUMNS), n) float64
+        narrow = [i for i, c in enumerate(columns) if c not in WIDE_COLUMNS]
+        wide = [i for i, c in enumerate(columns) if c in WIDE_COLUMNS]
+        n = len(dates)
+        self.block = np.empty((len(narrow), n), dtype=np.float32)
+        self.wide = np.empty((len(wide), n), dtype=np.float64)
+        self.index = {}                         # 컬럼 -> (블록, 행)
+        for row, i in enumerate(narrow):
+            self.block[row] = values[i]
+            self.index[columns[i]] = (self.block, row)
+        for row, i in enumerate(wide):
+            self.wide[row] = values[i]
+            self.index[columns[i]] = (self.wide, row)
+        self.attrs = dict(attrs or {})
+
+    @classmethod
+    def from_frame(cls, df, columns=()):
+        """가격 프레임(prepare_df를 거친 것)에서 columns 지표만 골라 담는다."""
+        columns = [c for c in columns if c in df.columns]
+        prices = np.ascontiguousarray(df[list(PRICE_COLUMNS)].to_numpy(dtype=np.float64).T)
+        values = [df[col].to_numpy(dtype=np.float64) for col in columns]
+        dates = df['날짜'].str.replace('.', '', regex=False).to_numpy(dtype=np.int64)
+        return cls(dates, prices, columns, values, df.attrs)
+
+    def to_frame(self):
+        """지표 계산/갱신용 DataFrame(float64)"""
+        data = {'날짜': [date_int_to_str(d) for d in self.dates]}
+        data.update(zip(PRICE_COLUMNS, self.prices))
+        data.update((c, self[c].astype(np.float64)) for c in self.index)
+        df = pd.DataFrame(data)
+        df.attrs.update(self.attrs)
+        return df
+
+    def with_columns(self, columns, values):
+        """columns 지표(values: (len(columns), n))를 더한 새 CompactFrame"""
+        keep = [c for c in self.index if c not in columns]
+        return CompactFrame(self.dates, self.prices, keep + list(columns),
+                            [self[c] for c in keep] + list(values), self.attrs)
+
+    def price_inputs(self):
+        """indicator_engine 계산 인자 순서(시가, 고가, 저가, 종가, 거래량)의 가격 배열"""
+        return tuple(self.prices[PRICE_COLUMNS.index(c)] for c in _ENGINE_PRICE_ORDER)
+
+    def __len__(self):
+        return self.dates.shape[0]
+
+    def __contains__(self, name):
+        return name in self.index or name in PRICE_COLUMNS or name == '날짜'
+
+    def __getitem__(self, name):
+        """컬럼 배열(보기). 날짜는 int64 (YYYYMMDD)"""
+        if name == '날짜':
+            return self.dates
+        if name in PRICE_COLUMNS:
+            return self.prices[PRICE_COLUMNS.index(name)]
+        block, row = self.index[name]
+        return block[row]
+
+    def tail(self, days):
+        """마지막 days행의 보기(복사 없음)"""
+        start = max(0, len(self) - days)
+        out = CompactFrame.__new__(CompactFrame)
+        out.dates = self.dates[start:]
+        out.prices = self.prices[:, start:]
+        out.block = self.block[:, start:]
+        out.wide = self.wide[:, start:]
+        out.index = {c: (out.block if block is self.block else out.wide, row)
+                     for c, (block, row) in self.index.items()}
+        out.attrs = self.attrs
+        return out
+
+    def tolist(self, name):
+        """JSON 응답용 파이썬 리스트(float32 지표는 float32 유효 자릿수로 반올림)"""
+        arr = self[name]
+        if name == '날짜':
+            return [date_int_to_str(d) for d in arr]
+        if arr.dtype == np.float32:
+            return round_significant(arr).tolist()
+        return arr.tolist()
+
+    @property
+    def nbytes(self):
+        return int(self.prices.nbytes + self.block.nbytes + self.wide.nbytes + self.dates.nbytes)
@@ -0,0 +1,423 @@
+# indicator_engine.py
+# 보조지표 계산 엔진 (numpy)
+#  - 지표를 노드 레지스트리(입력 노드, 계산 함수, 자기 lookback)로 선언하고 의존 DAG를 따라 계산
+#  - 전일 종가, TR, MA20, RSI, 14일 고가/저가 등 공통 중간값은 노드 하나로 한 번만 계산해 공유
+#  - 요청된 지표 계열(FAMILIES)에 필요한 부분 그래프만 계산하고,
+#    워밍업(첫 유효값까지 필요한 과거 봉 수)도 DAG에서 계산해 필요한 만큼만 더 받는다
+#  - 결과는 미리 잡아 둔 (출력 컬럼 수 × 봉 수) 블록에 기록
+#  - 값은 indicators.py의 calculate_* (pandas 버전)와 같다(롤링 합산 순서 차이로 인한 반올림 오차 제외)
+#  - 모든 커널은 마지막 축(시간)을 따라 계산하므로 (종목 수 × 봉 수) 가격 행렬도 그대로 받는다.
+#    상장이 늦은 종목의 앞쪽 NaN 구간은 종목별로 워밍업에서 제외된다(compute_indicator_matrices)
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from indicators import rolling_mean, rolling_std, rolling_min, rolling_max, rolling_mad, parabolic_sar
+
+
+# ------------------ 공용 커널 ------------------
+def _shift(x, k):
+    """pandas Series.shift(k)와 같은 배열(빈 자리는 NaN)"""
+    out = np.full(x.shape, np.nan)
+    if k > 0:
+        out[..., k:] = x[..., :-k]
+    elif k < 0:
+        out[..., :k] = x[..., -k:]
+    else:
+        out[...] = x
+    return out
+
+
+def _rolling_mean_min1(x, w):
+    """rolling(window=w, min_periods=1).mean() 대응(NaN은 건너뛰고 평균)"""
+    padded = np.concatenate((np.full(x.shape[:-1] + (w - 1,), np.nan), x), axis=-1)
+    view = sliding_window_view(padded, w, axis=-1)
+    cnt = np.count_nonzero(~np.isnan(view), axis=-1)
+    total = np.nansum(view, axis=-1)
+    return np.where(cnt > 0, total / np.maximum(cnt, 1), np.nan)
+
+
+def _ewm_mean(x, com, min_periods):
+    """
+    ewm(com=..., min_periods=..., adjust=False).mean() 대응.
+    재귀식이라 벡터화가 안 되므로 pandas(aggregations.ewm)와 같은 순서로 한 번 훑는다.
+    (중간 NaN은 가중치만 감쇠시키고 건너뜀 — ignore_na=False 동작)
+    2-D(종목 × 봉) 입력은 같은 재귀를 종목 축으로 벡터화해 봉 순서대로 한 번 훑는다.
+    """
+    if x.ndim == 2:
+        return _ewm_mean_2d(x, com, min_periods)
+    vals = x.tolist()
+    n = len(vals)
+    out = [np.nan] * n
+    if n == 0:
+        return np.empty(0)
+    alpha = 1. / (1. + com)
+    old_wt_factor = 1. - alpha
+    minp = max(int(min_periods), 1)
+
+    weighted = vals[0]
+    nobs = int(weighted == weighted)
+    old_wt = 1.
+    if nobs >= minp:
+        out[0] = weighted
+    for i in range(1, n):
+        cur = vals[i]
+        is_obs = cur == cur
+        nobs += is_obs
+        if weighted == weighted:
+            old_wt *= old_wt_factor
+            if is_obs:
+                if weighted != cur:
+                    weighted = old_wt * weighted + alpha * cur
+                    weighted /= (old_wt + alpha)
+                old_wt = 1.
+        elif is_obs:
+            weighted = cur
+        if nobs >= minp:
+            out[i] = weighted
+    return np.array(out)
+
+
+def _ewm_mean_2d(x, com, min_periods):
+    """_ewm_mean의 종목 축 벡터화 버전(종목별 결과가 1-D 버전과 비트 단위로 같음)"""
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] == 0:
+        return out
+    alpha = 1. / (1. + com)
+    old_wt_factor = 1. - alpha
+    minp = max(int(min_periods), 1)
+
+    weighted = x[:, 0].copy()
+    nobs = (~np.isnan(weighted)).astype(np.int64)
+    old_wt = np.ones(x.shape[0])
+    out[:, 0] = np.where(nobs >= minp, weighted, np.nan)
+    for i in range(1, x.shape[1]):
+        cur = x[:, i]
+        is_obs = ~np.isnan(cur)
+        nobs += is_obs
+        has = ~np.isnan(weighted)
+        old_wt = np.where(has, old_wt * old_wt_factor, old_wt)
+        blended = old_wt * weighted + alpha * cur
+        blended /= (old_wt + alpha)
+        weighted = np.where(has & is_obs & (weighted != cur), blended,
+                            np.where(~has & is_obs, cur, weighted))
+        old_wt = np.where(has & is_obs, 1., old_wt)
+        out[:, i] = np.where(nobs >= minp, weighted, np.nan)
+    return out
+
+
+def _span_to_com(span):
+    return (span - 1) / 2
+
+
+def _alpha_to_com(alpha):
+    return (1 - alpha) / alpha
+
+
+def _nan_if_zero(x):
+    """pandas .replace(0, np.nan) 대응"""
+    return np.where(x == 0, np.nan, x)
+
+
+# ------------------ 노드 레지스트리 ------------------
+class Node:
+    """
+    계산 그래프의 노드 하나.
+    - deps: 입력 노드 이름들(계산 함수에 이 순서로 전달)
+    - lookback: 입력이 모두 유효해진 뒤 이 노드가 유효해지기까지 필요한 추가 과거 봉 수
+    """
+    __slots__ = ('name', 'deps', 'fn', 'lookback')
+
+    def __init__(self, name, deps, fn, lookback):
+        self.name = name
+        self.deps = deps
+        self.fn = fn
+        self.lookback = lookback
+
+
+PRICE_INPUTS = ('open', 'high', 'low', 'close', 'volume')
+NODES = {name: Node(name, (), None, 0) for name in PRICE_INPUTS}
+
+
+def node(name, deps=(), lookback=0):
+    """계산 함수를 레지스트리에 노드로 등록하는 데코레이터"""
+    def deco(fn):
+        NODES[name] = Node(name, tuple(deps), fn, lookback)
+        return fn
+    return deco
+
+
+# --- 공통 중간값 ---
+node('prev_close', ['close'], 1)(lambda c: _shift(c, 1))
+node('prev_high', ['high'], 1)(lambda h: _shift(h, 1))
+node('prev_low', ['low'], 1)(lambda l: _shift(l, 1))
+# skipna max/min: 첫 봉은 전일 종가가 없으므로 고가/저가 그대로
+node('true_high', ['high', 'prev_close'])(np.fmax)
+node('true_low', ['low', 'prev_close'])(np.fmin)
+node('true_range', ['true_high', 'true_low'])(np.subtract)
+node('low14', ['low'], 13)(lambda l: rolling_min(l, 14))
+node('high14', ['high'], 13)(lambda h: rolling_max(h, 14))
+node('range14', ['high14', 'low14'])(lambda h, l: _nan_if_zero(h - l))
+
+# --- MA ---
+for _p in (5, 20, 60, 120):
+    node(f'ma{_p}', ['close'], _p - 1)(lambda c, p=_p: rolling_mean(c, p))
+
+# --- MACD ---
+node('ema12', ['close'], 11)(lambda c: _ewm_mean(c, _span_to_com(12), 12))
+node('ema26', ['close'], 25)(lambda c: _ewm_mean(c, _span_to_com(26), 26))
+node('macd', ['ema12', 'ema26'])(np.subtract)
+node('signal', ['macd'], 8)(lambda m: rolling_mean(m, 9))
+node('oscillator', ['macd', 'signal'])(np.subtract)
+
+
+# --- RSI (StochRSI와 공유) ---
+node('rsi_gain', ['close', 'prev_close'])(lambda c, pc: np.where(c - pc > 0, c - pc, 0.))
+node('rsi_loss', ['close', 'prev_close'])(lambda c, pc: -np.where(c - pc < 0, c - pc, 0.))
+node('rsi_avg_gain', ['rsi_gain'], 13)(lambda g: _ewm_mean(g, 13, 14))
+node('rsi_avg_loss', ['rsi_loss'], 13)(lambda l: _ewm_mean(l, 13, 14))
+
+
+node('rsi', ['rsi_avg_gain', 'rsi_avg_loss'])(lambda au, ad: 100 - (100 / (1 + au / _nan_if_zero(ad))))
+
+# --- Stochastic / Williams (14일 고가/저가 공유) ---
+node('stoch_K', ['close', 'low14', 'range14'])(lambda c, l, r: (c - l) / r * 100)
+node('stoch_D', ['stoch_K'])(lambda k: _rolling_mean_min1(k, 3))
+node('williams', ['close', 'high14', 'range14'])(lambda c, h, r: (h - c) / r * -100)
+
+
+# --- StochRSI ---
+@node('stochrsi_K', ['rsi'], 13)
+def _stochrsi_k(rsi):
+    lo = rolling_min(rsi, 14)
+    hi = rolling_max(rsi, 14)
+    return _rolling_mean_min1((rsi - lo) / _nan_if_zero(hi - lo) * 100, 3)
+
+
+node('stochrsi_D', ['stochrsi_K'])(lambda k: _rolling_mean_min1(k, 3))
+
+# --- CCI ---
+node('typical_price', ['high', 'low', 'close'])(lambda h, l, c: (h + l + c) / 3)
+
+
+@node('CCI', ['typical_price'], 19)
+def _cci(tp):
+    mean = rolling_mean(tp, 20)
+    return (tp - mean) / _nan_if_zero(rolling_mad(tp, 20) * 0.015)
+
+
+# --- ATR ---
+node('ATR', ['true_range'], 13)(lambda tr: _ewm_mean(tr, 13, 14))
+
+# --- ROC ---
+node('close9', ['close'], 9)(lambda c: _shift(c, 9))
+node('ROC', ['close', 'close9'])(lambda c, c9: (c - c9) / c9 * 100)
+
+
+# --- UO ---
+@node('UO', ['close', 'true_low', 'true_range'], 27)
+def _uo(c, tl, tr):
+    bp = c - tl
+    a1, a2, a3 = (rolling_mean(bp, p) / rolling_mean(tr, p) for p in (7, 14, 28))
+    return ((4 * a1 + 2 * a2 + a3) / 7) * 100
+
+
+# --- ADX ---
+_COM14 = _alpha_to_com(1 / 14)
+
+
+@node('adx_tr_smoothed', ['high', 'low', 'prev_close'], 13)
+def _adx_tr_smoothed(h, l, pc):
+    tr = np.fmax(np.fmax(h - l, np.abs(h - pc)), np.abs(l - pc))
+    return _ewm_mean(tr, _COM14, 14)
+
+
+@node('plus_dm', ['high', 'low', 'prev_high', 'prev_low'])
+def _plus_dm(h, l, ph, pl):
+    up, down = h - ph, pl - l
+    return np.where((up > down) & (up > 0), up, 0.)
+
+
+@node('minus_dm', ['high', 'low', 'prev_high', 'prev_low'])
+def _minus_dm(h, l, ph, pl):
+    up, down = h - ph, pl - l
+    return np.where((down > up) & (down > 0), down, 0.)
+
+
+node('plus_dm_smoothed', ['plus_dm'], 13)(lambda dm: _ewm_mean(dm, _COM14, 14))
+node('minus_dm_smoothed', ['minus_dm'], 13)(lambda dm: _ewm_mean(dm, _COM14, 14))
+node('DI', ['plus_dm_smoothed', 'adx_tr_smoothed'])(lambda dm, tr: 100 * (dm / tr))
+node('DIM', ['minus_dm_smoothed', 'adx_tr_smoothed'])(lambda dm, tr: 100 * (dm / tr))
+node('ADX', ['DI', 'DIM'], 13)(
+    lambda p, m: _ewm_mean(100 * (np.abs(p - m) / _nan_if_zero(p + m)), _COM14, 14))
+
+# --- Bollinger / Envelope (MA20 공유) ---
+node('std20', ['close'], 19)(lambda c: rolling_std(c, 20))
+node('BB_upper', ['ma20', 'std20'])(lambda m, s: m + 2 * s)
+node('BB_lower', ['ma20', 'std20'])(lambda m, s: m - 2 * s)
+node('E_upper', ['ma20'])(lambda m: m * (1 + 0.1))
+node('E_lower', ['ma20'])(lambda m: m * (1 - 0.1))
+
+# --- 거래대금 ---
+node('tradingvalue', ['open', 'high', 'low', 'close', 'volume'])(lambda o, h, l, c, v: (o + h + l + c) / 4 * v)
+
+# --- Ichimoku ---
+node('ichimoku1', ['high', 'low'], 25)(lambda h, l: (rolling_max(h, 26) + rolling_min(l, 26)) / 2)  # 기준선
+node('ichimoku2', ['high', 'low'], 8)(lambda h, l: (rolling_max(h, 9) + rolling_min(l, 9)) / 2)     # 전환선
+node('ichimoku3', ['ichimoku2', 'ichimoku1'], 25)(lambda conv, base: _shift((conv + base) / 2, 25))          # 선행스팬1
+node('ichimoku4', ['high', 'low'], 51 + 25)(
+    lambda h, l: _shift((rolling_max(h, 52) + rolling_min(l, 52)) / 2, 25))                       # 선행스팬2
+node('ichimoku5', ['close'])(lambda c: _shift(c, -26))  # 후행스팬(미래 쪽으로 당김 → 과거 봉 불필요)
+
+
+# --- PSAR ---
+@node('psar', ['high', 'low', 'close'], 1)
+def _psar(h, l, c):
+    return parabolic_sar(h, l, c, step=0.02, max_step=0.2)[0]
+
+
+# ------------------ 지표 계열(요청 플래그) → 출력 컬럼 ------------------
+# 컬럼 이름은 /get_ohlc_history 응답(JS)과 연동되는 이름 그대로
+FAMILIES = {
+    'ma': ('ma5', 'ma20', 'ma60', 'ma120'),
+    'macd': ('macd', 'signal', 'oscillator'),
+    'rsi': ('rsi',),
+    'stoch': ('stoch_K', 'stoch_D'),
+    'stochrsi': ('stochrsi_K', 'stochrsi_D'),
+    'williams': ('williams',),
+    'cci': ('CCI',),
+    'atr': ('ATR',),
+    'roc': ('ROC',),
+    'uo': ('UO',),
+    'adx': ('DI', 'DIM', 'ADX'),
+    'bollinger': ('BB_upper', 'BB_lower'),
+    'tradingvalue': ('tradingvalue',),
+    'envelope': ('E_upper', 'E_lower'),
+    'ichimoku': ('ichimoku1', 'ichimoku2', 'ichimoku3', 'ichimoku4', 'ichimoku5'),
+    'psar': ('psar',),
+}
+INDICATOR_COLUMNS = tuple(col for cols in FAMILIES.values() for col in cols)
+_INF_TO_ZERO = {'stoch_K', 'stoch_D', 'williams'}  # 기존 Stoch/Williams만 inf → 0
+
+
+def _resolve(targets):
+    """targets 계산에 필요한 노드를 의존 순서(위상 정렬)로 반환한다."""
+    order, seen = [], set()
+
+    def visit(name, path=()):
+        if name in seen:
+            return
+        if name in path:
+            raise ValueError(f"지표 의존성 순환: {' -> '.join(path + (name,))}")
+        for dep in NODES[name].deps:
+            visit(dep, path + (name,))
+        seen.add(name)
+        order.append(name)
+
+    for t in targets:
+        visit(t)
+    return order
+
+
+_warmup_memo = {}
+
+
+def node_warmup(name):
+    """노드가 첫 유효값을 내기까지 필요한 과거 봉 수(의존 노드 warmup 중 최대 + 자기 lookback)"""
+    w = _warmup_memo.get(name)
+    if w is None:
+        n = NODES[name]
+        w = n.lookback + max((node_warmup(d) for d in n.deps), default=0)
+        _warmup_memo[name] = w
+    return w
+
+
+def family_warmup(family):
+    return max(node_warmup(col) for col in FAMILIES[family])
+
+
+def warmup_for(families):
+    """요청된 지표 계열들에 필요한 추가 과거 봉 수(없으면 0)"""
+    return max((family_warmup(f) for f in families), default=0)
+
+
+# ------------------ 계산 ------------------
+def _leading_gap(high, low, close):
+    """종목별 첫 유효 봉(고가/저가/종가 모두 있음) 이전 구간 마스크. 그런 구간이 없으면 None."""
+    valid = ~(np.isnan(high) | np.isnan(low) | np.isnan(close))
+    gap = ~np.logical_or.accumulate(valid, axis=-1)
+    return gap if gap.any() else None
+
+
+def compute_indicator_block(open_, high, low, close, volume, columns=INDICATOR_COLUMNS, out=None, fill=True):
+    """
+    날짜 오름차순 가격 배열(prepare_df를 거친 값)로 columns에 필요한 부분 그래프만 계산해
+    (len(columns), n) float64 블록으로 반환한다. NaN은 0으로 채운다(기존 fillna(0)과 동일).
+    가격이 (종목 수, n) 행렬이면 (len(columns), 종목 수, n) 블록을 반환한다.
+    앞쪽 NaN 구간은 모든 노드에서 NaN으로 남겨, 종목별로 첫 유효 봉부터 따로 계산한 것과 같게 한다.
+    fill=False면 NaN/inf를 그대로 둔다. out을 넘기면 그 블록에 덮어쓴다.
+    """
+    values = dict(zip(PRICE_INPUTS, (np.asarray(a, dtype=np.float64) for a in (open_, high, low, close, volume))))
+    shape = values['close'].shape
+    if out is None:
+        out = np.empty((len(columns),) + shape)
+    gap = _leading_gap(values['high'], values['low'], values['close'])
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for name in _resolve(columns):
+            if name not in values:
+                nd = NODES[name]
+                v = nd.fn(*(values[d] for d in nd.deps))
+                values[name] = v if gap is None else np.where(gap, np.nan, v)
+
+    for i, col in enumerate(columns):
+        row = out[i]
+        row[...] = values[col]
+        if not fill:
+            continue
+        if col in _INF_TO_ZERO:
+            np.nan_to_num(row, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+        else:
+            np.nan_to_num(row, copy=False, nan=0.0, posinf=np.inf, neginf=-np.inf)
+    return out
+
+
+def stack_right_aligned(arrays, n):
+    """
+    길이가 다른 종목별 1-D 배열들을 마지막 봉 기준으로 맞춘 (종목 수, n) 행렬.
+    n보다 긴 배열은 최근 n개만, 짧은 배열은 앞쪽을 NaN으로 채운다.
+    """
+    out = np.full((len(arrays), n), np.nan)
+    for i, a in enumerate(arrays):
+        a = np.asarray(a, dtype=np.float64)
+        a = a[max(0, len(a) - n):]
+        if len(a):
+            out[i, n - len(a):] = a
+    return out
+
+
+def compute_indicator_matrices(open_, high, low, close, volume, columns=INDICATOR_COLUMNS, fill=False):
+    """
+    여러 종목을 한 번에 계산한다.
+    가격 인자는 (종목 수 × 봉 수) 행렬(날짜 오름차순, 최근 봉 기준 정렬; stack_right_aligned 참고).
+    반환: {컬럼: (종목 수 × 봉 수) 행렬}. 기본은 워밍업 구간을 NaN으로 남긴다(fill=False).
+    """
+    columns = tuple(columns)
+    block = compute_indicator_block(open_, high, low, close, volume, columns=columns, fill=fill)
+    return dict(zip(columns, block))
+
+
+def attach_indicators(df, columns=INDICATOR_COLUMNS):
+    """
+    prepare_df를 거친 가격 프레임(날짜/시가/종가/고가/저가/거래량)에
+    columns 지표 컬럼을 붙인 새 프레임을 반환한다.
+    """
+    columns = tuple(columns)
+    block = compute_indicator_block(
+        df['시가'].to_numpy(), df['고가'].to_numpy(), df['저가'].to_numpy(),
+        df['종가'].to_numpy(), df['거래량'].to_numpy(), columns=columns
+    )
+    ind = pd.DataFrame(block.T, columns=list(columns), index=df.index)
+    base = df.drop(columns=[c for c in columns if c in df.columns])
+    return pd.concat([base, ind], axis=1)
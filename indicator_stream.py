@@ -0,0 +1,323 @@
+# indicator_stream.py
+# 재귀형 보조지표(EMA 계열·RSI·ATR·ADX·MACD·PSAR)의 봉 단위 상태 갱신
+#  - 지표마다 마지막 EMA 값/가중치, 전일 가격, PSAR의 AF·EP 등을 담은 상태 객체를 두고
+#    새 봉 하나를 O(1)로 반영한다(370봉 전체 재계산 불필요)
+#  - 갱신 규칙은 indicator_engine의 전체 계산(= pandas ewm(adjust=False), indicators.parabolic_sar)과 같은 순서의
+#    부동소수점 연산이라, 같은 시작점에서 시드하면 전체 재계산과 값이 일치한다
+#  - 상태는 to_dict()/from_dict()로 JSON 직렬화할 수 있다
+
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from indicator_engine import (
+    FAMILIES, PRICE_INPUTS, compute_indicator_block, family_warmup,
+    _INF_TO_ZERO, _span_to_com, _alpha_to_com
+)
+from indicators import psar_initial_state, psar_step
+
+NAN = float('nan')
+
+
+def _div(a, b):
+    """numpy float 나눗셈과 같은 결과(0으로 나누면 inf/NaN, 예외 없음)"""
+    if b == 0:
+        if a == 0 or a != a:
+            return NAN
+        return math.copysign(math.inf, a) * math.copysign(1., b)
+    return a / b
+
+
+def _fmax(a, b):
+    """np.fmax: 한쪽이 NaN이면 다른 쪽"""
+    if a != a:
+        return b
+    if b != b:
+        return a
+    return a if a >= b else b
+
+
+def _fmin(a, b):
+    if a != a:
+        return b
+    if b != b:
+        return a
+    return a if a <= b else b
+
+
+class EwmState:
+    """ewm(com, min_periods, adjust=False).mean()의 진행 상태(pandas aggregations.ewm과 같은 갱신식)"""
+    __slots__ = ('com', 'min_periods', 'weighted', 'old_wt', 'nobs')
+
+    def __init__(self, com, min_periods, weighted=NAN, old_wt=1., nobs=0):
+        self.com = com
+        self.min_periods = max(int(min_periods), 1)
+        self.weighted = weighted
+        self.old_wt = old_wt
+        self.nobs = nobs
+
+    def update(self, cur):
+        alpha = 1. / (1. + self.com)
+        is_obs = cur == cur
+        if self.nobs == 0 and self.weighted != self.weighted:
+            # 첫 관측 전(시작 또는 앞쪽 NaN 구간)
+            if is_obs:
+                self.weighted = cur
+                self.nobs = 1
+                self.old_wt = 1.
+        else:
+            self.nobs += is_obs
+            if self.weighted == self.weighted:
+                self.old_wt *= 1. - alpha
+                if is_obs:
+                    if self.weighted != cur:
+                        w = self.old_wt * self.weighted + alpha * cur
+                        w /= (self.old_wt + alpha)
+                        self.weighted = w
+                    self.old_wt = 1.
+            elif is_obs:
+                self.weighted = cur
+        return self.weighted if self.nobs >= self.min_periods else NAN
+
+    def to_dict(self):
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(**d)
+
+
+# ------------------ 지표 계열별 상태 ------------------
+class _Stream:
+    """계열별 상태의 공통 직렬화. columns는 FAMILIES[family] 순서의 출력."""
+    family = None
+    _ewm_fields = ()
+    _plain_fields = ()
+
+    def to_dict(self):
+        d = {"family": self.family}
+        for f in self._ewm_fields:
+            d[f] = getattr(self, f).to_dict()
+        for f in self._plain_fields:
+            v = getattr(self, f)
+            d[f] = list(v) if isinstance(v, deque) else v
+        return d
+
+    @classmethod
+    def from_dict(cls, d):
+        obj = cls.__new__(cls)
+        for f in cls._ewm_fields:
+            setattr(obj, f, EwmState.from_dict(d[f]))
+        for f in cls._plain_fields:
+            setattr(obj, f, d[f])
+        obj._restore()
+        return obj
+
+    def _restore(self):
+        pass
+
+    def copy(self):
+        return type(self).from_dict(self.to_dict())
+
+
+class MacdStream(_Stream):
+    family = 'macd'
+    _ewm_fields = ('ema12', 'ema26')
+    _plain_fields = ('window',)
+
+    def __init__(self):
+        self.ema12 = EwmState(_span_to_com(12), 12)
+        self.ema26 = EwmState(_span_to_com(26), 26)
+        self.window = deque(maxlen=9)  # signal(9일 단순평균)용 최근 MACD
+
+    def _restore(self):
+        self.window = deque(self.window, maxlen=9)
+
+    def update(self, o, h, l, c, v):
+        macd = self.ema12.update(c) - self.ema26.update(c)
+        self.window.append(macd)
+        signal = float(np.mean(self.window)) if len(self.window) == 9 else NAN
+        return macd, signal, macd - signal
+
+
+class RsiStream(_Stream):
+    family = 'rsi'
+    _ewm_fields = ('gain', 'loss')
+    _plain_fields = ('prev_close',)
+
+    def __init__(self):
+        self.gain = EwmState(13, 14)
+        self.loss = EwmState(13, 14)
+        self.prev_close = NAN
+
+    def update(self, o, h, l, c, v):
+        delta = c - self.prev_close
+        self.prev_close = c
+        au = self.gain.update(delta if delta > 0 else 0.)
+        ad = self.loss.update(-(delta if delta < 0 else 0.))
+        ad = NAN if ad == 0 else ad
+        return (100 - _div(100, 1 + _div(au, ad))),
+
+
+class AtrStream(_Stream):
+    family = 'atr'
+    _ewm_fields = ('tr',)
+    _plain_fields = ('prev_close',)
+
+    def __init__(self):
+        self.tr = EwmState(13, 14)
+        self.prev_close = NAN
+
+    def update(self, o, h, l, c, v):
+        tr = _fmax(h, self.prev_close) - _fmin(l, self.prev_close)
+        self.prev_close = c
+        return self.tr.update(tr),
+
+
+class AdxStream(_Stream):
+    family = 'adx'
+    _ewm_fields = ('tr', 'plus_dm', 'minus_dm', 'dx')
+    _plain_fields = ('prev_high', 'prev_low', 'prev_close')
+
+    def __init__(self):
+        com = _alpha_to_com(1 / 14)
+        self.tr = EwmState(com, 14)
+        self.plus_dm = EwmState(com, 14)
+        self.minus_dm = EwmState(com, 14)
+        self.dx = EwmState(com, 14)
+        self.prev_high = self.prev_low = self.prev_close = NAN
+
+    def update(self, o, h, l, c, v):
+        pc = self.prev_close
+        tr = _fmax(_fmax(h - l, abs(h - pc)), abs(l - pc))
+        up, down = h - self.prev_high, self.prev_low - l
+        pdm = up if (up > down and up > 0) else 0.
+        mdm = down if (down > up and down > 0) else 0.
+        self.prev_high, self.prev_low, self.prev_close = h, l, c
+
+        tr_s = self.tr.update(tr)
+        di = 100 * _div(self.plus_dm.update(pdm), tr_s)
+        dim = 100 * _div(self.minus_dm.update(mdm), tr_s)
+        total = di + dim
+        dx = 100 * _div(abs(di - dim), NAN if total == 0 else total)
+        return di, dim, self.dx.update(dx)
+
+
+class PsarStream(_Stream):
+    """indicators.psar_step(step=0.02, max_step=0.2)의 봉 단위 상태"""
+    family = 'psar'
+    _plain_fields = ('state',)
+    STEP = 0.02
+    MAX_STEP = 0.2
+
+    def __init__(self):
+        self.state = psar_initial_state(step=self.STEP)
+
+    def _restore(self):
+        self.state = dict(self.state)  # copy()가 원본 상태를 공유하지 않도록
+
+    def update(self, o, h, l, c, v):
+        return psar_step(self.state, h, l, c, self.STEP, self.MAX_STEP),
+
+
+STREAM_CLASSES = {cls.family: cls for cls in (MacdStream, RsiStream, AtrStream, AdxStream, PsarStream)}
+
+
+def stream_from_dict(d):
+    return STREAM_CLASSES[d["family"]].from_dict(d)
+
+
+# ------------------ 프레임 꼬리 갱신 ------------------
+def _rows(prices, start, stop):
+    return zip(*(prices[k][start:stop].tolist() for k in PRICE_INPUTS))
+
+
+def seed_stream(family, prices, stop):
+    """prices(배열 dict)의 0..stop-1 봉을 반영한 상태를 만든다."""
+    st = STREAM_CLASSES[family]()
+    for bar in _rows(prices, 0, stop):
+        st.update(*bar)
+    return st
+
+
+def advance_streams(states, families, prices, start):
+    """
+    states(start-1번째 봉까지 반영된 계열별 상태; 없으면 시드)를 이용해
+    start..끝 봉의 스트리밍 계열 출력을 계산한다.
+    반환: ({컬럼: 값 배열(len = n - start)}, 마지막 봉 직전까지 반영된 새 상태 dict)
+    마지막 봉은 장중에 다시 바뀔 수 있으므로 상태에는 넣지 않는다(다음 갱신 때 다시 계산).
+    """
+    n = len(prices['close'])
+    out, committed = {}, {}
+    for fam in families:
+        st = states.get(fam)
+        st = st.copy() if st is not None else seed_stream(fam, prices, start)
+        vals = []
+        for idx, bar in enumerate(_rows(prices, start, n), start):
+            if idx == n - 1:
+                committed[fam] = st.copy()
+            vals.append(st.update(*bar))
+        if start >= n:
+            committed[fam] = st
+        for col, series in zip(FAMILIES[fam], zip(*vals) if vals else [()] * len(FAMILIES[fam])):
+            out[col] = np.array(series, dtype=np.float64)
+    return out, committed
+
+
+# 고정 길이 창(롤링/과거 쪽 shift)만 쓰는 계열: 마지막 봉 값은 직전 warmup개 봉만 보면 정확히 다시 계산된다.
+# stochrsi(RSI 재귀에 의존)와 ichimoku(후행스팬이 미래 쪽 shift)는 새 봉이 앞쪽 값도 바꾸므로 전체 재계산.
+TAIL_LOCAL_FAMILIES = frozenset(FAMILIES) - frozenset(STREAM_CLASSES) - {'stochrsi', 'ichimoku'}
+
+_PRICE_COLUMNS = {'open': '시가', 'high': '고가', 'low': '저가', 'close': '종가', 'volume': '거래량'}
+
+
+def extend_indicator_tail(df, start, families, cached=None):
+    """
+    prepare_df를 거친 가격+지표 프레임 df의 start행부터(새 봉 또는 장중에 바뀐 마지막 봉)
+    families 지표 칸을 채운다. 앞쪽 행의 지표 값은 그대로 둔다.
+    - 재귀형 계열: cached 상태(start-1행까지 반영)에서 이어서 봉마다 O(1) 갱신
+    - 고정 창 계열: 꼬리 warmup+새 봉 구간만 다시 계산
+    - 나머지: 전체 재계산
+    cached: 이전 호출이 돌려준 {"date", "states"} 또는 None
+    반환: (df, 새 cached)
+    """
+    n = len(df)
+    prices = {k: df[col].to_numpy(dtype=np.float64) for k, col in _PRICE_COLUMNS.items()}
+    dates = df['날짜'].to_numpy()
+    values = {}
+
+    states = {}
+    if cached and start > 0 and cached["date"] == dates[start - 1]:
+        states = cached["states"]
+    stream_fams = [f for f in families if f in STREAM_CLASSES]
+    streamed, committed = advance_streams(states, stream_fams, prices, start)
+    for col, arr in streamed.items():
+        values[col] = arr if col in _INF_TO_ZERO else np.nan_to_num(arr, nan=0.0, posinf=np.inf, neginf=-np.inf)
+
+    local = [f for f in families if f in TAIL_LOCAL_FAMILIES]
+    if local:
+        lo = max(0, start - max(family_warmup(f) for f in local))
+        cols = [c for f in local for c in FAMILIES[f]]
+        block = compute_indicator_block(*(prices[k][lo:] for k in PRICE_INPUTS), columns=cols)
+        values.update(zip(cols, block[:, start - lo:]))
+
+    columns = {}
+    for col, arr in values.items():
+        full = df[col].to_numpy(dtype=np.float64, copy=True) if col in df.columns else np.zeros(n)
+        full[start:] = arr
+        columns[col] = full
+
+    rest = [f for f in families if f not in STREAM_CLASSES and f not in TAIL_LOCAL_FAMILIES]
+    full_cols = [c for f in rest for c in FAMILIES[f]]
+    if full_cols:
+        block = compute_indicator_block(*(prices[k] for k in PRICE_INPUTS), columns=full_cols)
+        columns.update(zip(full_cols, block))
+
+    if columns:
+        df = df.drop(columns=[c for c in columns if c in df.columns])
+        df = pd.concat([df, pd.DataFrame(columns, index=df.index)], axis=1)
+
+    new_cached = {"date": dates[n - 2], "states": committed} if n >= 2 else None
+    return df, new_cached
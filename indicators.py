@@ -1,7 +1,7 @@
 import numpy as np
 import pandas as pd
 import logging
-from ta.trend import PSARIndicator
+from numpy.lib.stride_tricks import sliding_window_view
 from concurrent.futures import ThreadPoolExecutor
 
 # 로깅 설정
@@ -38,6 +38,180 @@ def prepare_df(df):
     """지표 계산 전에 한 번만 호출"""
     return _prepare_df(df)
 
+# ------------------ 롤링 커널 (numpy) ------------------
+# rolling(window=w, min_periods=w).<집계>()와 같은 값을 내는 배열 함수들.
+# 창을 복사 없이 (n-w+1, w) 보기로 만든 뒤 축 하나로 한 번에 집계한다.
+# 앞쪽 w-1개와 NaN이 낀 창은 NaN.
+
+def rolling_window(x, w):
+    """길이 w인 창들의 (n-w+1, w) 보기(복사 없음). n < w면 빈 보기."""
+    x = np.asarray(x, dtype=np.float64)
+    if x.shape[-1] < w:
+        return np.empty(x.shape[:-1] + (0, w))
+    return sliding_window_view(x, w, axis=-1)
+
+def rolling_reduce(func, x, w, **kwargs):
+    """창마다 func(창, axis=-1)을 적용한 결과를 원래 길이로 맞춰 반환"""
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] >= w:
+        func(rolling_window(x, w), axis=-1, out=out[..., w - 1:], **kwargs)
+    return out
+
+def rolling_mean(x, w):
+    return rolling_reduce(np.mean, x, w)
+
+def rolling_std(x, w, ddof=1):
+    return rolling_reduce(np.std, x, w, ddof=ddof)
+
+def rolling_min(x, w):
+    return rolling_reduce(np.min, x, w)
+
+def rolling_max(x, w):
+    return rolling_reduce(np.max, x, w)
+
+def rolling_mad(x, w):
+    """
+    평균절대편차 mean(|x - mean(x)|).
+    rolling(...).apply(lambda x: np.mean(np.abs(x - np.mean(x))), raw=True)와 비트 단위로 같은 값.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] >= w:
+        view = rolling_window(x, w)
+        out[..., w - 1:] = np.mean(np.abs(view - np.mean(view, axis=-1, keepdims=True)), axis=-1)
+    return out
+
+# ------------------ Parabolic SAR (numpy) ------------------
+# ta.trend.PSARIndicator._run과 같은 규칙·같은 연산 순서(값이 동일).
+# 상태(추세 방향, AF, 극값, 직전 PSAR, 1·2봉 전 고가/저가)를 dict로 들고 있어
+# 이어서 계산(증분 갱신)하거나, 종목 축으로 벡터화해 여러 종목을 한 번에 계산할 수 있다.
+# 고가/저가/종가 중 NaN이 있는 봉(상장 전 등)은 상태를 바꾸지 않고 NaN을 낸다.
+PSAR_STATE_KEYS = ('i', 'up_trend', 'af', 'up_trend_high', 'down_trend_low',
+                   'psar', 'high1', 'high2', 'low1', 'low2')
+
+def psar_initial_state(n_symbols=None, step=0.02):
+    """n_symbols가 None이면 단일 종목(스칼라) 상태, 아니면 종목별 배열 상태"""
+    if n_symbols is None:
+        state = dict.fromkeys(PSAR_STATE_KEYS, np.nan)
+        state.update(i=0, up_trend=True, af=step)
+        return state
+    state = {k: np.full(n_symbols, np.nan) for k in PSAR_STATE_KEYS}
+    state.update(i=np.zeros(n_symbols, dtype=np.int64), up_trend=np.ones(n_symbols, dtype=bool),
+                 af=np.full(n_symbols, step))
+    return state
+
+def psar_step(state, high, low, close, step=0.02, max_step=0.2):
+    """단일 종목 상태에 봉 하나를 반영하고(제자리 갱신) 그 봉의 PSAR을 반환"""
+    if high != high or low != low or close != close:
+        return np.nan
+    st = state
+    if st['i'] == 0:
+        st['up_trend_high'], st['down_trend_low'] = high, low
+    if st['i'] < 2:
+        psar = close  # 처음 두 봉은 종가
+    elif st['up_trend']:
+        psar = st['psar'] + st['af'] * (st['up_trend_high'] - st['psar'])
+        if low < psar:
+            st['up_trend'] = False
+            psar = st['up_trend_high']
+            st['down_trend_low'] = low
+            st['af'] = step
+        else:
+            if high > st['up_trend_high']:
+                st['up_trend_high'] = high
+                st['af'] = min(st['af'] + step, max_step)
+            if st['low2'] < psar:
+                psar = st['low2']
+            elif st['low1'] < psar:
+                psar = st['low1']
+    else:
+        psar = st['psar'] - st['af'] * (st['psar'] - st['down_trend_low'])
+        if high > psar:
+            st['up_trend'] = True
+            psar = st['down_trend_low']
+            st['up_trend_high'] = high
+            st['af'] = step
+        else:
+            if low < st['down_trend_low']:
+                st['down_trend_low'] = low
+                st['af'] = min(st['af'] + step, max_step)
+            if st['high2'] > psar:
+                psar = st['high2']
+            elif st['high1'] > psar:
+                psar = st['high1']
+    st['i'] += 1
+    st['psar'] = psar
+    st['high2'], st['high1'] = st['high1'], high
+    st['low2'], st['low1'] = st['low1'], low
+    return psar
+
+def _psar_step_batch(st, high, low, close, step, max_step):
+    """종목별 배열 상태에 봉 하나(종목 수 길이 벡터)를 반영. psar_step을 종목 축으로 벡터화한 것."""
+    valid = ~(np.isnan(high) | np.isnan(low) | np.isnan(close))
+    first = valid & (st['i'] == 0)
+    uth = np.where(first, high, st['up_trend_high'])
+    dtl = np.where(first, low, st['down_trend_low'])
+    af, up, prev = st['af'], st['up_trend'], st['psar']
+
+    with np.errstate(invalid='ignore'):
+        # 상승 추세
+        up_psar = prev + af * (uth - prev)
+        up_rev = low < up_psar
+        up_ext = high > uth
+        up_keep = np.where(st['low2'] < up_psar, st['low2'], np.where(st['low1'] < up_psar, st['low1'], up_psar))
+        # 하락 추세
+        dn_psar = prev - af * (prev - dtl)
+        dn_rev = high > dn_psar
+        dn_ext = low < dtl
+        dn_keep = np.where(st['high2'] > dn_psar, st['high2'], np.where(st['high1'] > dn_psar, st['high1'], dn_psar))
+
+    af_next = np.minimum(af + step, max_step)
+    psar = np.where(up, np.where(up_rev, uth, up_keep), np.where(dn_rev, dtl, dn_keep))
+    new_af = np.where(up, np.where(up_rev, step, np.where(up_ext, af_next, af)),
+                      np.where(dn_rev, step, np.where(dn_ext, af_next, af)))
+    new_uth = np.where(up, np.where(~up_rev & up_ext, high, uth), np.where(dn_rev, high, uth))
+    new_dtl = np.where(up, np.where(up_rev, low, dtl), np.where(~dn_rev & dn_ext, low, dtl))
+    new_up = np.where(up, ~up_rev, dn_rev)
+
+    early = st['i'] < 2
+    psar = np.where(early, close, psar)
+    trend = valid & ~early
+    st['af'] = np.where(trend, new_af, af)
+    st['up_trend'] = np.where(trend, new_up, up)
+    st['up_trend_high'] = np.where(trend, new_uth, uth)
+    st['down_trend_low'] = np.where(trend, new_dtl, dtl)
+    st['psar'] = np.where(valid, psar, prev)
+    st['high2'] = np.where(valid, st['high1'], st['high2'])
+    st['high1'] = np.where(valid, high, st['high1'])
+    st['low2'] = np.where(valid, st['low1'], st['low2'])
+    st['low1'] = np.where(valid, low, st['low1'])
+    st['i'] = st['i'] + valid
+    return np.where(valid, psar, np.nan)
+
+def parabolic_sar(high, low, close, step=0.02, max_step=0.2, state=None):
+    """
+    Parabolic SAR 배열 계산.
+    - 1-D(봉) 입력은 단일 종목, 2-D(종목 × 봉) 입력은 종목 축으로 벡터화해 한 번에 계산
+    - state를 넘기면 그 상태에서 이어서 계산한다(증분 갱신). 넘긴 dict는 제자리에서 갱신된다.
+    반환: (psar 배열(입력과 같은 모양), 마지막 봉까지 반영된 상태)
+    """
+    high, low, close = (np.asarray(a, dtype=np.float64) for a in (high, low, close))
+    if high.ndim == 1:
+        st = state if state is not None else psar_initial_state(step=step)
+        out = [psar_step(st, h, l, c, step, max_step)
+               for h, l, c in zip(high.tolist(), low.tolist(), close.tolist())]
+        return np.array(out, dtype=np.float64), st
+    st = state if state is not None else psar_initial_state(high.shape[0], step)
+    out = np.empty(high.shape)
+    for t in range(high.shape[1]):
+        out[:, t] = _psar_step_batch(st, high[:, t], low[:, t], close[:, t], step, max_step)
+    return out, st
+
+def _rolling_series(kernel, s, w):
+    """Series에 커널을 적용해 같은 인덱스의 Series로 반환"""
+    return pd.Series(kernel(s.to_numpy(dtype=np.float64), w), index=s.index)
+
 # 시작
 def calculate_ma(df, p1=5, p2=20, p3=60, p4=120, prepared=False):
     """
@@ -105,8 +279,8 @@ def calculate_stoch(df, p1=14, p2=3, prepared=False):
     if not prepared:
         df = _prepare_df(df)
     try:
-        df['L'] = df['저가'].rolling(window=p1, min_periods=p1).min()
-        df['H'] = df['고가'].rolling(window=p1, min_periods=p1).max()
+        df['L'] = _rolling_series(rolling_min, df['저가'], p1)
+        df['H'] = _rolling_series(rolling_max, df['고가'], p1)
         # 분모가 0이 되는 경우 np.nan 처리
         denom = (df['H'] - df['L']).replace(0, np.nan)
         df['%K'] = (df['종가'] - df['L']) / denom * 100
@@ -130,8 +304,8 @@ def calculate_stochrsi(df, p1=14, p2=14, p3=3, prepared=False):
         Ad = (-delta.where(delta < 0, 0)).ewm(com=p1-1, min_periods=p1, adjust=False).mean()
         rs = Au / Ad.replace(0, np.nan)
         df['rsi'] = 100 - (100 / (1 + rs))
-        df['L'] = df['rsi'].rolling(window=p2, min_periods=p2).min()
-        df['H'] = df['rsi'].rolling(window=p2, min_periods=p2).max()
+        df['L'] = _rolling_series(rolling_min, df['rsi'], p2)
+        df['H'] = _rolling_series(rolling_max, df['rsi'], p2)
         denom = (df['H'] - df['L']).replace(0, np.nan)
         df['%K'] = (df['rsi'] - df['L']) / denom * 100
         df['%K'] = df['%K'].rolling(window=p3, min_periods=1).mean()
@@ -149,8 +323,8 @@ def calculate_williams(df, p1=14, prepared=False):
     if not prepared:
         df = _prepare_df(df)
     try:
-        df['L'] = df['저가'].rolling(window=p1, min_periods=p1).min()
-        df['H'] = df['고가'].rolling(window=p1, min_periods=p1).max()
+        df['L'] = _rolling_series(rolling_min, df['저가'], p1)
+        df['H'] = _rolling_series(rolling_max, df['고가'], p1)
         denom = (df['H'] - df['L']).replace(0, np.nan)
         df['%R'] = (df['H'] - df['종가']) / denom * -100
     except Exception as e:
@@ -169,9 +343,7 @@ def calculate_cci(df, p1=20, prepared=False):
     try:
         df['M'] = (df['고가'] + df['저가'] + df['종가']) / 3
         df['N'] = df['M'].rolling(window=p1, min_periods=p1).mean()
-        df['D'] = df['M'].rolling(window=p1, min_periods=p1).apply(
-            lambda x: np.mean(np.abs(x - np.mean(x))), raw=True
-        )
+        df['D'] = _rolling_series(rolling_mad, df['M'], p1)
         denominator = (df['D'] * 0.015).replace(0, np.nan)
         df['CCI'] = (df['M'] - df['N']) / denominator
     except Exception as e:
@@ -347,14 +519,14 @@ def calculate_ichimoku(df, p1=26, p2=9, prepared=False):
     try:         
         # 1) 전환선 (Conversion Line)
         df['전환선'] = (
-            df['고가'].rolling(window=p2, min_periods=p2).max() +
-            df['저가'].rolling(window=p2, min_periods=p2).min()
+            _rolling_series(rolling_max, df['고가'], p2) +
+            _rolling_series(rolling_min, df['저가'], p2)
             ) / 2
 
         # 2) 기준선 (Base Line)
         df['기준선'] = (
-            df['고가'].rolling(window=p1, min_periods=p1).max() +
-            df['저가'].rolling(window=p1, min_periods=p1).min()
+            _rolling_series(rolling_max, df['고가'], p1) +
+            _rolling_series(rolling_min, df['저가'], p1)
             ) / 2
 
         # 3) 선행스팬1 (Leading Span A) = (전환선 + 기준선) / 2
@@ -363,8 +535,8 @@ def calculate_ichimoku(df, p1=26, p2=9, prepared=False):
 
         # 4) 선행스팬2 (Leading Span B) = (52일간 최고 + 52일간 최저) / 2
         df['선행스팬2'] = (
-                df['고가'].rolling(window=p1*2, min_periods=p1*2).max() +
-                df['저가'].rolling(window=p1*2, min_periods=p1*2).min()
+                _rolling_series(rolling_max, df['고가'], p1*2) +
+                _rolling_series(rolling_min, df['저가'], p1*2)
             ) / 2
         df['선행스팬2'] = df['선행스팬2'].shift(p1-1)        
             
@@ -388,15 +560,8 @@ def calculate_psar(df, step=0.02, max_step=0.2, prepared=False):
         df = _prepare_df(df)
     try:
 
-        psar_indicator = PSARIndicator(
-            high=df['고가'],
-            low=df['저가'],
-            close=df['종가'],
-            step=step,
-            max_step=max_step
-        )
-        # psar() 메서드만으로도 모든 시점의 PSAR 값을 얻어 연속된 점 형태로 표시 가능
-        df['psar'] = psar_indicator.psar()
+        # 모든 시점의 PSAR 값을 얻어 연속된 점 형태로 표시 가능
+        df['psar'] = parabolic_sar(df['고가'], df['저가'], df['종가'], step, max_step)[0]
 
     except Exception as e:
         logging.error("psar 계산 오류: %s", e)
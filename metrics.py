@@ -7,6 +7,10 @@ import numpy as np
 import pandas as pd
 import requests
 
+from naver_crawler import parse_sise_day
+from ohlc_store import combine_pages, date_int_to_str
+from profiling import profile_scope
+
 # optional yahoo
 try:
     import yfinance as yf
@@ -260,17 +264,14 @@ def _naver_hist_close(code6: str, pages: int = 40, pause: float = 0.12) -> pd.Da
     for p in range(1, pages + 1):
         url  = f"https://finance.naver.com/item/sise_day.naver?code={code6}&page={p}"
         html = requests.get(url, headers=_NAVER_UA, timeout=8).text
-        dfs  = pd.read_html(html, header=0)
-        if not dfs: break
-        df = dfs[0].dropna(subset=["날짜"])
-        df["종가"] = df["종가"].astype(str).str.replace(",", "").astype(float)
-        df["날짜"] = pd.to_datetime(df["날짜"])
-        out.append(df[["날짜", "종가"]])
+        parsed = parse_sise_day(html)
+        if parsed is None: break
+        out.append(parsed)
         time.sleep(pause)
     if not out:
         return pd.DataFrame()
-    d = pd.concat(out, ignore_index=True).sort_values("날짜")
-    return pd.DataFrame({"date": d["날짜"].dt.strftime("%Y.%m.%d"), "close": d["종가"].astype(float)})
+    d = combine_pages(out)   # date-sorted, de-duplicated arrays
+    return pd.DataFrame({"date": [date_int_to_str(x) for x in d["dates"]], "close": d["close"]})
 
 def _etf_close_series(candidates_krx: List[str]) -> Optional[pd.DataFrame]:
     # 1) try Yahoo
@@ -329,12 +330,13 @@ def start_metrics_snapshot_daemon(days: int = 100):
                 # '종목코드' 컬럼 기준으로 저장
                 codes = [str(c).zfill(6) for c in df['종목코드'].astype(str).tolist()]
 
-                for code in codes:
-                    try:
-                        save_metrics_snapshot(code, latest_iso, days=days, minp=5)
-                    except Exception:
-                        # 개별 종목 실패는 건너뛰고 계속
-                        pass
+                with profile_scope("daemon", "metrics.snapshot", {"codes": len(codes), "days": days}):
+                    for code in codes:
+                        try:
+                            save_metrics_snapshot(code, latest_iso, days=days, minp=5)
+                        except Exception:
+                            # 개별 종목 실패는 건너뛰고 계속
+                            pass
             except Exception:
                 time.sleep(60)  # 오류 시 1분 후 재시도
     t = threading.Thread(target=_job, daemon=True)
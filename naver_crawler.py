@@ -0,0 +1,136 @@
+# naver_crawler.py
+# 네이버 금융 크롤링용 상주 asyncio 루프 + 공용 aiohttp 세션
+#  - 백그라운드 스레드 하나가 이벤트 루프와 커넥션 풀(keep-alive)을 소유
+#  - 동기 Flask 핸들러는 submit()으로 코루틴을 넘기고 concurrent Future로 결과를 받는다
+
+import asyncio
+import atexit
+import logging
+import re
+import threading
+import aiohttp
+import numpy as np
+
+import telemetry
+
+CONNECTOR_LIMIT = 64          # 전체 동시 연결 수
+CONNECTOR_LIMIT_PER_HOST = 16 # 호스트(finance.naver.com)당 동시 연결 수
+KEEPALIVE_TIMEOUT = 30        # 유휴 연결 유지 시간(초)
+DNS_CACHE_TTL = 300           # DNS 캐시(초)
+REQUEST_TIMEOUT = 10          # 요청 1건 타임아웃(초)
+DEFAULT_HEADERS = {'User-Agent': 'Mozilla/5.0'}
+
+_loop = None
+_session = None
+_init_lock = threading.Lock()
+
+
+async def _create_session():
+    connector = aiohttp.TCPConnector(
+        limit=CONNECTOR_LIMIT,
+        limit_per_host=CONNECTOR_LIMIT_PER_HOST,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=DNS_CACHE_TTL,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        headers=DEFAULT_HEADERS,
+        timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+        trace_configs=[telemetry.aiohttp_trace_config()],
+    )
+
+
+def _ensure_loop():
+    """최초 호출 시 루프 스레드와 공용 세션을 만든다."""
+    global _loop, _session
+    if _loop is not None:
+        return _loop
+    with _init_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            t = threading.Thread(target=loop.run_forever, name="naver-crawler-loop", daemon=True)
+            t.start()
+            _session = asyncio.run_coroutine_threadsafe(_create_session(), loop).result()
+            _loop = loop
+            logging.info("네이버 크롤러 루프 시작 (host당 최대 %d 연결)", CONNECTOR_LIMIT_PER_HOST)
+    return _loop
+
+
+def submit(coro):
+    """코루틴을 크롤러 루프에 넘기고 concurrent.futures.Future를 반환한다."""
+    return asyncio.run_coroutine_threadsafe(coro, _ensure_loop())
+
+
+async def fetch_text(url, encoding='cp949', retries=3):
+    """공용 세션으로 GET 후 본문 문자열을 반환한다. 실패하면 None."""
+    for attempt in range(retries):
+        try:
+            async with _session.get(url) as resp:
+                if resp.status == 200:
+                    return await resp.text(encoding=encoding)
+                logging.warning("%s: HTTP 상태 코드 %d", url, resp.status)
+        except Exception as e:
+            logging.warning("%s: 요청 중 오류 발생: %s", url, e)
+    return None
+
+
+# ------------------ 일별 시세(sise_day) 표 파서 ------------------
+# pd.read_html → dropna → iterrows → 문자열 치환을 거치지 않고
+# 정규식 한 번의 훑기로 날짜/OHLCV 배열을 바로 만든다.
+# 열 순서: 날짜, 종가, 전일비, 시가, 고가, 저가, 거래량
+_ROW_RE = re.compile(r'<tr[^>]*>(.*?)</tr>', re.S | re.I)
+_TD_RE = re.compile(r'<td[^>]*>(.*?)</td>', re.S | re.I)
+_TAG_RE = re.compile(r'<[^>]+>')
+_DATE_RE = re.compile(r'(\d{4})\.(\d{2})\.(\d{2})')
+_SISE_COLS = (1, 3, 4, 5, 6)  # 종가, 시가, 고가, 저가, 거래량
+
+
+def _cell_number(cell):
+    return float(_TAG_RE.sub('', cell).replace(',', '').strip())
+
+
+def parse_sise_day(text):
+    """
+    일별 시세 페이지 HTML에서 날짜/OHLCV를 배열 dict로 반환한다.
+    행 순서는 페이지 그대로(최신 → 과거)이며, 파싱된 행이 없으면 None.
+    반환: {"dates": int64(YYYYMMDD), "open", "high", "low", "close", "volume": float64}
+    """
+    if not text:
+        return None
+    dates, closes, opens, highs, lows, volumes = [], [], [], [], [], []
+    for row in _ROW_RE.findall(text):
+        tds = _TD_RE.findall(row)
+        if len(tds) < 7:
+            continue
+        m = _DATE_RE.search(tds[0])
+        if not m:
+            continue
+        try:
+            c, o, h, l, v = (_cell_number(tds[i]) for i in _SISE_COLS)
+        except ValueError:
+            continue
+        dates.append(int(m.group(1)) * 10000 + int(m.group(2)) * 100 + int(m.group(3)))
+        closes.append(c); opens.append(o); highs.append(h); lows.append(l); volumes.append(v)
+    if not dates:
+        return None
+    return {
+        "dates": np.array(dates, dtype=np.int64),
+        "open": np.array(opens, dtype=np.float64),
+        "high": np.array(highs, dtype=np.float64),
+        "low": np.array(lows, dtype=np.float64),
+        "close": np.array(closes, dtype=np.float64),
+        "volume": np.array(volumes, dtype=np.float64),
+    }
+
+
+def _shutdown():
+    if _loop is None:
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(_session.close(), _loop).result(timeout=5)
+    except Exception:
+        pass
+    _loop.call_soon_threadsafe(_loop.stop)
+
+
+atexit.register(_shutdown)
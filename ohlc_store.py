@@ -0,0 +1,126 @@
+# ohlc_store.py
+# 종목별 일봉 OHLCV 영구 저장소 (data/ohlc_store/<종목코드>.npz)
+#  - 날짜: int64 (YYYYMMDD), 시가/고가/저가/종가/거래량: float64 배열
+#  - 병합은 날짜 합집합(같은 날짜는 새로 받은 값 우선): 신규 거래일/장중 갱신/과거 백필/중간 공백 메우기
+
+import os
+import re
+import logging
+import threading
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_DIR = os.path.join(BASE_DIR, "data", "ohlc_store")
+os.makedirs(STORE_DIR, exist_ok=True)
+
+FIELDS = ("open", "high", "low", "close", "volume")
+_store_lock = threading.Lock()
+_CODE_RE = re.compile(r'\d{6}')
+
+
+def is_valid_code(code) -> bool:
+    """숫자 6자리 종목코드인지(파일 경로·캐시 키로 써도 되는 값인지)"""
+    return isinstance(code, str) and _CODE_RE.fullmatch(code) is not None
+
+
+def date_str_to_int(date_str: str) -> int:
+    """'YYYY.MM.DD' → YYYYMMDD 정수"""
+    return int(str(date_str).strip().replace('.', '').replace('-', ''))
+
+
+def date_int_to_str(date_int: int) -> str:
+    """YYYYMMDD 정수 → 'YYYY.MM.DD'"""
+    d = int(date_int)
+    return f"{d // 10000:04d}.{d // 100 % 100:02d}.{d % 100:02d}"
+
+
+def _store_path(code: str) -> str:
+    if not is_valid_code(code):   # '../x' 같은 값이 저장소 밖 경로가 되지 않도록
+        raise ValueError(f"잘못된 종목코드: {code!r}")
+    return os.path.join(STORE_DIR, f"{code}.npz")
+
+
+def empty_ohlc():
+    out = {"dates": np.empty(0, dtype=np.int64)}
+    for f in FIELDS:
+        out[f] = np.empty(0, dtype=np.float64)
+    return out
+
+
+def combine_pages(parts):
+    """
+    페이지별 배열 dict 목록(None 허용)을 하나로 합쳐
+    날짜 오름차순·중복 제거된 배열 dict로 반환한다.
+    """
+    parts = [p for p in parts if p is not None and len(p["dates"])]
+    if not parts:
+        return empty_ohlc()
+    dates = np.concatenate([np.asarray(p["dates"], dtype=np.int64) for p in parts])
+    uniq, idx = np.unique(dates, return_index=True)  # 같은 날짜는 먼저 나온 값 유지
+    out = {"dates": uniq}
+    for f in FIELDS:
+        out[f] = np.concatenate([np.asarray(p[f], dtype=np.float64) for p in parts])[idx]
+    return out
+
+
+def merge_ohlc(cur: dict, new: dict) -> dict:
+    """
+    날짜 오름차순 배열 dict 두 개를 날짜 합집합으로 병합한다(new는 combine_pages로 정규화된 것).
+    같은 날짜가 양쪽에 있으면 new 값을 쓴다(장중 갱신된 마지막 봉 등).
+    중간 날짜도 그대로 합쳐지므로, 앞선 수집에서 빠진 구간은 나중 수집으로 메워진다.
+    """
+    if cur["dates"].size == 0:
+        return dict(new)
+    if new["dates"].size == 0:
+        return cur
+    if new["dates"][0] > cur["dates"][-1]:
+        return {k: np.concatenate((cur[k], new[k])) for k in cur}  # 흔한 경우: 새 거래일만 뒤에 추가
+    dates = np.concatenate((new["dates"], cur["dates"]))
+    uniq, idx = np.unique(dates, return_index=True)  # 같은 날짜는 먼저 나온(new) 값 유지
+    out = {"dates": uniq}
+    for f in FIELDS:
+        out[f] = np.concatenate((new[f], cur[f]))[idx]
+    return out
+
+
+def load_ohlc(code: str):
+    """
+    저장된 OHLCV를 날짜 오름차순 배열 dict로 반환한다.
+    파일이 없거나 읽기에 실패하면 None.
+    """
+    path = _store_path(code)
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as npz:
+            out = {"dates": npz["dates"].astype(np.int64)}
+            for f in FIELDS:
+                out[f] = npz[f].astype(np.float64)
+        return out
+    except Exception as e:
+        logging.warning("OHLC 저장소 로드 실패 (%s): %s", code, e)
+        return None
+
+
+def _write(code: str, data: dict) -> None:
+    path = _store_path(code)
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, **data)
+    os.replace(tmp, path)  # 원자적 교체(읽는 쪽이 반쯤 쓴 파일을 보지 않도록)
+
+
+def append_ohlc(code: str, new: dict) -> dict:
+    """
+    새로 수집한 행(배열 dict)을 저장소에 병합한다(merge_ohlc 규칙).
+    병합 결과(날짜 오름차순 배열 dict)를 반환한다.
+    """
+    new = combine_pages([new])
+    with _store_lock:
+        merged = merge_ohlc(load_ohlc(code) or empty_ohlc(), new)
+        if merged["dates"].size == 0:
+            return merged
+        try:
+            _write(code, merged)
+        except Exception as e:
+            logging.warning("OHLC 저장소 저장 실패 (%s): %s", code, e)
+        return merged
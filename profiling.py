@@ -0,0 +1,188 @@
+# profiling.py
+# 느린 요청/데몬 작업 프로파일링(opt-in, 환경변수로 켠다)
+#  - PROFILE_SLOW_MS: 이보다 오래 걸린 구간의 호출 스택 샘플(folded 형식, flamegraph용)을 저장
+#    → 스택 샘플러 스레드가 감시 중인 스레드의 프레임을 PROFILE_INTERVAL_MS마다 읽는다(구간 자체는 계측하지 않음)
+#  - PROFILE_SAMPLE_EVERY: N개 중 하나를 무작위로 골라 cProfile로 전체 계측해 .pstats로 저장(지연과 무관)
+#  - 결과: PROFILE_DIR(기본 data/profiles)에 <시각>-<ms>-<이름>-<id>.{folded|pstats} + 같은 이름의 .json
+#    (.json: 종류, 이름(라우트/작업), 파라미터, 소요 시간, 계기). 최근 PROFILE_MAX_FILES개만 남긴다
+#  - 둘 다 0(기본)이면 start()가 바로 None을 돌려주며 아무것도 하지 않는다
+#
+# 사용: token = start("request", "/get_ohlc_history", params) ... finish(token)
+#       with profile_scope("daemon", "theme.daily_update"): ...
+
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import random
+import cProfile
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROFILE_SLOW_MS = float(os.environ.get("PROFILE_SLOW_MS", 0))
+PROFILE_SAMPLE_EVERY = int(os.environ.get("PROFILE_SAMPLE_EVERY", 0))
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", 10))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(BASE_DIR, "data", "profiles"))
+PROFILE_MAX_FILES = int(os.environ.get("PROFILE_MAX_FILES", 200))
+PARAMS_MAX_CHARS = 2000
+
+ENABLED = PROFILE_SLOW_MS > 0 or PROFILE_SAMPLE_EVERY > 0
+
+_active = threading.local()   # 스레드당 구간 하나(중첩 구간은 바깥 것만 계측)
+_write_lock = threading.Lock()
+
+
+# ------------------ 스택 샘플러 ------------------
+class _StackSampler:
+    """감시 중인 스레드들의 현재 호출 스택을 주기적으로 읽어 folded 스택별 횟수를 센다."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._watched = {}          # thread id -> Counter
+        self._wake = threading.Event()
+        self._thread = None
+
+    def watch(self, tid):
+        counts = Counter()
+        with self._lock:
+            self._watched[tid] = counts
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return counts
+
+    def unwatch(self, tid):
+        with self._lock:
+            self._watched.pop(tid, None)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                idle = not self._watched
+                if idle:
+                    self._wake.clear()
+            if idle:
+                self._wake.wait()
+                continue
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for tid, counts in self._watched.items():
+                    frame = frames.get(tid)
+                    if frame is not None:
+                        counts[_fold(frame)] += 1
+
+
+def _fold(frame):
+    """프레임 → 'root;...;leaf' (flamegraph folded 형식)"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+_sampler = _StackSampler(PROFILE_INTERVAL_MS / 1000)
+
+
+# ------------------ 구간 계측 ------------------
+def start(kind, name, params=None):
+    """구간 시작. 계측 대상이 아니면 None. 반환값을 finish()에 넘긴다."""
+    if not ENABLED or getattr(_active, 'token', None) is not None:
+        return None
+    token = {
+        "kind": kind, "name": name, "params": params,
+        "started_at": time.time(), "t0": time.perf_counter(),
+        "tid": threading.get_ident(), "profiler": None, "counts": None,
+    }
+    if PROFILE_SAMPLE_EVERY > 0 and random.randrange(PROFILE_SAMPLE_EVERY) == 0:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            token["profiler"] = profiler
+        except ValueError:   # 다른 프로파일러가 이미 켜져 있음
+            pass
+    if token["profiler"] is None:
+        if PROFILE_SLOW_MS <= 0:
+            return None
+        token["counts"] = _sampler.watch(token["tid"])
+    _active.token = token
+    return token
+
+
+def finish(token):
+    """구간 종료. 표본이거나 느렸으면 PROFILE_DIR에 기록한다."""
+    if token is None:
+        return
+    elapsed_ms = (time.perf_counter() - token["t0"]) * 1000
+    _active.token = None
+    profiler, counts = token["profiler"], token["counts"]
+    if profiler is not None:
+        profiler.disable()
+        _save(token, elapsed_ms, "sample", "pstats", profiler.dump_stats)
+        return
+    _sampler.unwatch(token["tid"])
+    if elapsed_ms >= PROFILE_SLOW_MS and counts:
+        def write(path):
+            with open(path, 'w', encoding='utf-8') as f:
+                f.writelines(f"{stack} {n}\n" for stack, n in counts.most_common())
+        _save(token, elapsed_ms, "slow", "folded", write)
+
+
+@contextmanager
+def profile_scope(kind, name, params=None):
+    token = start(kind, name, params)
+    try:
+        yield
+    finally:
+        finish(token)
+
+
+# ------------------ 기록/순환 ------------------
+def _slug(name):
+    return re.sub(r'[^0-9A-Za-z_.-]+', '_', str(name)).strip('_')[:60] or "root"
+
+
+def _save(token, elapsed_ms, trigger, ext, write):
+    stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(token["started_at"]))
+    stem = f"{stamp}-{int(elapsed_ms)}ms-{_slug(token['name'])}-{uuid.uuid4().hex[:6]}"
+    params = json.dumps(token["params"], ensure_ascii=False, default=str)
+    meta = {
+        "kind": token["kind"],
+        "name": token["name"],
+        "params": params if len(params) <= PARAMS_MAX_CHARS else params[:PARAMS_MAX_CHARS] + "...",
+        "elapsed_ms": round(elapsed_ms, 2),
+        "started_at": token["started_at"],
+        "trigger": trigger,                     # slow: 스택 샘플 / sample: cProfile
+        "interval_ms": PROFILE_INTERVAL_MS if trigger == "slow" else None,
+        "file": f"{stem}.{ext}",
+    }
+    try:
+        with _write_lock:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            write(os.path.join(PROFILE_DIR, meta["file"]))
+            with open(os.path.join(PROFILE_DIR, f"{stem}.json"), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False, indent=2)
+            _rotate()
+    except Exception as e:
+        logging.warning("프로파일 기록 실패(%s): %s", token["name"], e)
+
+
+def _rotate():
+    """가장 오래된 프로파일(.json과 짝 파일)부터 지워 PROFILE_MAX_FILES개만 남긴다."""
+    metas = sorted(f for f in os.listdir(PROFILE_DIR) if f.endswith('.json'))
+    for meta in metas[:max(0, len(metas) - PROFILE_MAX_FILES)]:
+        stem = meta[:-len('.json')]
+        for ext in ('.json', '.folded', '.pstats'):
+            try:
+                os.remove(os.path.join(PROFILE_DIR, stem + ext))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,255 @@
+# screener.py
+# 전 종목 기술적 조건 검색
+#  - 장 마감 후(일괄 수집 직후) ohlc_store의 전 종목 일봉으로 보조지표를 종목 묶음 단위 행렬 계산
+#    (indicator_engine.compute_indicator_matrices)하고, 종목별 마지막 봉/직전 봉 값만 메모리 표로 보관
+#  - "rsi < 30 and close > ma120", "prev_psar > prev_close and psar < close" 같은 조건식을
+#    표 전체에 벡터 연산으로 한 번에 평가한다(종목별 재계산 없음)
+#  - 조건식은 ast로 파싱해 허용된 노드(비교/and·or·not/사칙연산/숫자/필드 이름)만 평가한다
+
+import os
+import ast
+import time
+import logging
+import datetime
+import threading
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from indicator_engine import PRICE_INPUTS, INDICATOR_COLUMNS, compute_indicator_matrices, stack_right_aligned
+from ohlc_store import load_ohlc, date_int_to_str
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STOCK_LIST_FILE = os.path.join(BASE_DIR, "data", "stock_list.csv")
+
+SCREEN_DAYS = 370           # 종목별 계산 구간(app.MAX_RAW_DAYS와 같아야 차트 값과 일치)
+SCREEN_CHUNK = 256          # 한 번에 행렬로 계산할 종목 수(메모리 상한)
+SCREEN_MAX_RESULTS = 500
+RULE_MAX_LENGTH = 500
+
+SCREEN_FIELDS = PRICE_INPUTS + INDICATOR_COLUMNS
+_FIELD_BY_LOWER = {f.lower(): f for f in SCREEN_FIELDS}
+
+# 자주 쓰는 조건(조건식 안에서 이름으로 쓸 수 있음)
+PRESETS = {
+    'psar_flip_up': 'prev_psar > prev_close and psar < close',
+    'psar_flip_down': 'prev_psar < prev_close and psar > close',
+    'golden_cross': 'prev_ma5 <= prev_ma20 and ma5 > ma20',
+    'dead_cross': 'prev_ma5 >= prev_ma20 and ma5 < ma20',
+    'macd_cross_up': 'prev_macd <= prev_signal and macd > signal',
+    'macd_cross_down': 'prev_macd >= prev_signal and macd < signal',
+    'rsi_oversold': 'rsi < 30',
+    'rsi_overbought': 'rsi > 70',
+}
+
+
+class ScreenTable:
+    """종목별 마지막 봉(cur)과 직전 봉(prev)의 가격·지표 값. 만든 뒤에는 바꾸지 않는다."""
+    __slots__ = ('codes', 'names', 'dates', 'cur', 'prev', 'built_at')
+
+    def __init__(self, codes, names, dates, cur, prev):
+        self.codes = codes          # [종목코드]
+        self.names = names          # [회사명]
+        self.dates = dates          # int64 (YYYYMMDD) 종목별 마지막 거래일
+        self.cur = cur              # {필드: float64 (종목 수,)}
+        self.prev = prev
+        self.built_at = datetime.datetime.now().isoformat(timespec='seconds')
+
+
+_table = None
+_build_lock = threading.Lock()
+
+
+def get_screen_table():
+    """현재 표(아직 만들기 전이면 None)"""
+    return _table
+
+
+# ------------------ 표 만들기 ------------------
+def _load_universe():
+    """stock_list.csv의 (종목코드, 회사명) 목록"""
+    df = pd.read_csv(STOCK_LIST_FILE, dtype={'종목코드': str})
+    codes = df['종목코드'].astype(str).str.zfill(6)
+    return [(c, n) for c, n in zip(codes, df['회사명']) if c.isdigit()]
+
+
+def _prepare_prices(open_, high, low, close):
+    """indicators.prepare_df와 같은 보정(종가 결측은 직전 값, 0인 시가/고가/저가는 종가)을 행렬에 적용"""
+    idx = np.where(np.isnan(close), 0, np.arange(close.shape[1]))
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    close = close[np.arange(close.shape[0])[:, None], idx]
+    return tuple(np.where(x == 0, close, x) for x in (open_, high, low)) + (close,)
+
+
+def _compute_chunk(ohlcs):
+    """종목 묶음의 마지막 봉/직전 봉 값 {필드: (2, 종목 수)}"""
+    mats = {f: stack_right_aligned([o[f] for o in ohlcs], SCREEN_DAYS) for f in PRICE_INPUTS}
+    o, h, l, c = _prepare_prices(mats['open'], mats['high'], mats['low'], mats['close'])
+    prices = dict(zip(PRICE_INPUTS, (o, h, l, c, mats['volume'])))
+    values = compute_indicator_matrices(o, h, l, c, mats['volume'])
+    values.update(prices)
+    return {f: values[f][:, -2:].T for f in SCREEN_FIELDS}
+
+
+def build_screen_table(universe=None):
+    """
+    저장소의 전 종목 일봉으로 표를 새로 만들어 교체하고 반환한다.
+    universe: [(종목코드, 회사명)] (기본: stock_list.csv). 저장소에 없는 종목은 빠진다.
+    """
+    global _table
+    with _build_lock:
+        started = time.monotonic()
+        universe = universe if universe is not None else _load_universe()
+        codes, names, ohlcs = [], [], []
+        for code, name in universe:
+            ohlc = load_ohlc(code)
+            if ohlc is not None and ohlc["dates"].size >= 2:
+                codes.append(code)
+                names.append(name)
+                ohlcs.append(ohlc)
+
+        n = len(codes)
+        cur = {f: np.full(n, np.nan) for f in SCREEN_FIELDS}
+        prev = {f: np.full(n, np.nan) for f in SCREEN_FIELDS}
+        for start in range(0, n, SCREEN_CHUNK):
+            part = _compute_chunk(ohlcs[start:start + SCREEN_CHUNK])
+            sl = slice(start, start + SCREEN_CHUNK)
+            for f, (p, c) in part.items():
+                prev[f][sl] = p
+                cur[f][sl] = c
+        dates = np.array([o["dates"][-1] for o in ohlcs], dtype=np.int64)
+
+        _table = ScreenTable(codes, names, dates, cur, prev)
+        logging.info("조건 검색 표 갱신: %d종목, %.1f초", n, time.monotonic() - started)
+        return _table
+
+
+def start_screen_table_builder():
+    """서버 시작 시 백그라운드로 표를 만든다(이후 갱신은 일괄 수집 완료 콜백에서)."""
+    def _job():
+        try:
+            build_screen_table()
+        except Exception as e:
+            logging.error(f"조건 검색 표 생성 에러: {e}")
+
+    threading.Thread(target=_job, daemon=True).start()
+
+
+# ------------------ 조건식 ------------------
+_CMP_OPS = {
+    ast.Lt: np.less, ast.LtE: np.less_equal, ast.Gt: np.greater,
+    ast.GtE: np.greater_equal, ast.Eq: np.equal, ast.NotEq: np.not_equal,
+}
+_BIN_OPS = {ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.divide}
+
+
+def _field_ref(name):
+    """이름 → ('cur'|'prev', 필드). 모르는 이름이면 None."""
+    key = name.lower()
+    which = 'cur'
+    if key.startswith('prev_'):
+        which, key = 'prev', key[5:]
+    field = _FIELD_BY_LOWER.get(key)
+    return (which, field) if field else None
+
+
+def _compile(node, fields, depth=0):
+    """ast 노드 → (표 → 배열) 함수. 참조한 필드는 fields에 모은다."""
+    if isinstance(node, ast.Expression):
+        return _compile(node.body, fields, depth)
+
+    if isinstance(node, ast.BoolOp):
+        parts = [_compile(v, fields, depth) for v in node.values]
+        op = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        def run(t):
+            out = parts[0](t)
+            for p in parts[1:]:
+                out = op(out, p(t))
+            return out
+        return run
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Not, ast.USub)):
+        inner = _compile(node.operand, fields, depth)
+        op = np.logical_not if isinstance(node.op, ast.Not) else np.negative
+        return lambda t: op(inner(t))
+
+    if isinstance(node, ast.Compare):
+        terms = [_compile(node.left, fields, depth)] + [_compile(c, fields, depth) for c in node.comparators]
+        ops = []
+        for op in node.ops:
+            if type(op) not in _CMP_OPS:
+                raise ValueError("지원하지 않는 비교 연산자입니다.")
+            ops.append(_CMP_OPS[type(op)])
+        def run(t):
+            vals = [f(t) for f in terms]
+            out = ops[0](vals[0], vals[1])
+            for i in range(1, len(ops)):
+                out = out & ops[i](vals[i], vals[i + 1])
+            return out
+        return run
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BIN_OPS:
+        left, right = _compile(node.left, fields, depth), _compile(node.right, fields, depth)
+        op = _BIN_OPS[type(node.op)]
+        return lambda t: op(left(t), right(t))
+
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        value = float(node.value)
+        return lambda t: value
+
+    if isinstance(node, ast.Name):
+        preset = PRESETS.get(node.id.lower())
+        if preset is not None:
+            if depth > 4:
+                raise ValueError("조건 이름이 너무 깊게 중첩되었습니다.")
+            return _compile(ast.parse(preset, mode='eval'), fields, depth + 1)
+        ref = _field_ref(node.id)
+        if ref is None:
+            raise ValueError(f"알 수 없는 이름입니다: {node.id}")
+        which, field = ref
+        fields.add(field)
+        return lambda t: getattr(t, which)[field]
+
+    raise ValueError("허용되지 않는 표현식입니다.")
+
+
+@lru_cache(maxsize=256)
+def compile_rule(rule):
+    """조건식 문자열 → (표 → bool 배열 함수, 참조 필드 튜플). 잘못된 식이면 ValueError."""
+    if not rule or len(rule) > RULE_MAX_LENGTH:
+        raise ValueError(f"조건식은 1~{RULE_MAX_LENGTH}자여야 합니다.")
+    try:
+        tree = ast.parse(rule, mode='eval')
+    except SyntaxError:
+        raise ValueError("조건식 문법 오류입니다.")
+    fields = set()
+    fn = _compile(tree, fields)
+    return fn, tuple(f for f in SCREEN_FIELDS if f in fields)
+
+
+def _json_value(v):
+    return None if not np.isfinite(v) else float(v)
+
+
+def run_screen(table, rule, limit=SCREEN_MAX_RESULTS):
+    """표에서 조건을 만족하는 종목 목록(종목코드 순)과 기준일을 반환한다."""
+    fn, fields = compile_rule(rule)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mask = np.broadcast_to(np.asarray(fn(table), dtype=bool), table.dates.shape)
+    hits = np.flatnonzero(mask)
+    shown = ('close',) + tuple(f for f in fields if f != 'close')
+    matches = [{
+        "code": table.codes[i],
+        "name": table.names[i],
+        "date": date_int_to_str(table.dates[i]),
+        **{f: _json_value(table.cur[f][i]) for f in shown},
+    } for i in hits[:limit]]
+    return {
+        "rule": rule,
+        "as_of": date_int_to_str(table.dates.max()) if table.dates.size else None,
+        "built_at": table.built_at,
+        "universe": len(table.codes),
+        "count": int(hits.size),
+        "matches": matches,
+    }
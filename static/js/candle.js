@@ -291,15 +291,11 @@ async function loadAndRender(code, name, daysParam) {
   headerTitle.textContent = `${name} · ${days} DAYS`;
   headerTitle.style.color = 'var(--accent-yellow)'; // 강조색
 
-  const fd = new FormData();
-  fd.append('code', code);
-  fd.append('days', String(days));
-  fd.append('ma', 'true');
-  fd.append('bollinger', 'true');
-  fd.append('psar', 'true');
+  // 캔들만 그리므로 지표 계열 없이 OHLC만 받는다
+  const query = `code=${code}&days=${days}`;
 
   try {
-    const res = await fetch('/get_ohlc_history', { method:'POST', body:fd });
+    const res = await fetch(`/api/chart?${query}`);
     const j = await res.json();
     
     // 차트 그리기
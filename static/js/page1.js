@@ -1109,6 +1109,46 @@
 
 
   // ========== Chart Data Request ==========
+  // /api/chart 열 단위 이진 응답(columnar.py) 해석:
+  // 'NCC1' | uint32 헤더 길이 | 헤더 JSON | 8바이트 정렬 본문(열 배열, little-endian)
+  const COLUMNAR_TYPE = 'application/vnd.newcandle.columnar';
+
+  function decodeColumnar(buf) {
+    const view = new DataView(buf);
+    const headLen = view.getUint32(4, true);
+    const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buf, 8, headLen)));
+    const bodyStart = Math.ceil((8 + headLen) / 8) * 8;
+    const out = { ...header.meta };
+    const base = header.base_date ? Date.UTC(...header.base_date.split('.').map((v, i) => Number(v) - (i === 1 ? 1 : 0))) : 0;
+    header.columns.forEach(col => {
+      const start = bodyStart + col.offset;
+      if (col.name === 'dates') {
+        out.dates = Array.from(new Int32Array(buf, start, header.n), d => {
+          const t = new Date(base + d * 86400000);
+          return `${t.getUTCFullYear()}.${String(t.getUTCMonth() + 1).padStart(2, '0')}.${String(t.getUTCDate()).padStart(2, '0')}`;
+        });
+      } else if (col.dtype === 'f8') {
+        out[col.name] = Array.from(new Float64Array(buf, start, header.n));
+      } else {
+        // sig: 원래 float32인 열 → 서버 JSON 응답(CompactFrame.tolist)과 같은 유효 자릿수로 반올림
+        const values = new Float32Array(buf, start, header.n);
+        out[col.name] = col.sig ? Array.from(values, v => Number(v.toPrecision(col.sig))) : Array.from(values);
+      }
+    });
+    return out;
+  }
+
+  function readChartResponse(res) {
+    const type = res.headers.get('Content-Type') || '';
+    return type.startsWith(COLUMNAR_TYPE) ? res.arrayBuffer().then(decodeColumnar) : res.json();
+  }
+
+  // 지표 하나를 켤 때는 그 계열만 /api/chart로 받는다(GET이라 ETag 재검증, 꺼진 계열 None 채움 없음)
+  function fetchChartSeries(family, daysValue) {
+    const query = `code=${AppState.currentCode}&days=${daysValue}&series=${family}&format=columnar`;
+    return fetch(`/api/chart?${query}`).then(readChartResponse);
+  }
+
   function requestChart(refreshSideBoxes = true) {
     if (!AppState.currentCode) {
       alert('종목을 선택하세요.');
@@ -1137,20 +1177,21 @@
       uo: document.getElementById("toggleUO").checked ? 'true' : 'false',
       adx: document.getElementById("toggleADX").checked ? 'true' : 'false'
     };
-    const requestBody = `code=${AppState.currentCode}&days=${daysValue}&ma=${MA}&bollinger=${BOLLINGER}&envelope=${ENVELOPE}&ichimoku=${ICHIMOKU}&psar=${PSAR}&tradingvalue=${flags.tradingvalue}&macd=${flags.macd}&rsi=${flags.rsi}&stoch=${flags.stoch}&stochrsi=${flags.stochrsi}&williams=${flags.williams}&cci=${flags.cci}&atr=${flags.atr}&roc=${flags.roc}&uo=${flags.uo}&adx=${flags.adx}`;
+    // 켜진 지표 계열만 한 번에 요청(/api/chart는 OHLC 한 벌 + 요청한 시리즈만 응답)
+    const families = Object.entries({
+      ma: MA, bollinger: BOLLINGER, envelope: ENVELOPE, ichimoku: ICHIMOKU, psar: PSAR, ...flags
+    }).filter(([, on]) => on === 'true').map(([name]) => name);
+    // GET이라 브라우저가 ETag로 재검증한다(같은 봉이면 304, 본문 재전송 없음)
+    const query = `code=${AppState.currentCode}&days=${daysValue}&families=${families.join(',')}&format=columnar`;
     
     toggleMainChartLoader(true);
     
-    return fetch('/get_ohlc_history', {
-      method: 'POST',
-      headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
-      body: requestBody
-    })
+    return fetch(`/api/chart?${query}`)
     .then(res => {
       if (!res.ok) {
         throw new Error(`서버 오류: ${res.status}`);
       }
-      return res.json();
+      return readChartResponse(res);
     })
     .then(json => {
       if (json.error) {
@@ -1546,12 +1587,7 @@
     if (!AppState.currentCode) return;
     const daysValue = document.getElementById('daysInput').value.trim();
     if (!daysValue || isNaN(daysValue) || daysValue < 1 || daysValue > 365) return;
-    fetch('/get_ohlc_history', {
-      method: 'POST',
-      headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
-      body: `code=${AppState.currentCode}&days=${daysValue}&ma=true`
-    })
-    .then(res => res.json())
+    fetchChartSeries('ma', daysValue)
     .then(json => {
       if (json.error) {
         alert('에러: ' + json.error);
@@ -1614,12 +1650,7 @@
     if (!AppState.currentCode) return;
     const daysValue = document.getElementById('daysInput').value.trim();
     if (!daysValue || isNaN(daysValue) || daysValue < 1 || daysValue > 365) return;
-    fetch('/get_ohlc_history', {
-      method: 'POST',
-      headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
-      body: `code=${AppState.currentCode}&days=${daysValue}&bollinger=true`
-    })
-    .then(res => res.json())
+    fetchChartSeries('bollinger', daysValue)
     .then(json => {
       if (json.error) {
         alert('에러: ' + json.error);
@@ -1682,12 +1713,7 @@
     if (!AppState.currentCode) return;
     const daysValue = document.getElementById('daysInput').value.trim();
     if (!daysValue || isNaN(daysValue) || daysValue < 1 || daysValue > 365) return;
-    fetch('/get_ohlc_history', {
-      method: 'POST',
-      headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
-      body: `code=${AppState.currentCode}&days=${daysValue}&envelope=true`
-    })
-    .then(res => res.json())
+    fetchChartSeries('envelope', daysValue)
     .then(json => {
       if (json.error) {
         alert('에러: ' + json.error);
@@ -1846,12 +1872,7 @@
     if (!AppState.currentCode) return;
     const daysValue = document.getElementById('daysInput').value.trim();
     if (!daysValue || isNaN(daysValue) || daysValue < 1 || daysValue > 365) return;
-    fetch('/get_ohlc_history', {
-      method: 'POST',
-      headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
-      body: `code=${AppState.currentCode}&days=${daysValue}&ichimoku=true`
-    })
-    .then(res => res.json())
+    fetchChartSeries('ichimoku', daysValue)
     .then(json => {
       if (json.error) {
         alert('에러: ' + json.error);
@@ -1902,12 +1923,7 @@
     if (!AppState.currentCode) return;
     const daysValue = document.getElementById('daysInput').value.trim();
     if (!daysValue || isNaN(daysValue) || daysValue < 1 || daysValue > 365) return;
-    fetch('/get_ohlc_history', {
-      method: 'POST',
-      headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
-      body: `code=${AppState.currentCode}&days=${daysValue}&psar=true`
-    })
-    .then(res => res.json())
+    fetchChartSeries('psar', daysValue)
     .then(json => {
       if (json.error) {
         alert('에러: ' + json.error);
@@ -2003,12 +2019,7 @@
     if (!AppState.currentCode) return;
     const daysValue = document.getElementById("daysInput").value.trim();
     if (!daysValue || isNaN(daysValue) || daysValue < 1 || daysValue > 365) return;
-    fetch("/get_ohlc_history", {
-      method: "POST",
-      headers: { "Content-Type": "application/x-www-form-urlencoded" },
-      body: `code=${AppState.currentCode}&days=${daysValue}&tradingvalue=true`
-    })
-    .then(res => res.json())
+    fetchChartSeries("tradingvalue", daysValue)
     .then(json => {
       if (json.error) {
         alert("에러: " + json.error);
@@ -2094,12 +2105,7 @@
     if (!AppState.currentCode) return;
     const daysValue = document.getElementById("daysInput").value.trim();
     if (!daysValue || isNaN(daysValue) || daysValue < 1 || daysValue > 365) return;
-    fetch("/get_ohlc_history", {
-      method: "POST",
-      headers: { "Content-Type": "application/x-www-form-urlencoded" },
-      body: `code=${AppState.currentCode}&days=${daysValue}&macd=true`
-    })
-    .then(res => res.json())
+    fetchChartSeries("macd", daysValue)
     .then(json => {
       if (json.error) {
         alert("에러: " + json.error);
@@ -2180,12 +2186,7 @@
     if (!AppState.currentCode) return;
     const daysValue = document.getElementById("daysInput").value.trim();
     if (!daysValue || isNaN(daysValue) || daysValue < 1 || daysValue > 365) return;
-    fetch("/get_ohlc_history", {
-      method: "POST",
-      headers: { "Content-Type": "application/x-www-form-urlencoded" },
-      body: `code=${AppState.currentCode}&days=${daysValue}&rsi=true`
-    })
-    .then(res => res.json())
+    fetchChartSeries("rsi", daysValue)
     .then(json => {
       if (json.error) {
         alert("에러: " + json.error);
@@ -2266,12 +2267,7 @@
     if (!AppState.currentCode) return;
     const daysValue = document.getElementById("daysInput").value.trim();
     if (!daysValue || isNaN(daysValue) || daysValue < 1 || daysValue > 365) return;
-    fetch("/get_ohlc_history", {
-      method: "POST",
-      headers: { "Content-Type": "application/x-www-form-urlencoded" },
-      body: `code=${AppState.currentCode}&days=${daysValue}&stoch=true`
-    })
-    .then(res => res.json())
+    fetchChartSeries("stoch", daysValue)
     .then(json => {
       if (json.error) {
         alert("에러: " + json.error);
@@ -2352,12 +2348,7 @@
     if (!AppState.currentCode) return;
     const daysValue = document.getElementById("daysInput").value.trim();
     if (!daysValue || isNaN(daysValue) || daysValue < 1 || daysValue > 365) return;
-    fetch("/get_ohlc_history", {
-      method: "POST",
-      headers: { "Content-Type": "application/x-www-form-urlencoded" },
-      body: `code=${AppState.currentCode}&days=${daysValue}&stochrsi=true`
-    })
-    .then(res => res.json())
+    fetchChartSeries("stochrsi", daysValue)
     .then(json => {
       if (json.error) {
         alert("에러: " + json.error);
@@ -2438,12 +2429,7 @@
     if (!AppState.currentCode) return;
     const daysValue = document.getElementById("daysInput").value.trim();
     if (!daysValue || isNaN(daysValue) || daysValue < 1 || daysValue > 365) return;
-    fetch("/get_ohlc_history", {
-      method: "POST",
-      headers: { "Content-Type": "application/x-www-form-urlencoded" },
-      body: `code=${AppState.currentCode}&days=${daysValue}&williams=true`
-    })
-    .then(res => res.json())
+    fetchChartSeries("williams", daysValue)
     .then(json => {
       if (json.error) {
         alert("에러: " + json.error);
@@ -2523,12 +2509,7 @@
     if (!AppState.currentCode) return;
     const daysValue = document.getElementById("daysInput").value.trim();
     if (!daysValue || isNaN(daysValue) || daysValue < 1 || daysValue > 365) return;
-    fetch("/get_ohlc_history", {
-      method: "POST",
-      headers: { "Content-Type": "application/x-www-form-urlencoded" },
-      body: `code=${AppState.currentCode}&days=${daysValue}&cci=true`
-    })
-    .then(res => res.json())
+    fetchChartSeries("cci", daysValue)
     .then(json => {
       if (json.error) {
         alert("에러: " + json.error);
@@ -2608,12 +2589,7 @@
     if (!AppState.currentCode) return;
     const daysValue = document.getElementById("daysInput").value.trim();
     if (!daysValue || isNaN(daysValue) || daysValue < 1 || daysValue > 365) return;
-    fetch("/get_ohlc_history", {
-      method: "POST",
-      headers: { "Content-Type": "application/x-www-form-urlencoded" },
-      body: `code=${AppState.currentCode}&days=${daysValue}&atr=true`
-    })
-    .then(res => res.json())
+    fetchChartSeries("atr", daysValue)
     .then(json => {
       if (json.error) {
         alert("에러: " + json.error);
@@ -2693,12 +2669,7 @@
     if (!AppState.currentCode) return;
     const daysValue = document.getElementById("daysInput").value.trim();
     if (!daysValue || isNaN(daysValue) || daysValue < 1 || daysValue > 365) return;
-    fetch("/get_ohlc_history", {
-      method: "POST",
-      headers: { "Content-Type": "application/x-www-form-urlencoded" },
-      body: `code=${AppState.currentCode}&days=${daysValue}&roc=true`
-    })
-    .then(res => res.json())
+    fetchChartSeries("roc", daysValue)
     .then(json => {
       if (json.error) {
         alert("에러: " + json.error);
@@ -2778,12 +2749,7 @@
     if (!AppState.currentCode) return;
     const daysValue = document.getElementById("daysInput").value.trim();
     if (!daysValue || isNaN(daysValue) || daysValue < 1 || daysValue > 365) return;
-    fetch("/get_ohlc_history", {
-      method: "POST",
-      headers: { "Content-Type": "application/x-www-form-urlencoded" },
-      body: `code=${AppState.currentCode}&days=${daysValue}&uo=true`
-    })
-    .then(res => res.json())
+    fetchChartSeries("uo", daysValue)
     .then(json => {
       if (json.error) {
         alert("에러: " + json.error);
@@ -2865,12 +2831,7 @@
     if (!AppState.currentCode) return;
     const daysValue = document.getElementById("daysInput").value.trim();
     if (!daysValue || isNaN(daysValue) || daysValue < 1 || daysValue > 365) return;
-    fetch("/get_ohlc_history", {
-      method: "POST",
-      headers: { "Content-Type": "application/x-www-form-urlencoded" },
-      body: `code=${AppState.currentCode}&days=${daysValue}&adx=true`
-    })
-    .then(res => res.json())
+    fetchChartSeries("adx", daysValue)
     .then(json => {
       if (json.error) {
         alert("에러: " + json.error);
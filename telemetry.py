@@ -0,0 +1,223 @@
+# telemetry.py
+# /metrics(Prometheus 텍스트 형식 0.0.4)용 계측
+#  - 라우트별 요청 수(상태 코드별), 지연 히스토그램, 오류(5xx) 수, 처리 스레드 CPU 시간
+#    → 지연 대비 CPU 시간이 작으면 I/O(크롤링) 대기, 비슷하면 계산(지표 등)이 병목
+#  - 캐시 적중/실패: ByteLRUCache류는 register_cache로 stats()를 등록해 수집 시점에 읽고,
+#    flask 응답 캐시처럼 자체 카운터가 없는 것은 record_cache로 센다
+#  - 외부 호출: 호스트별 요청 수(결과별)와 지연 히스토그램 (requests / aiohttp 모두)
+#  - prometheus_client 없이 표준 라이브러리만 사용
+
+import time
+import threading
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+PREFIX = "newcandle"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_lock = threading.Lock()
+_requests = defaultdict(int)          # (route, method, status) -> 수
+_errors = defaultdict(int)            # (route, method) -> 5xx 수
+_latency = {}                         # (route, method) -> _Histogram
+_cpu_seconds = defaultdict(float)     # (route, method) -> 처리 스레드 CPU 초
+_cache_lookups = defaultdict(int)     # (cache, "hit"|"miss") -> 수
+_upstream = defaultdict(int)          # (host, 결과) -> 수
+_upstream_latency = {}                # host -> _Histogram
+_cache_sources = {}                   # 이름 -> stats 함수
+_started_at = time.time()
+
+
+class _Histogram:
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.total += seconds
+        self.count += 1
+
+
+# ------------------ 기록 ------------------
+def observe_request(route, method, status, seconds, cpu_seconds):
+    key = (route, method)
+    with _lock:
+        _requests[(route, method, str(status))] += 1
+        if status >= 500:
+            _errors[key] += 1
+        hist = _latency.get(key)
+        if hist is None:
+            hist = _latency[key] = _Histogram()
+        hist.observe(seconds)
+        _cpu_seconds[key] += cpu_seconds
+
+
+def record_cache(name, hit):
+    with _lock:
+        _cache_lookups[(name, "hit" if hit else "miss")] += 1
+
+
+def register_cache(name, stats_fn):
+    """stats_fn(): hits/misses/evictions/entries/bytes 키를 가진 dict(ByteLRUCache.stats 형식)"""
+    with _lock:
+        _cache_sources[name] = stats_fn
+
+
+def record_upstream(host, outcome, seconds):
+    """outcome: '2xx'/'3xx'/'4xx'/'5xx' 또는 'error'(연결 실패·타임아웃 등)"""
+    host = host or "unknown"
+    with _lock:
+        _upstream[(host, outcome)] += 1
+        hist = _upstream_latency.get(host)
+        if hist is None:
+            hist = _upstream_latency[host] = _Histogram()
+        hist.observe(seconds)
+
+
+def _status_class(status):
+    return f"{int(status) // 100}xx"
+
+
+# ------------------ 외부 호출 계측 ------------------
+def instrument_requests():
+    """requests.Session.send를 감싸 모든 requests 호출(requests.get 포함)을 호스트별로 센다. 여러 번 불러도 한 번만 적용."""
+    import requests
+    if getattr(requests.Session.send, '_telemetry', False):
+        return
+    original = requests.Session.send
+
+    def send(self, request, **kwargs):
+        host = urlsplit(request.url).hostname
+        started = time.perf_counter()
+        try:
+            resp = original(self, request, **kwargs)
+        except Exception:
+            record_upstream(host, "error", time.perf_counter() - started)
+            raise
+        record_upstream(host, _status_class(resp.status_code), time.perf_counter() - started)
+        return resp
+
+    send._telemetry = True
+    requests.Session.send = send
+
+
+def aiohttp_trace_config():
+    """aiohttp.ClientSession(trace_configs=[...])에 넣는 TraceConfig"""
+    import aiohttp
+
+    async def on_start(session, ctx, params):
+        ctx.started = time.perf_counter()
+
+    async def on_end(session, ctx, params):
+        record_upstream(params.url.host, _status_class(params.response.status), time.perf_counter() - ctx.started)
+
+    async def on_exception(session, ctx, params):
+        record_upstream(params.url.host, "error", time.perf_counter() - ctx.started)
+
+    config = aiohttp.TraceConfig()
+    config.on_request_start.append(on_start)
+    config.on_request_end.append(on_end)
+    config.on_request_exception.append(on_exception)
+    return config
+
+
+# ------------------ 출력 ------------------
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _family(lines, name, kind, help_text):
+    lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+    lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+
+
+def _histogram_lines(lines, name, hist, **labels):
+    cumulative = 0
+    for bound, n in zip(LATENCY_BUCKETS, hist.counts):
+        cumulative += n
+        lines.append(f"{PREFIX}_{name}_bucket{_labels(**labels, le=repr(bound))} {cumulative}")
+    lines.append(f"{PREFIX}_{name}_bucket{_labels(**labels, le='+Inf')} {hist.count}")
+    lines.append(f"{PREFIX}_{name}_sum{_labels(**labels)} {hist.total:.6f}")
+    lines.append(f"{PREFIX}_{name}_count{_labels(**labels)} {hist.count}")
+
+
+def render():
+    """현재 계측값 전체를 Prometheus 텍스트 형식으로"""
+    with _lock:
+        requests_ = dict(_requests)
+        errors = dict(_errors)
+        latency = {k: (list(h.counts), h.total, h.count) for k, h in _latency.items()}
+        cpu = dict(_cpu_seconds)
+        lookups = dict(_cache_lookups)
+        upstream = dict(_upstream)
+        upstream_latency = {k: (list(h.counts), h.total, h.count) for k, h in _upstream_latency.items()}
+        sources = dict(_cache_sources)
+
+    def hist(snapshot):
+        h = _Histogram()
+        h.counts, h.total, h.count = snapshot
+        return h
+
+    lines = []
+    _family(lines, "http_requests_total", "counter", "라우트별 요청 수")
+    for (route, method, status), n in sorted(requests_.items()):
+        lines.append(f"{PREFIX}_http_requests_total{_labels(route=route, method=method, status=status)} {n}")
+    _family(lines, "http_request_errors_total", "counter", "라우트별 5xx 응답 수")
+    for (route, method), n in sorted(errors.items()):
+        lines.append(f"{PREFIX}_http_request_errors_total{_labels(route=route, method=method)} {n}")
+    _family(lines, "http_request_duration_seconds", "histogram", "라우트별 처리 시간(초)")
+    for (route, method), snap in sorted(latency.items()):
+        _histogram_lines(lines, "http_request_duration_seconds", hist(snap), route=route, method=method)
+    _family(lines, "http_request_cpu_seconds_total", "counter", "라우트 처리 스레드의 CPU 시간 합(초)")
+    for (route, method), s in sorted(cpu.items()):
+        lines.append(f"{PREFIX}_http_request_cpu_seconds_total{_labels(route=route, method=method)} {s:.6f}")
+
+    _family(lines, "cache_lookups_total", "counter", "캐시 조회 수(result=hit|miss)")
+    for (cache, result), n in sorted(lookups.items()):
+        lines.append(f"{PREFIX}_cache_lookups_total{_labels(cache=cache, result=result)} {n}")
+    stats = {}
+    for name, fn in sorted(sources.items()):
+        try:
+            stats[name] = fn()
+        except Exception:
+            continue
+    for name, st in stats.items():
+        for result, field in (("hit", "hits"), ("miss", "misses")):
+            lines.append(f"{PREFIX}_cache_lookups_total{_labels(cache=name, result=result)} {st.get(field, 0)}")
+    _family(lines, "cache_evictions_total", "counter", "캐시 축출 수")
+    for name, st in stats.items():
+        lines.append(f"{PREFIX}_cache_evictions_total{_labels(cache=name)} {st.get('evictions', 0)}")
+    _family(lines, "cache_entries", "gauge", "캐시 항목 수")
+    for name, st in stats.items():
+        lines.append(f"{PREFIX}_cache_entries{_labels(cache=name)} {st.get('entries', 0)}")
+    _family(lines, "cache_bytes", "gauge", "캐시 사용량 추정(바이트)")
+    for name, st in stats.items():
+        lines.append(f"{PREFIX}_cache_bytes{_labels(cache=name)} {st.get('bytes', 0)}")
+
+    _family(lines, "upstream_requests_total", "counter", "외부 호출 수(호스트, 결과별)")
+    for (host, outcome), n in sorted(upstream.items()):
+        lines.append(f"{PREFIX}_upstream_requests_total{_labels(host=host, outcome=outcome)} {n}")
+    _family(lines, "upstream_request_duration_seconds", "histogram", "외부 호출 시간(초)")
+    for host, snap in sorted(upstream_latency.items()):
+        _histogram_lines(lines, "upstream_request_duration_seconds", hist(snap), host=host)
+
+    _family(lines, "process_cpu_seconds_total", "counter", "프로세스 CPU 시간(초)")
+    lines.append(f"{PREFIX}_process_cpu_seconds_total {time.process_time():.6f}")
+    _family(lines, "process_start_time_seconds", "gauge", "프로세스 시작 시각(유닉스 초)")
+    lines.append(f"{PREFIX}_process_start_time_seconds {_started_at:.3f}")
+    _family(lines, "threads", "gauge", "살아 있는 스레드 수")
+    lines.append(f"{PREFIX}_threads {threading.active_count()}")
+    return "\n".join(lines) + "\n"
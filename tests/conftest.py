@@ -0,0 +1,72 @@
+# 공용 픽스처: 네트워크 없이 app을 쓰기 위한 합성 일별 시세(sise_day) 페이지와 임시 저장소
+
+import datetime
+
+import numpy as np
+import pytest
+
+
+class FakeSise:
+    """
+    최신 → 과거 순 10행짜리 페이지를 parse_sise_day 반환 형식으로 돌려주는 가짜 fetch_ohlc_pages.
+    upto: 지금까지 상장된 봉 수(새 봉이 생기는 상황), revise(): 마지막 봉 장중 정정.
+    failing: 이 페이지 번호들은 파싱 실패(None)로 돌려준다.
+    """
+
+    def __init__(self, n=400, upto=390, seed=0):
+        rng = np.random.default_rng(seed)
+        day, dates = datetime.date(2020, 1, 1), []
+        while len(dates) < n:
+            if day.weekday() < 5:
+                dates.append(day.year * 10000 + day.month * 100 + day.day)
+            day += datetime.timedelta(days=1)
+        self.dates = np.array(dates, dtype=np.int64)
+        self.close = np.round(10000 * np.exp(np.cumsum(rng.normal(0, 0.02, n))))
+        self.open = np.round(self.close * (1 + rng.normal(0, 0.01, n)))
+        self.high = np.maximum(self.open, self.close) + np.round(rng.uniform(0, 200, n))
+        self.low = np.minimum(self.open, self.close) - np.round(rng.uniform(0, 200, n))
+        self.volume = np.round(rng.uniform(1e5, 1e6, n))
+        self.upto = upto
+        self.failing = set()
+        self.calls = []
+
+    def revise(self, factor):
+        """마지막 봉(upto-1)의 종가/고가/저가를 바꾼다(장중 정정)."""
+        i = self.upto - 1
+        self.close[i] = np.round(self.close[i] * factor)
+        self.high[i] = max(self.high[i], self.close[i])
+        self.low[i] = min(self.low[i], self.close[i])
+
+    def page(self, p):
+        idx = np.arange(self.upto - 1, -1, -1)[(p - 1) * 10:p * 10]
+        if p in self.failing or idx.size == 0:
+            return None
+        return {"dates": self.dates[idx], "open": self.open[idx], "high": self.high[idx],
+                "low": self.low[idx], "close": self.close[idx], "volume": self.volume[idx]}
+
+    def __call__(self, code, pages):
+        self.calls.extend(pages)
+        return [self.page(p) for p in pages]
+
+
+@pytest.fixture
+def app_env(tmp_path, monkeypatch):
+    """(app 모듈, FakeSise). 저장소는 임시 폴더, 캐시는 비운 상태."""
+    import app
+    import ohlc_store
+
+    fake = FakeSise()
+    monkeypatch.setattr(ohlc_store, "STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(app, "fetch_ohlc_pages", fake)
+    for c in (app.raw_ohlc_cache, app.precomputed_stock_data, app.indicator_stream_cache, app.pattern_cache):
+        c.clear()
+    app.cache.clear()
+    app.panel_cache.clear()
+    yield app, fake
+    for c in (app.raw_ohlc_cache, app.precomputed_stock_data, app.indicator_stream_cache, app.pattern_cache):
+        c.clear()
+
+
+def expire_page1(app, code):
+    """다음 조회 때 1페이지를 다시 확인하도록 TTL을 지난 상태로 만든다."""
+    app.raw_ohlc_cache[code]["page1_checked_at"] -= datetime.timedelta(days=4)
@@ -0,0 +1,46 @@
+import pytest
+
+
+@pytest.mark.parametrize("limit", ["0", "-1"])
+def test_screen_rejects_limit_below_one(app_env, limit):
+    app, _ = app_env
+    resp = app.app.test_client().get(f"/api/screen?rule=rsi%20%3C%2030&limit={limit}")
+    assert resp.status_code == 400
+    assert "limit" in resp.get_json()["error"]
+
+
+@pytest.mark.parametrize("accept, mimetype", [
+    ("application/vnd.newcandle.columnar", "application/vnd.newcandle.columnar"),
+    ("application/vnd.newcandle.columnar;q=0, */*", "application/json"),
+    ("application/vnd.newcandle.columnar;q=0", "application/json"),
+    ("*/*", "application/json"),
+])
+def test_chart_format_follows_accept_quality(app_env, accept, mimetype):
+    app, _ = app_env
+    resp = app.app.test_client().get("/api/chart?code=005930&days=100&families=rsi",
+                                     headers={"Accept": accept})
+    assert resp.status_code == 200
+    assert resp.mimetype == mimetype
+
+
+def test_negotiated_routes_vary_on_accept(app_env):
+    app, _ = app_env
+    client = app.app.test_client()
+    first = client.get("/api/chart?code=005930&days=100&families=rsi")
+    not_modified = client.get("/api/chart?code=005930&days=100&families=rsi",
+                              headers={"If-None-Match": first.headers["ETag"]})
+    bad = client.get("/api/chart?code=005930&days=abc")
+    history = client.post("/get_ohlc_history", data={"code": "005930", "days": "100"})
+    assert not_modified.status_code == 304
+    for resp in (first, not_modified, bad, history):
+        assert "Accept" in resp.headers.get("Vary", "")
+
+
+def test_chart_series_alias_returns_only_that_family(app_env):
+    app, _ = app_env
+    client = app.app.test_client()
+    data = client.get("/api/chart?code=005930&days=100&series=rsi").get_json()
+    assert data["families"] == ["rsi"]
+    assert "rsi" in data and "macd" not in data and "ma5" not in data
+    plain = client.get("/api/chart?code=005930&days=100").get_json()
+    assert plain["families"] == [] and "rsi" not in plain
@@ -0,0 +1,110 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+import bulk_ingest
+import ohlc_store
+from conftest import FakeSise
+
+TODAY = "2026-10-19"
+
+
+@pytest.fixture
+def ingest_env(tmp_path, monkeypatch):
+    fake = FakeSise()
+    monkeypatch.setattr(ohlc_store, "STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(bulk_ingest, "STATE_FILE", str(tmp_path / "state.json"))
+    monkeypatch.setattr(bulk_ingest, "INGEST_RETRY_DELAY_SEC", 0)
+
+    async def fetch_page(code, page, limiter):
+        await asyncio.sleep(0)
+        return fake.page(page)
+    monkeypatch.setattr(bulk_ingest, "_fetch_page", fetch_page)
+    return fake
+
+
+def _write_state(run_date, done, finished, failed=()):
+    with open(bulk_ingest.STATE_FILE, "w", encoding="utf-8") as f:
+        json.dump({"run_date": run_date, "done": done, "failed": list(failed), "finished": finished}, f)
+
+
+def _read_state():
+    with open(bulk_ingest.STATE_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_unfinished_run_of_today_is_resumed(ingest_env):
+    assert bulk_ingest._resumable_run_date(TODAY) is None
+    _write_state(TODAY, ["000001"], finished=False)
+    assert bulk_ingest._resumable_run_date(TODAY) == TODAY
+    assert bulk_ingest._resumable_run_date("2026-10-20") is None
+    _write_state(TODAY, ["000001"], finished=True)
+    assert bulk_ingest._resumable_run_date(TODAY) is None
+    _write_state(TODAY, ["000001"], finished=True, failed=["000002"])
+    assert bulk_ingest._resumable_run_date(TODAY) == TODAY
+
+
+def test_run_persists_and_skips_done_codes(ingest_env):
+    fake = ingest_env
+    _write_state(TODAY, ["000001"], finished=False)
+    done = bulk_ingest._load_state(TODAY)
+
+    stats = asyncio.run(bulk_ingest._run(["000001", "000002"], TODAY, done))
+    assert stats["skipped"] == 1 and stats["failed"] == 0
+    assert ohlc_store.load_ohlc("000001") is None
+    stored = ohlc_store.load_ohlc("000002")
+    np.testing.assert_array_equal(stored["dates"][-10:], fake.dates[fake.upto - 10:fake.upto])
+    assert _read_state() == {"run_date": TODAY, "done": ["000001", "000002"], "failed": [], "finished": True}
+
+
+def test_failed_page_is_not_persisted_past_the_gap(ingest_env):
+    fake = ingest_env
+    fake.failing = {5}
+    stats = asyncio.run(bulk_ingest._run(["000003"], TODAY, set()))
+    assert stats["failed"] == 1
+    # 4페이지까지만 저장(공백 없음), 완료로 기록하지 않음
+    stored = ohlc_store.load_ohlc("000003")
+    np.testing.assert_array_equal(stored["dates"], fake.dates[fake.upto - 40:fake.upto])
+    assert bulk_ingest._load_state(TODAY) == set()
+
+    fake.failing = set()
+    stats = asyncio.run(bulk_ingest._run(["000003"], TODAY, set()))
+    assert stats["failed"] == 0
+    stored = ohlc_store.load_ohlc("000003")
+    np.testing.assert_array_equal(stored["dates"], fake.dates[fake.upto - 370:fake.upto])
+
+
+def test_transient_failure_is_retried_in_the_same_run(ingest_env, monkeypatch):
+    fake = ingest_env
+    fake.failing = {1}
+    real_sleep = asyncio.sleep
+    monkeypatch.setattr(bulk_ingest, "INGEST_RETRY_DELAY_SEC", 0.01)
+
+    async def sleep(delay):
+        if delay == bulk_ingest.INGEST_RETRY_DELAY_SEC:
+            fake.failing = set()     # 재시도 대기 동안 복구됨
+        await real_sleep(0)
+    monkeypatch.setattr(bulk_ingest.asyncio, "sleep", sleep)
+
+    stats = asyncio.run(bulk_ingest._run(["000004"], TODAY, set()))
+    assert stats["retried"] == 1 and stats["failed"] == 0
+    assert _read_state()["done"] == ["000004"] and _read_state()["failed"] == []
+    assert bulk_ingest._resumable_run_date(TODAY) is None
+
+
+def test_persistent_failure_is_recorded_for_next_start(ingest_env):
+    fake = ingest_env
+    fake.failing = {1}
+    stats = asyncio.run(bulk_ingest._run(["000005", "000006"], TODAY, set()))
+    assert stats["failed"] == 2
+    state = _read_state()
+    assert state["finished"] and state["failed"] == ["000005", "000006"]
+    assert bulk_ingest._resumable_run_date(TODAY) == TODAY
+
+    # 다음 시작 때 같은 run_date로 이어서: 실패 종목만 다시 수집
+    fake.failing = set()
+    stats = asyncio.run(bulk_ingest._run(["000005", "000006"], TODAY, bulk_ingest._load_state(TODAY)))
+    assert stats["failed"] == 0 and stats["codes"] == 2
+    assert bulk_ingest._resumable_run_date(TODAY) is None
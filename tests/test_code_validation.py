@@ -0,0 +1,35 @@
+import os
+
+import pytest
+
+import ohlc_store
+
+BAD_CODES = ["../../x", "00593", "0059301", "abcdef", "005930/..", " "]
+
+
+@pytest.mark.parametrize("code", BAD_CODES)
+def test_store_path_rejects_non_codes(code):
+    with pytest.raises(ValueError):
+        ohlc_store._store_path(code)
+
+
+@pytest.mark.parametrize("code", BAD_CODES)
+@pytest.mark.parametrize("method, url, field", [
+    ("post", "/get_ohlc_history", "data"),
+    ("get", "/api/chart", "query_string"),
+    ("get", "/get_financial_data", "query_string"),
+    ("get", "/get_cashflow", "query_string"),
+])
+def test_routes_reject_bad_code_before_touching_store_or_caches(app_env, tmp_path, code, method, url, field):
+    app, fake = app_env
+    resp = getattr(app.app.test_client(), method)(url, **{field: {"code": code, "days": "100"}})
+    assert resp.status_code == 400
+    assert fake.calls == []
+    assert len(app.raw_ohlc_cache) == 0 and len(app.panel_cache._store) == 0
+    assert os.listdir(tmp_path) == []
+
+
+def test_patterns_rejects_non_string_code(app_env):
+    app, _ = app_env
+    resp = app.app.test_client().post("/detect_patterns", json={"code": 5930})
+    assert resp.status_code == 400
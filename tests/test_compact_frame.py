@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+from compact_frame import CompactFrame, WIDE_COLUMNS, round_significant
+from columnar import pack_columns, unpack_columns
+
+N = 50
+
+
+def _frame():
+    rng = np.random.default_rng(1)
+    dates = pd.bdate_range('2024-01-02', periods=N).strftime('%Y.%m.%d')
+    close = 100000 + np.cumsum(rng.normal(0, 500, N))
+    return pd.DataFrame({
+        '날짜': dates, '시가': close, '종가': close, '고가': close + 300, '저가': close - 300,
+        '거래량': rng.uniform(1e5, 1e7, N),
+        'ma5': close + 0.123456789, 'tradingvalue': np.full(N, 547118530413.0),
+        'rsi': rng.uniform(0, 100, N),
+    })
+
+
+def test_price_scale_columns_round_trip_exactly():
+    df = _frame()
+    frame = CompactFrame.from_frame(df, ['ma5', 'tradingvalue', 'rsi'])
+    assert {'ma5', 'tradingvalue'} <= WIDE_COLUMNS
+    assert frame.tolist('ma5') == df['ma5'].tolist()
+    assert frame.tolist('tradingvalue')[0] == 547118530413.0
+    assert frame.tail(10).tolist('ma5') == df['ma5'].tolist()[-10:]
+
+
+def test_float32_columns_serve_float32_precision():
+    df = _frame()
+    served = CompactFrame.from_frame(df, ['rsi']).tolist('rsi')
+    np.testing.assert_allclose(served, df['rsi'], rtol=1e-6)
+    # float32 잡음 자리가 없다: 유효 7자리 이하
+    assert all(len(repr(v).replace('.', '').lstrip('0')) <= 7 for v in served)
+
+
+def test_round_significant():
+    np.testing.assert_array_equal(round_significant(np.array([112522.796875, 0.0, -45.1234567, 123456789.0])),
+                                  [112522.8, 0.0, -45.12346, 123456800.0])
+    assert np.isnan(round_significant(np.array([np.nan]))[0])
+
+
+def test_columnar_marks_float32_columns_only():
+    df = _frame()
+    frame = CompactFrame.from_frame(df, ['ma5', 'rsi'])
+    header, cols = unpack_columns(pack_columns(frame['날짜'], [('ma5', frame['ma5']), ('rsi', frame['rsi'])]))
+    specs = {c['name']: c for c in header['columns']}
+    assert specs['rsi'].get('sig') == 7 and 'sig' not in specs['ma5']
+    np.testing.assert_array_equal(cols['ma5'], df['ma5'])
+    np.testing.assert_array_equal(round_significant(cols['rsi'], specs['rsi']['sig']), frame.tolist('rsi'))
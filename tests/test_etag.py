@@ -0,0 +1,60 @@
+import pytest
+
+from conftest import expire_page1
+
+CODE = "005930"
+URL = f"/api/chart?code={CODE}&days=100&families=rsi"
+
+
+@pytest.fixture
+def slice_calls(app_env, monkeypatch):
+    """_load_chart_slice 호출(본문을 새로 만든 횟수)을 센다."""
+    app, _ = app_env
+    calls = []
+    real = app._load_chart_slice
+
+    def counting(*args):
+        calls.append(args)
+        return real(*args)
+
+    monkeypatch.setattr(app, "_load_chart_slice", counting)
+    return calls
+
+
+def test_matching_etag_is_304_without_building_body(app_env, slice_calls):
+    app, fake = app_env
+    client = app.app.test_client()
+    first = client.get(URL)
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and len(slice_calls) == 1
+
+    app.cache.clear()   # 응답 캐시가 비어도 검증자만으로 304
+    resp = client.get(URL, headers={"If-None-Match": etag})
+    assert resp.status_code == 304 and resp.data == b""
+    assert resp.headers["ETag"] == etag and resp.cache_control.no_cache
+    assert len(slice_calls) == 1
+    assert fake.calls.count(1) == 1   # 1페이지 TTL 안에서는 다시 받지 않는다
+
+
+def test_etag_changes_with_params_format_and_version(app_env, slice_calls):
+    app, fake = app_env
+    client = app.app.test_client()
+    etag = client.get(URL).headers["ETag"]
+    # 파라미터 순서/중복만 다른 요청은 같은 검증자
+    assert client.get(f"/api/chart?families=rsi,rsi&days=100&code={CODE}").headers["ETag"] == etag
+    assert client.get(URL + "&format=columnar").headers["ETag"] != etag
+    assert client.get(URL.replace("days=100", "days=50")).headers["ETag"] != etag
+
+    fake.revise(1.05)
+    expire_page1(app, CODE)
+    resp = client.get(URL, headers={"If-None-Match": etag})
+    assert resp.status_code == 200 and resp.headers["ETag"] != etag
+
+
+def test_post_route_never_answers_304(app_env):
+    app, _ = app_env
+    client = app.app.test_client()
+    form = {"code": CODE, "days": "100", "rsi": "true"}
+    etag = client.post("/get_ohlc_history", data=form).headers["ETag"]
+    resp = client.post("/get_ohlc_history", data=form, headers={"If-None-Match": etag})
+    assert resp.status_code == 200 and resp.headers["ETag"] == etag
@@ -0,0 +1,50 @@
+import numpy as np
+
+from indicator_engine import (INDICATOR_COLUMNS, compute_indicator_block, compute_indicator_matrices,
+                              stack_right_aligned)
+
+N = 150
+
+
+def _prices(n, seed):
+    rng = np.random.default_rng(seed)
+    close = np.round(10000 * np.exp(np.cumsum(rng.normal(0, 0.02, n))))
+    open_ = np.round(close * (1 + rng.normal(0, 0.01, n)))
+    high = np.maximum(open_, close) + np.round(rng.uniform(0, 200, n))
+    low = np.minimum(open_, close) - np.round(rng.uniform(0, 200, n))
+    volume = np.round(rng.uniform(1e5, 1e6, n))
+    return open_, high, low, close, volume
+
+
+# 상장 기간이 다른 종목들(N보다 긴 종목은 최근 N봉만 쓴다)
+LENGTHS = [N, 90, 200, 40]
+SYMBOLS = [_prices(n, seed) for seed, n in enumerate(LENGTHS)]
+
+
+def _matrices():
+    return [stack_right_aligned([s[k] for s in SYMBOLS], N) for k in range(5)]
+
+
+def test_stack_right_aligned_pads_front_and_trims_old_bars():
+    close = _matrices()[3]
+    assert close.shape == (len(SYMBOLS), N)
+    assert np.isnan(close[1, :N - 90]).all()
+    np.testing.assert_array_equal(close[1, N - 90:], SYMBOLS[1][3])
+    np.testing.assert_array_equal(close[2], SYMBOLS[2][3][-N:])
+
+
+def test_matrix_matches_each_symbol_computed_alone():
+    block = compute_indicator_block(*_matrices())
+    assert block.shape == (len(INDICATOR_COLUMNS), len(SYMBOLS), N)
+    for s, (prices, n) in enumerate(zip(SYMBOLS, LENGTHS)):
+        alone = compute_indicator_block(*(p[-N:] for p in prices))
+        start = N - min(n, N)
+        np.testing.assert_array_equal(block[:, s, start:], alone, err_msg=f"symbol {s}")
+
+
+def test_matrices_leave_warmup_and_pre_listing_bars_nan():
+    mats = compute_indicator_matrices(*_matrices(), columns=('ma20', 'rsi', 'psar'))
+    assert set(mats) == {'ma20', 'rsi', 'psar'}
+    ma20 = mats['ma20']
+    assert np.isnan(ma20[1, :N - 90 + 19]).all() and not np.isnan(ma20[1, N - 90 + 19:]).any()
+    assert np.isnan(mats['psar'][3, :N - 40]).all() and not np.isnan(mats['psar'][3, N - 40:]).any()
@@ -0,0 +1,35 @@
+import numpy as np
+
+from indicator_engine import compute_indicator_block
+from conftest import expire_page1
+
+CODE = "005930"
+FAMILIES = ["macd", "rsi", "adx", "atr", "psar"]
+
+
+def _assert_matches_full_recompute(frame, columns):
+    full = compute_indicator_block(*frame.price_inputs(), columns=columns)
+    for i, col in enumerate(columns):
+        np.testing.assert_allclose(frame[col][-1], full[i][-1], rtol=1e-5, err_msg=col)
+
+
+def test_revision_after_rebuild_matches_full_recompute(app_env):
+    app, fake = app_env
+    columns = app._served_columns(FAMILIES)
+
+    # 짧은 프레임 + 장중 정정 → 스트리밍 상태가 저장된다
+    app.get_precomputed_frame(CODE, 150, FAMILIES)
+    fake.revise(1.01)
+    expire_page1(app, CODE)
+    app.get_precomputed_frame(CODE, 150, FAMILIES)
+    assert CODE in app.indicator_stream_cache
+
+    # 더 긴 구간 요청 → 시작일/길이가 다른 프레임으로 전체 재구성
+    app.get_precomputed_frame(CODE, 300, FAMILIES)
+
+    # 재구성 뒤 마지막 봉 정정: 이전 프레임의 상태를 쓰면 값이 어긋난다
+    fake.revise(1.03)
+    expire_page1(app, CODE)
+    frame = app.get_precomputed_frame(CODE, 300, FAMILIES)
+    assert frame["종가"][-1] == fake.close[fake.upto - 1]
+    _assert_matches_full_recompute(frame, columns)
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from ohlc_store import merge_ohlc, load_ohlc
+from conftest import FakeSise, expire_page1
+
+CODE = "005930"
+
+
+def _rows(fake, lo, hi):
+    idx = np.arange(lo, hi)
+    return {"dates": fake.dates[idx], "open": fake.open[idx], "high": fake.high[idx],
+            "low": fake.low[idx], "close": fake.close[idx], "volume": fake.volume[idx]}
+
+
+def test_merge_fills_interior_gap_and_new_rows_win():
+    fake = FakeSise()
+    cur = merge_ohlc(_rows(fake, 0, 10), _rows(fake, 20, 30))   # 10~19 공백
+    new = _rows(fake, 5, 25)
+    new["close"] = new["close"] + 1
+    merged = merge_ohlc(cur, new)
+    np.testing.assert_array_equal(merged["dates"], fake.dates[:30])
+    np.testing.assert_array_equal(merged["close"][5:25], fake.close[5:25] + 1)
+    np.testing.assert_array_equal(merged["close"][:5], fake.close[:5])
+
+
+def test_failed_middle_page_is_not_persisted_and_retried(app_env):
+    app, fake = app_env
+    fake.failing = {3}
+    df = app.prepare_full_ohlc_data(CODE, 100)
+
+    # 2페이지까지만 반영: 저장소/엔트리에 공백 없음, 전체 이력으로 오인하지 않음
+    assert len(df) == 20
+    assert not df.attrs['all_history']
+    assert app.raw_ohlc_cache[CODE]["pages_fetched"] == 2
+    stored = load_ohlc(CODE)
+    np.testing.assert_array_equal(stored["dates"], fake.dates[fake.upto - 20:fake.upto])
+
+    # 복구 후 다음 요청은 남은 페이지부터 다시 받아 채운다
+    fake.failing = set()
+    fake.calls.clear()
+    df = app.prepare_full_ohlc_data(CODE, 100)
+    assert fake.calls == list(range(3, 11))
+    assert len(df) == 100
+    np.testing.assert_array_equal(load_ohlc(CODE)["dates"], fake.dates[fake.upto - 100:fake.upto])
+
+
+def test_all_pages_failing_retries_on_next_request(app_env):
+    app, fake = app_env
+    fake.failing = set(range(1, 40))
+    with pytest.raises(ValueError):
+        app.prepare_full_ohlc_data(CODE, 100)
+    assert app.raw_ohlc_cache[CODE]["pages_fetched"] == 0
+
+    fake.failing = set()
+    df = app.prepare_full_ohlc_data(CODE, 100)
+    assert len(df) == 100
+
+
+def test_incomplete_latest_sync_is_not_merged(app_env):
+    app, fake = app_env
+    fake.upto = 380
+    app.prepare_full_ohlc_data(CODE, 100)
+    version = app.raw_ohlc_cache[CODE]["version"]
+
+    # 새 봉 15개 → 1·2페이지가 필요한데 2페이지 실패: 공백이 생기므로 반영하지 않는다
+    fake.upto += 15
+    fake.failing = {2}
+    expire_page1(app, CODE)
+    app.prepare_full_ohlc_data(CODE, 100)
+    assert app.raw_ohlc_cache[CODE]["version"] == version
+    assert load_ohlc(CODE)["dates"][-1] == fake.dates[fake.upto - 16]
+
+    fake.failing = set()
+    expire_page1(app, CODE)
+    df = app.prepare_full_ohlc_data(CODE, 100)
+    np.testing.assert_array_equal(load_ohlc(CODE)["dates"], fake.dates[fake.upto - 115:fake.upto])
+    assert len(df) == 100
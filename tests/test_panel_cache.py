@@ -0,0 +1,54 @@
+import time
+
+import pytest
+
+CODE = "005930"
+GOOD_CASHFLOW = {"영업활동으로인한현금흐름": [1, 2, 3, 4], "투자활동으로인한현금흐름": [-1, -2, -3, -4],
+                 "재무활동으로인한현금흐름": [0, 0, 0, 0]}
+FAILED_CASHFLOW = {k: [None] * 4 for k in GOOD_CASHFLOW}
+
+
+def _wait_refreshes(app, done):
+    deadline = time.monotonic() + 5
+    while app.panel_cache.refreshes + app.panel_cache.refresh_failures < done:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+@pytest.mark.parametrize("url, kind, target, good, failed", [
+    ("/get_sentiment_data", "sentiment", "get_sentiment_index",
+     {"positive": 60.0, "negative": 30.0, "neutral": 10.0}, {"error": "댓글 데이터가 없습니다."}),
+    ("/get_cashflow", "cashflow", "get_cashflow_data", GOOD_CASHFLOW, FAILED_CASHFLOW),
+])
+def test_error_shaped_refresh_keeps_last_good_value(app_env, monkeypatch, url, kind, target, good, failed):
+    app, _ = app_env
+    monkeypatch.setitem(app.PANEL_TTLS, kind, 0)   # 매 요청마다 백그라운드 갱신
+    result = {"data": good}
+    monkeypatch.setattr(app, target, lambda *a, **kw: result["data"])
+    client = app.app.test_client()
+
+    first = client.get(f"{url}?code={CODE}").get_json()
+    failures = app.panel_cache.refresh_failures
+
+    result["data"] = failed
+    before = app.panel_cache.refreshes + app.panel_cache.refresh_failures
+    assert client.get(f"{url}?code={CODE}").get_json() == first
+    _wait_refreshes(app, before + 1)
+    assert app.panel_cache.refresh_failures == failures + 1
+
+    # 실패 결과가 캐시 값을 덮어쓰지 않았다
+    assert client.get(f"{url}?code={CODE}").get_json() == first
+
+
+def test_error_shaped_first_load_is_not_cached(app_env, monkeypatch):
+    app, _ = app_env
+    result = {"data": {"error": "timeout"}}
+    monkeypatch.setattr(app, "get_sentiment_index", lambda code: result["data"])
+    client = app.app.test_client()
+
+    resp = client.get(f"/get_sentiment_data?code={CODE}")
+    assert resp.status_code == 500 and "error" in resp.get_json()
+
+    result["data"] = {"positive": 50.0, "negative": 50.0, "neutral": 0.0}
+    resp = client.get(f"/get_sentiment_data?code={CODE}")
+    assert resp.status_code == 200 and resp.get_json() == result["data"]
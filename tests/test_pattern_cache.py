@@ -0,0 +1,58 @@
+import pytest
+
+import candle
+from conftest import expire_page1
+
+CODE = "005930"
+
+
+@pytest.fixture
+def detect_calls(monkeypatch):
+    calls = []
+    real = candle.detect_on_base_and_remap
+
+    def counting(df_base, enabled, days):
+        calls.append((len(df_base), list(enabled), days))
+        return real(df_base, enabled, days)
+    monkeypatch.setattr(candle, "detect_on_base_and_remap", counting)
+    return calls
+
+
+def _post(app, **body):
+    return app.app.test_client().post("/detect_patterns", json=dict({"code": CODE}, **body))
+
+
+def test_results_are_memoized_per_version(app_env, detect_calls):
+    app, fake = app_env
+    first = _post(app, days=60, patterns=["bullish_trend", "bearish_trend"]).get_json()
+    again = _post(app, days=60, patterns=["bearish_trend", "bullish_trend", "bearish_trend"]).get_json()
+    assert again == first and len(detect_calls) == 1
+
+    fake.upto += 1                  # 새 봉 → OHLC 버전이 바뀌면 다시 탐지
+    expire_page1(app, CODE)
+    _post(app, days=60, patterns=["bullish_trend", "bearish_trend"])
+    assert len(detect_calls) == 2
+
+
+@pytest.mark.parametrize("body", [
+    {"days": "abc"}, {"days": 0}, {"days": 1000}, {"days": [30]}, {"patterns": "bullish_trend"},
+])
+def test_bad_params_are_rejected(app_env, detect_calls, body):
+    app, _ = app_env
+    assert _post(app, **body).status_code == 400
+    assert detect_calls == [] and len(app.pattern_cache) == 0
+
+
+def test_unknown_or_unhashable_patterns_are_ignored(app_env, detect_calls):
+    app, _ = app_env
+    resp = _post(app, days=30, patterns=[["x"], {"y": 1}, "bullish_trend", "nope"])
+    assert resp.status_code == 200
+    assert detect_calls[0][1] == ["bullish_trend"]
+
+
+def test_long_window_stays_within_price_cache(app_env, detect_calls):
+    app, _ = app_env
+    assert _post(app, days=365).status_code == 200
+    assert detect_calls[0][0] <= app.MAX_RAW_DAYS
+    frame = app.precomputed_stock_data[CODE]
+    assert not frame.attrs['all_history']
@@ -0,0 +1,88 @@
+import json
+import os
+import pstats
+import time
+
+import pytest
+
+import profiling
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    """프로파일링을 켠 상태(느린 구간 기준 20ms, 표본 추출 끔), 기록은 임시 폴더로."""
+    monkeypatch.setattr(profiling, "ENABLED", True)
+    monkeypatch.setattr(profiling, "PROFILE_SLOW_MS", 20.0)
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_EVERY", 0)
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path / "profiles"))
+    return tmp_path / "profiles"
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def _metas(path):
+    return [json.loads(p.read_text(encoding="utf-8")) for p in sorted(path.glob("*.json"))]
+
+
+def test_disabled_does_nothing(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "ENABLED", False)
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path / "profiles"))
+    assert profiling.start("request", "/x") is None
+    with profiling.profile_scope("daemon", "job"):
+        _busy(0.01)
+    assert not (tmp_path / "profiles").exists()
+
+
+def test_slow_scope_writes_folded_stacks_with_metadata(profile_dir):
+    with profiling.profile_scope("daemon", "theme.daily_update", {"days": 30}):
+        _busy(0.15)
+    [meta] = _metas(profile_dir)
+    assert meta["kind"] == "daemon" and meta["name"] == "theme.daily_update"
+    assert meta["trigger"] == "slow" and meta["elapsed_ms"] >= 150
+    assert json.loads(meta["params"]) == {"days": 30}
+    folded = (profile_dir / meta["file"]).read_text(encoding="utf-8")
+    assert meta["file"].endswith(".folded") and "_busy (test_profiling.py" in folded
+
+
+def test_fast_scope_and_nested_scope_write_nothing_extra(profile_dir):
+    with profiling.profile_scope("daemon", "fast"):
+        pass
+    assert not profile_dir.exists()
+    with profiling.profile_scope("daemon", "outer"):
+        with profiling.profile_scope("daemon", "inner"):
+            _busy(0.05)
+    assert [m["name"] for m in _metas(profile_dir)] == ["outer"]
+
+
+def test_sampled_scope_writes_pstats(profile_dir, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_EVERY", 1)
+    with profiling.profile_scope("daemon", "sampled"):
+        _busy(0.001)
+    [meta] = _metas(profile_dir)
+    assert meta["trigger"] == "sample" and meta["file"].endswith(".pstats")
+    stats = pstats.Stats(str(profile_dir / meta["file"]))
+    assert any(func[2] == "_busy" for func in stats.stats)
+
+
+def test_rotation_keeps_newest_pairs(profile_dir, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_MAX_FILES", 2)
+    for i, started_at in enumerate((1_700_000_000, 1_700_000_100, 1_700_000_200)):
+        token = {"kind": "daemon", "name": f"job{i}", "params": None, "started_at": started_at}
+        profiling._save(token, 10.0, "slow", "folded", lambda path: open(path, "w").close())
+    assert [m["name"] for m in _metas(profile_dir)] == ["job1", "job2"]
+    stems = {os.path.splitext(p)[0] for p in os.listdir(profile_dir)}
+    assert len(stems) == 2 and len(os.listdir(profile_dir)) == 4
+
+
+def test_request_hook_records_route_and_params(app_env, profile_dir, monkeypatch):
+    app, _ = app_env
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_EVERY", 1)
+    assert app.app.test_client().get("/ping?probe=1").status_code == 200
+    [meta] = _metas(profile_dir)
+    assert meta["kind"] == "request" and meta["name"] == "/ping"
+    params = json.loads(meta["params"])
+    assert params["method"] == "GET" and params["args"] == {"probe": ["1"]}
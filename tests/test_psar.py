@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+from ta.trend import PSARIndicator
+
+from indicators import parabolic_sar, psar_initial_state, psar_step
+
+
+def _bars(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 10000 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    high = close * (1 + rng.uniform(0, 0.02, n))
+    low = close * (1 - rng.uniform(0, 0.02, n))
+    return high, low, close
+
+
+def _ta_psar(high, low, close):
+    return PSARIndicator(pd.Series(high), pd.Series(low), pd.Series(close),
+                         step=0.02, max_step=0.2, fillna=False).psar().to_numpy()
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_matches_ta_psar_indicator(seed):
+    h, l, c = _bars(seed=seed)
+    np.testing.assert_array_equal(parabolic_sar(h, l, c)[0], _ta_psar(h, l, c))
+
+
+def test_incremental_update_matches_full_run():
+    h, l, c = _bars()
+    full, _ = parabolic_sar(h, l, c)
+    head, state = parabolic_sar(h[:200], l[:200], c[:200])
+    tail = [psar_step(state, *bar) for bar in zip(h[200:], l[200:], c[200:])]
+    np.testing.assert_array_equal(np.concatenate([head, tail]), full)
+
+
+def test_batch_matches_each_symbol_with_leading_nan_warmup():
+    bars = [_bars(seed=s) for s in range(4)]
+    h, l, c = (np.stack([b[k] for b in bars]) for k in range(3))
+    for arr in (h, l, c):
+        arr[1, :50] = np.nan    # 늦게 상장한 종목
+        arr[3, :120] = np.nan
+    out, state = parabolic_sar(h, l, c)
+    for s in range(4):
+        start = int(np.argmax(~np.isnan(c[s])))
+        assert np.isnan(out[s, :start]).all()
+        np.testing.assert_array_equal(out[s, start:], _ta_psar(h[s, start:], l[s, start:], c[s, start:]))
+    assert state['i'].tolist() == [300, 250, 300, 180]
+
+
+def test_batch_state_resumes():
+    bars = [_bars(seed=s) for s in range(3)]
+    h, l, c = (np.stack([b[k] for b in bars]) for k in range(3))
+    full, _ = parabolic_sar(h, l, c)
+    state = psar_initial_state(3)
+    parabolic_sar(h[:, :100], l[:, :100], c[:, :100], state=state)
+    rest, _ = parabolic_sar(h[:, 100:], l[:, 100:], c[:, 100:], state=state)
+    np.testing.assert_array_equal(rest, full[:, 100:])
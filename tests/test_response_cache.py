@@ -0,0 +1,77 @@
+import pytest
+
+from conftest import expire_page1
+
+CODE = "005930"
+
+
+@pytest.fixture
+def builds(app_env, monkeypatch):
+    """_load_chart_slice 호출(응답 본문을 새로 만든 횟수)을 센다."""
+    app, _ = app_env
+    calls = []
+    real = app._load_chart_slice
+
+    def counting(code, days, families):
+        calls.append((code, days, tuple(families)))
+        return real(code, days, families)
+
+    monkeypatch.setattr(app, "_load_chart_slice", counting)
+    return calls
+
+
+def _history(client, **form):
+    return client.post("/get_ohlc_history", data={"code": CODE, **form})
+
+
+def test_history_key_normalizes_flags(app_env, builds):
+    app, _ = app_env
+    client = app.app.test_client()
+    first = _history(client, days="100", rsi="true", macd="false")
+    # 값 대소문자/공백, 꺼진 플래그, 일수 앞자리 0은 같은 키
+    for form in ({"days": "100", "rsi": "TRUE"}, {"days": "0100", "rsi": " true", "adx": "false"}):
+        resp = _history(client, **form)
+        assert resp.data == first.data
+    assert len(builds) == 1
+
+    _history(client, days="100", rsi="true", macd="true")
+    _history(client, days="120", rsi="true")
+    _history(client, days="100", rsi="true", format="columnar")
+    assert len(builds) == 4
+
+
+def test_new_bar_invalidates_cached_response(app_env, builds):
+    app, fake = app_env
+    client = app.app.test_client()
+    before = _history(client, days="100").get_json()
+    fake.upto += 1
+    expire_page1(app, CODE)
+    after = _history(client, days="100").get_json()
+    assert len(builds) == 2
+    assert after["dates"][-1] != before["dates"][-1] and after["dates"][:-1] == before["dates"][1:]
+
+
+def test_error_responses_are_not_cached(app_env, builds):
+    app, _ = app_env
+    client = app.app.test_client()
+    assert _history(client, days="999").status_code == 400
+    assert _history(client, days="abc").status_code == 400
+    assert app.cache.get(f"resp:get_ohlc_history:{CODE}|999||json") is None
+
+
+def test_json_body_route_keys_on_sorted_body(app_env, monkeypatch):
+    app, _ = app_env
+    calls = []
+
+    def fake_factor(selected, mode, months):
+        calls.append((tuple(selected), mode, months))
+        return {"average_return": 1.0, "condition_text": "", "companies": []}
+
+    monkeypatch.setattr(app, "process_factor_data", fake_factor)
+    client = app.app.test_client()
+    a = client.post("/factor_result", json={"selectedFactors": ["per"], "mode": "AND", "months": 3})
+    b = client.post("/factor_result", data='{"months": 3, "mode": "AND", "selectedFactors": ["per"]}',
+                    content_type="application/json")
+    client.post("/factor_result", json={"selectedFactors": ["pbr"], "mode": "AND", "months": 3})
+    assert a.data == b.data
+    assert calls == [(("per",), "AND", 3), (("pbr",), "AND", 3)]
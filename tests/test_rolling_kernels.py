@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators import rolling_mean, rolling_std, rolling_min, rolling_max, rolling_mad, rolling_window
+
+
+def _series(n=120, seed=3):
+    rng = np.random.default_rng(seed)
+    x = 10000 + np.cumsum(rng.normal(0, 50, n))
+    x[[7, 40]] = np.nan   # NaN이 낀 창은 NaN
+    return x
+
+
+# pandas는 누적 합으로 분산을 구해 짧은 창에서 오차가 커진다(커널은 창마다 두 번 훑는다)
+@pytest.mark.parametrize("kernel, agg, rtol", [
+    (rolling_mean, "mean", 1e-12), (rolling_std, "std", 1e-6), (rolling_min, "min", 0), (rolling_max, "max", 0),
+])
+@pytest.mark.parametrize("w", [2, 3, 14, 26])
+def test_kernels_match_pandas_rolling(kernel, agg, rtol, w):
+    x = _series()
+    expected = getattr(pd.Series(x).rolling(window=w, min_periods=w), agg)().to_numpy()
+    np.testing.assert_allclose(kernel(x, w), expected, rtol=rtol, equal_nan=True)
+
+
+@pytest.mark.parametrize("w", [1, 5, 20])
+def test_rolling_mad_is_bit_identical_to_apply(w):
+    x = _series()
+    expected = pd.Series(x).rolling(window=w, min_periods=w).apply(
+        lambda v: np.mean(np.abs(v - np.mean(v))), raw=True).to_numpy()
+    np.testing.assert_array_equal(rolling_mad(x, w), expected)
+
+
+@pytest.mark.parametrize("kernel", [rolling_mean, rolling_min, rolling_max, rolling_mad])
+def test_kernels_run_along_last_axis_of_a_matrix(kernel):
+    m = np.stack([_series(seed=s) for s in range(4)])
+    out = kernel(m, 9)
+    assert out.shape == m.shape
+    for row, x in zip(out, m):
+        np.testing.assert_array_equal(row, kernel(x, 9))
+
+
+def test_window_longer_than_series_is_all_nan():
+    x = np.arange(5.0)
+    assert rolling_window(x, 9).shape == (0, 9)
+    for kernel in (rolling_mean, rolling_std, rolling_min, rolling_max, rolling_mad):
+        assert np.isnan(kernel(x, 9)).all()
+
+
+def test_calculate_cci_matches_apply_formula():
+    from indicators import calculate_cci
+    rng = np.random.default_rng(5)
+    close = 10000 + np.cumsum(rng.normal(0, 50, 80))
+    df = pd.DataFrame({'날짜': pd.bdate_range('2024-01-02', periods=80), '시가': close,
+                       '고가': close + 40, '저가': close - 40, '종가': close})
+    m = (df['고가'] + df['저가'] + df['종가']) / 3
+    d = m.rolling(window=20, min_periods=20).apply(lambda v: np.mean(np.abs(v - np.mean(v))), raw=True)
+    expected = ((m - m.rolling(window=20, min_periods=20).mean()) / (d * 0.015)).fillna(0)
+    np.testing.assert_array_equal(calculate_cci(df)['CCI'].to_numpy(), expected.to_numpy())
@@ -0,0 +1,118 @@
+import re
+
+import requests
+
+import telemetry
+
+SAMPLE = re.compile(r'^(\w+)(\{.*\})? (\S+)$')
+
+
+def _scrape(client):
+    resp = client.get("/metrics")
+    assert resp.status_code == 200 and resp.content_type == telemetry.CONTENT_TYPE
+    samples, typed = {}, set()
+    for line in resp.get_data(as_text=True).splitlines():
+        if line.startswith("# TYPE "):
+            typed.add(line.split()[2])
+            continue
+        if line.startswith("#"):
+            continue
+        m = SAMPLE.match(line)
+        assert m, line
+        name, labels, value = m.groups()
+        assert re.sub(r'_(bucket|sum|count)$', '', name) in typed or name in typed, line
+        samples[(name, labels or "")] = float(value)
+    return samples
+
+
+def _get(samples, name, **labels):
+    return samples.get((name, telemetry._labels(**labels)), 0.0)
+
+
+def test_route_counts_and_latency_histogram(app_env):
+    app, _ = app_env
+    client = app.app.test_client()
+    route = dict(route="/api/chart", method="GET")
+    before = _scrape(client)
+    client.get("/api/chart?code=005930&days=100&families=rsi")
+    client.get("/api/chart?code=005930&days=abc")
+    after = _scrape(client)
+
+    for status in ("200", "400"):
+        assert _get(after, "newcandle_http_requests_total", **route, status=status) == \
+            _get(before, "newcandle_http_requests_total", **route, status=status) + 1
+    count = _get(after, "newcandle_http_request_duration_seconds_count", **route)
+    assert count == _get(before, "newcandle_http_request_duration_seconds_count", **route) + 2
+    buckets = [v for (name, labels), v in after.items()
+               if name == "newcandle_http_request_duration_seconds_bucket" and 'route="/api/chart"' in labels]
+    assert buckets == sorted(buckets) and buckets[-1] == count
+
+
+def test_server_errors_are_counted(app_env, monkeypatch):
+    app, _ = app_env
+    client = app.app.test_client()
+
+    def broken(*args):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(app, "_load_chart_slice", broken)
+    route = dict(route="/get_ohlc_history", method="POST")
+    before = _get(_scrape(client), "newcandle_http_request_errors_total", **route)
+    assert client.post("/get_ohlc_history", data={"code": "005930", "days": "100"}).status_code == 500
+    assert _get(_scrape(client), "newcandle_http_request_errors_total", **route) == before + 1
+
+
+def test_cache_hits_and_misses(app_env):
+    app, _ = app_env
+    client = app.app.test_client()
+    flask_cache = dict(cache="flask_response_cache")
+    before = _scrape(client)
+    client.get("/api/chart?code=005930&days=100&families=rsi")
+    client.get("/api/chart?code=005930&days=100&families=rsi")
+    after = _scrape(client)
+    for result in ("hit", "miss"):
+        assert _get(after, "newcandle_cache_lookups_total", **flask_cache, result=result) == \
+            _get(before, "newcandle_cache_lookups_total", **flask_cache, result=result) + 1
+    for name in ("precomputed_stock_data", "raw_ohlc_cache"):
+        assert ("newcandle_cache_entries", telemetry._labels(cache=name)) in after
+    assert _get(after, "newcandle_cache_entries", cache="raw_ohlc_cache") == 1
+
+
+class _Adapter(requests.adapters.BaseAdapter):
+    def __init__(self, status=200, fail=False):
+        super().__init__()
+        self.status, self.fail = status, fail
+
+    def send(self, request, **kwargs):
+        if self.fail:
+            raise requests.ConnectionError("down")
+        resp = requests.Response()
+        resp.status_code, resp.url, resp.request = self.status, request.url, request
+        return resp
+
+    def close(self):
+        pass
+
+
+def test_upstream_requests_counted_per_host(app_env):
+    app, _ = app_env
+    client = app.app.test_client()
+    before = _scrape(client)
+    session = requests.Session()
+    session.mount("http://ok.test/", _Adapter(200))
+    session.mount("http://down.test/", _Adapter(fail=True))
+    session.get("http://ok.test/a")
+    session.get("http://ok.test/b")
+    try:
+        session.get("http://down.test/")
+    except requests.ConnectionError:
+        pass
+    after = _scrape(client)
+    assert _get(after, "newcandle_upstream_requests_total", host="ok.test", outcome="2xx") == \
+        _get(before, "newcandle_upstream_requests_total", host="ok.test", outcome="2xx") + 2
+    assert _get(after, "newcandle_upstream_requests_total", host="down.test", outcome="error") == \
+        _get(before, "newcandle_upstream_requests_total", host="down.test", outcome="error") + 1
+
+
+def test_label_values_are_escaped():
+    assert telemetry._labels(route='a"b\\c\nd') == '{route="a\\"b\\\\c\\nd"}'
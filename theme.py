@@ -13,6 +13,9 @@ from typing import Dict, List, Tuple, Optional
 import numpy as np
 from collections import Counter
 import statistics
+from naver_crawler import parse_sise_day
+from ohlc_store import date_int_to_str
+from profiling import profile_scope
 
 # ================= 설정 =================
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -138,29 +141,14 @@ def fetch_stock_closes_for_period(code: str, start_date: str, end_date: str, ses
             url = f"https://finance.naver.com/item/sise_day.naver?code={code}&page={page}"
             response = session.get(url, timeout=5)
             
-            # HTML 파싱
-            tables = pd.read_html(StringIO(response.text), header=0)
-            if not tables:
+            # HTML 파싱 (날짜/종가 배열을 바로 추출)
+            parsed = parse_sise_day(response.text)
+            if parsed is None:
                 break
             
-            df = tables[0]
-            df = df.dropna(subset=['날짜'])
-            
-            if df.empty:
-                break
-            
-            for _, row in df.iterrows():
-                try:
-                    date_str = str(row['날짜']).strip()
-                    close_val = float(str(row['종가']).replace(',', '').strip())
-                    
-                    # 날짜 형식 통일 (YYYY.MM.DD)
-                    dt = pd.to_datetime(date_str)
-                    date_formatted = dt.strftime('%Y.%m.%d')
-                    closes[date_formatted] = close_val
-                except Exception as parse_err:
-                    # 개별 행 파싱 실패는 무시
-                    continue
+            for d, close_val in zip(parsed['dates'], parsed['close']):
+                # 날짜 형식 통일 (YYYY.MM.DD)
+                closes[date_int_to_str(d)] = float(close_val)
             
             # 충분히 모았으면 중단
             if len(closes) >= 280:
@@ -660,11 +648,13 @@ def start_theme_snapshot_daemon():
                 time.sleep(sleep_seconds)
                 
                 # 일일 갱신
-                daily_theme_update()
+                with profile_scope("daemon", "theme.daily_update"):
+                    daily_theme_update()
                 
                 # 월요일이면 주간 갱신도
                 if datetime.datetime.now(tz=KST).weekday() == 0:
-                    weekly_theme_update()
+                    with profile_scope("daemon", "theme.weekly_update"):
+                        weekly_theme_update()
                 
             except Exception as e:
                 logging.error(f"테마 데몬 에러: {e}")